@@ -0,0 +1,5 @@
+"""Benchmarks of ModRC against synthetic ModRC directories.
+
+Run them with ``python -m benchmarks``. Every benchmark runs in a temporary home directory, so the
+ModRC directory of the user running them is never touched.
+"""
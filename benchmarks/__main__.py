@@ -0,0 +1,231 @@
+import inspect
+import json
+import platform
+import statistics
+import time
+
+import click
+
+import modrc
+from modrc.lib import file, helper, setup
+
+from benchmarks import tree
+
+
+# the benchmarks also run against older versions of ModRC to compare with, so newer APIs are used only if present.
+# Versions without force compile every file on every call, so the warm compile of those compiles the tree again
+COMPILE_KWARGS = {'force': True} if 'force' in inspect.signature(file.compile_file).parameters else {}
+
+
+def get_version():
+    """Get the version of ModRC being benchmarked.
+
+    Returns
+    -------
+    str or None
+        The installed version, or None if ModRC is not installed as a distribution.
+    """
+    if hasattr(modrc, 'get_version'):
+        return modrc.get_version()
+    return getattr(modrc, '__version__', None)
+
+def get_path_lookups():
+    """Get the functions that look up each ModRC path.
+
+    Returns
+    -------
+    dict
+        Maps each benchmark name to a function that looks up a path, through the shared context in the
+        versions of ModRC that have one and through the helper functions otherwise.
+    """
+    if not hasattr(helper, 'get_context'):
+        return {
+            'get_modrc_dir': helper.get_modrc_dir,
+            'get_packages_dir': helper.get_packages_dir,
+            'get_live_dir': helper.get_live_dir
+        }
+    context = helper.get_context()
+    return {
+        'get_modrc_dir': lambda: context.modrc_dir,
+        'get_packages_dir': lambda: context.packages_dir,
+        'get_live_dir': lambda: context.live_dir
+    }
+
+def measure_compile(created, repeat, **kwargs):
+    """Time compiling every file of the tree.
+
+    Parameters
+    ----------
+    created : list of tuple
+        The file and package name pairs of the tree.
+    repeat : int
+        The number of samples to take.
+    **kwargs
+        The keyword arguments to compile every file with.
+
+    Returns
+    -------
+    dict
+        The fastest, median and mean seconds per compiled file over the samples.
+    """
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for file_name, package_name in created:
+            file.compile_file(file_name, package_name, tree.SYSTEM, **kwargs)
+        samples.append((time.perf_counter() - start) / len(created))
+    return summarize(samples, repeat * len(created))
+
+def summarize(samples, calls):
+    """Summarize timing samples.
+
+    Parameters
+    ----------
+    samples : list of float
+        The seconds per call of every sample.
+    calls : int
+        The total number of calls over the samples.
+
+    Returns
+    -------
+    dict
+        The number of calls and the fastest, median and mean seconds per call.
+    """
+    return {'calls': calls, 'min': min(samples), 'median': statistics.median(samples), 'mean': statistics.mean(samples)}
+
+def measure(func, repeat, number=1):
+    """Time a function.
+
+    Parameters
+    ----------
+    func : callable
+        The function to time, called without arguments.
+    repeat : int
+        The number of samples to take.
+    number : int, optional
+        The number of calls in every sample. Defaults to 1.
+
+    Returns
+    -------
+    dict
+        The fastest, median and mean seconds per call over the samples.
+    """
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        samples.append((time.perf_counter() - start) / number)
+    return summarize(samples, repeat * number)
+
+def run_benchmarks(packages, files, filters_per_file, filter_size, repeat):
+    """Run every benchmark in a temporary home directory.
+
+    Parameters
+    ----------
+    packages : int
+        The number of packages in the synthetic tree.
+    files : int
+        The number of files in every package.
+    filters_per_file : int
+        The number of filters of every file.
+    filter_size : int
+        The size of every filter in bytes.
+    repeat : int
+        The number of samples of every benchmark.
+
+    Returns
+    -------
+    dict
+        The parameters, environment and results of the run.
+    """
+    results = {}
+    with tree.temporary_home():
+        setup.initial_setup()
+        start = time.perf_counter()
+        created = tree.generate_tree(packages, files, filters_per_file, filter_size)
+        generate_seconds = time.perf_counter() - start
+
+        # compile every file of the tree in each sample, then again once the tree is up to date
+        results['compile_file'] = measure_compile(created, repeat, **COMPILE_KWARGS)
+        results['compile_file_warm'] = measure_compile(created, repeat)
+        for name, lookup in get_path_lookups().items():
+            results[name] = measure(lookup, repeat, 1000)
+        filter_names = tree.get_filter_names(filters_per_file) + ['linux.Ubuntu', 'windows', 'macos.11']
+        results['valid_filter_name'] = measure(lambda: [helper.valid_filter_name(name) for name in filter_names],
+                                               repeat, 1000)
+        results['populate_modrc_file'] = measure(
+            lambda: setup.populate_modrc_file('package-0', 'vim', True, False), repeat, 100)
+        start = time.perf_counter()
+        setup.teardown()
+        teardown_tree_seconds = time.perf_counter() - start
+        # time setup and teardown of an empty ModRC directory in pairs so each starts from a clean home
+        setup_samples = []
+        teardown_samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            setup.initial_setup()
+            setup_samples.append(time.perf_counter() - start)
+            start = time.perf_counter()
+            setup.teardown()
+            teardown_samples.append(time.perf_counter() - start)
+        results['initial_setup'] = summarize(setup_samples, repeat)
+        results['teardown'] = summarize(teardown_samples, repeat)
+    return {
+        'version': get_version(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'parameters': {
+            'packages': packages,
+            'files': files,
+            'filters': filters_per_file,
+            'filter_size': filter_size,
+            'repeat': repeat
+        },
+        'generate_seconds': generate_seconds,
+        'teardown_tree_seconds': teardown_tree_seconds,
+        'results': results
+    }
+
+def compare(baseline, report):
+    """Compare the median time of every benchmark with a baseline run.
+
+    Parameters
+    ----------
+    baseline : dict
+        The report of the baseline run.
+    report : dict
+        The report of this run.
+
+    Returns
+    -------
+    dict
+        Maps each benchmark in both runs to its median time divided by the baseline median time.
+    """
+    return {
+        name: result['median'] / baseline['results'][name]['median']
+        for name, result in report['results'].items()
+        if name in baseline.get('results', {}) and baseline['results'][name]['median']
+    }
+
+
+@click.command()
+@click.option('--packages', default=10, type=click.IntRange(min=1), help='The number of packages.')
+@click.option('--files', default=20, type=click.IntRange(min=1), help='The number of files in every package.')
+@click.option('--filters', 'filters_per_file', default=5, type=click.IntRange(min=1), help='The number of filters of every file.')
+@click.option('--filter-size', default=1024, type=click.IntRange(min=0), help='The size of every filter in bytes.')
+@click.option('-r', '--repeat', default=5, type=click.IntRange(min=1), help='The number of samples of every benchmark.')
+@click.option('-o', '--output', type=click.File('w'), default='-', help='The file to write the JSON report to.')
+@click.option('-c', '--compare', 'baseline', type=click.File('r'), help='A previous JSON report to compare against.')
+def main(packages, files, filters_per_file, filter_size, repeat, output, baseline):
+    """Benchmark ModRC against a synthetic ModRC directory and write the results as JSON."""
+    report = run_benchmarks(packages, files, filters_per_file, filter_size, repeat)
+    if baseline is not None:
+        baseline_report = json.load(baseline)
+        report['compare'] = {'version': baseline_report.get('version'), 'ratios': compare(baseline_report, report)}
+    json.dump(report, output, indent=2, sort_keys=True)
+    output.write('\n')
+
+
+if __name__ == '__main__':
+    main()
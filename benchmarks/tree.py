@@ -0,0 +1,100 @@
+import contextlib
+import os
+import tempfile
+
+from modrc.lib import file, helper, package
+
+try:
+    from modrc.lib import config
+except ImportError:
+    # older versions of ModRC did not cache parsed configs
+    config = None
+
+
+# filter names that a system compiled for the benchmarks selects, least to most specific
+SYSTEM = 'linux.ubuntu.20.04'
+FILTER_NAMES = [
+    'global', 'linux', 'linux.ubuntu', 'linux.ubuntu.20', 'linux.ubuntu.20.04',
+    'macos', 'macos.10', 'macos.10.15', 'macos.10.15.1', 'linux.arch'
+]
+
+
+def clear_caches():
+    """Forget the paths and configs cached by ModRC, in the versions of ModRC that cache them."""
+    if hasattr(helper, 'get_context'):
+        helper.get_context().invalidate()
+    if config is not None:
+        config.clear_cache()
+
+@contextlib.contextmanager
+def temporary_home():
+    """Point the home directory at a temporary directory for the duration of the block.
+
+    Yields
+    ------
+    str
+        The path to the temporary home directory.
+    """
+    old_home = os.environ.get('HOME')
+    with tempfile.TemporaryDirectory() as home:
+        os.environ['HOME'] = home
+        clear_caches()
+        try:
+            yield home
+        finally:
+            if old_home is None:
+                del os.environ['HOME']
+            else:
+                os.environ['HOME'] = old_home
+            clear_caches()
+
+def get_filter_names(count):
+    """Get the names of the filters to create for every file.
+
+    Parameters
+    ----------
+    count : int
+        The number of filter names.
+
+    Returns
+    -------
+    list of str
+        Valid filter names, padded out with MAC address filters past the named systems.
+    """
+    names = FILTER_NAMES[:count]
+    names.extend('{:012x}'.format(i) for i in range(count - len(names)))
+    return names
+
+def generate_tree(packages, files, filters, filter_size):
+    """Fill an installed ModRC directory with synthetic packages.
+
+    Parameters
+    ----------
+    packages : int
+        The number of packages.
+    files : int
+        The number of files in every package.
+    filters : int
+        The number of filters of every file.
+    filter_size : int
+        The size of every filter in bytes.
+
+    Returns
+    -------
+    list of tuple of (str, str)
+        The file name and package name of every file.
+    """
+    filter_names = get_filter_names(filters)
+    line = b'export MODRC_BENCHMARK=1\n'
+    content = (line * (filter_size // len(line) + 1))[:filter_size]
+    created = []
+    for p in range(packages):
+        package_name = 'package-{}'.format(p)
+        package.create_package(package_name)
+        for f in range(files):
+            file_name = '{}-file-{}'.format(package_name, f)
+            file.create_file(file_name, package_name)
+            for filter_name in filter_names:
+                file.create_file_filter(filter_name, file_name, package_name).write_bytes(content)
+            created.append((file_name, package_name))
+    return created
@@ -1,7 +1,24 @@
-from pkg_resources import get_distribution, DistributionNotFound
+import functools
 
 
-try:
-    __version__ = get_distribution(__name__).version
-except DistributionNotFound:
-    __version__ = None
+@functools.lru_cache(maxsize=None)
+def get_version():
+    """Get the installed version of ModRC.
+
+    The version is read from the package metadata only when first asked for, since loading it is slow
+    compared to the rest of the CLI startup, and is cached after that.
+
+    Returns
+    -------
+    str or None
+        The installed version, or None if ModRC is not installed as a distribution.
+    """
+    try:
+        from importlib import metadata
+    except ImportError:
+        # importlib.metadata was added in Python 3.8
+        import importlib_metadata as metadata
+    try:
+        return metadata.version(__name__)
+    except metadata.PackageNotFoundError:
+        return None
@@ -1,13 +1,110 @@
+import importlib
+import os
+
 import click
 
 import modrc
-from modrc.commands import setup
+from modrc.commands import COMMANDS
+from modrc.lib import client
+
+
+# where the running profiler and the file to write its trace to are kept in the context metadata
+PROFILER_KEY = 'modrc.profiler'
+TRACE_FILE_KEY = 'modrc.trace_file'
+
+class LazyGroup(click.Group):
+    """A group that imports a subcommand module only when that subcommand is run.
+
+    Listing the commands, such as for --help, uses the short help in the registry so that no subcommand
+    module is imported.
+    """
+
+    def __init__(self, *args, lazy_commands=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.lazy_commands = lazy_commands or {}
+
+    def list_commands(self, ctx):
+        return sorted(set(super().list_commands(ctx)) | set(self.lazy_commands))
+
+    def get_command(self, ctx, cmd_name):
+        if cmd_name not in self.commands and cmd_name in self.lazy_commands:
+            module_name, attribute, _ = self.lazy_commands[cmd_name]
+            profiler = None if ctx is None else ctx.meta.get(PROFILER_KEY)
+            if profiler is None:
+                module = importlib.import_module(module_name)
+            else:
+                with profiler.span('import', module_name):
+                    module = importlib.import_module(module_name)
+            self.add_command(getattr(module, attribute), cmd_name)
+        return super().get_command(ctx, cmd_name)
 
+    def format_commands(self, ctx, formatter):
+        rows = []
+        for cmd_name in self.list_commands(ctx):
+            if cmd_name in self.commands:
+                command = self.commands[cmd_name]
+                if command.hidden:
+                    continue
+                rows.append((cmd_name, command.get_short_help_str()))
+            else:
+                rows.append((cmd_name, self.lazy_commands[cmd_name][2]))
+        if rows:
+            with formatter.section('Commands'):
+                formatter.write_dl(rows)
 
-@click.group()
-@click.version_option(version=modrc.__version__)
+
+def print_version(ctx, param, value):
+    """Print the version of ModRC, reading it only when --version is given."""
+    if not value or ctx.resilient_parsing:
+        return
+    click.echo('{}, version {}'.format(ctx.find_root().info_name, modrc.get_version()))
+    ctx.exit()
+
+def start_profile(ctx, param, value):
+    """Start profiling the command if --profile or --profile-output is given or MODRC_TRACE is set.
+
+    The profiler is only imported when profiling, and its results are reported when the command exits.
+    MODRC_TRACE=1 prints the summary and any other value except 0 is the file to write a Chrome trace to.
+    """
+    if ctx.resilient_parsing:
+        return
+    if param.name == 'profile_output':
+        if value is None:
+            return
+        ctx.meta[TRACE_FILE_KEY] = value
+    elif not value:
+        trace = os.environ.get('MODRC_TRACE')
+        if not trace or trace == '0':
+            return
+        if trace != '1':
+            ctx.meta[TRACE_FILE_KEY] = trace
+    if PROFILER_KEY in ctx.meta:
+        return
+    from modrc.lib import profiler as modrc_profiler
+    profiler = ctx.meta[PROFILER_KEY] = modrc_profiler.Profiler()
+
+    def report():
+        profiler.stop()
+        trace_file = ctx.meta.get(TRACE_FILE_KEY)
+        if trace_file is None:
+            click.echo(profiler.summary(), err=True)
+        else:
+            profiler.write_trace(trace_file)
+
+    ctx.call_on_close(report)
+    profiler.start()
+
+
+@click.group(cls=LazyGroup, lazy_commands=COMMANDS)
+@click.option('--version', is_flag=True, expose_value=False, is_eager=True, callback=print_version,
+              help='Show the version and exit.')
+@click.option('--profile', is_flag=True, expose_value=False, is_eager=True, callback=start_profile,
+              help='Print the time spent in each phase and the filesystem calls made to stderr.')
+@click.option('--profile-output', type=click.Path(dir_okay=False, writable=True), expose_value=False, is_eager=True,
+              callback=start_profile, help='Write a Chrome trace of the command to a file.')
 def main():
     """The CLI to make managing your files across systems easier."""
 
-# commands
-main.add_command(setup)
+
+if __name__ == '__main__':
+    client.run()
@@ -1 +1,15 @@
-from .setup import setup
+# subcommands by name, loaded only when they are run
+# each maps to the module, the command attribute in it and the short help shown by the group
+COMMANDS = {
+    'bootstrap': ('modrc.commands.bootstrap', 'bootstrap_command', 'Print the shell init line for live files.'),
+    'chunk': ('modrc.commands.chunk', 'chunk_command', 'Manage chunks that filters can include.'),
+    'compile': ('modrc.commands.compile', 'compile_command', 'Compile packages into live files.'),
+    'deploy': ('modrc.commands.deploy', 'deploy_command', 'Deploy live files into the home directory.'),
+    'export': ('modrc.commands.export', 'export_command', 'Export live files for other systems.'),
+    'index': ('modrc.commands.index', 'index_command', 'Manage the package index.'),
+    'package': ('modrc.commands.package', 'package_command', 'Manage packages.'),
+    'serve': ('modrc.commands.serve', 'serve_command', 'Run commands from a resident process.'),
+    'setup': ('modrc.commands.setup', 'setup', 'Install or uninstall ModRC.'),
+    'store': ('modrc.commands.store', 'store_command', 'Share identical filters through a store.'),
+    'watch': ('modrc.commands.watch', 'watch_command', 'Recompile files as their filters change.')
+}
@@ -0,0 +1,26 @@
+import os
+import shlex
+import sys
+
+import click
+
+from modrc import exceptions
+from modrc.lib import bootstrap as modrc_bootstrap
+from modrc.lib import helper as modrc_helper
+
+
+def default_shell():
+    shell = os.path.basename(os.environ.get('SHELL', ''))
+    return shell if shell in modrc_bootstrap.SHELL_SOURCES else 'sh'
+
+@click.command(name='bootstrap')
+@click.option('-s', '--shell', type=click.Choice(sorted(modrc_bootstrap.SHELL_SOURCES)), default=default_shell, help='The shell to bootstrap. Detected from $SHELL if not specified.')
+def bootstrap_command(shell):
+    """Print the shell init line for live files."""
+    try:
+        modrc_bootstrap.update_bootstrap()
+        bootstrap_file = modrc_bootstrap.get_bootstrap_file(modrc_helper.get_context().modrc_dir, shell)
+    except exceptions.ModRCError as error:
+        click.secho(str(error), fg='red', bold=True)
+        sys.exit(2)
+    click.echo('. {}'.format(shlex.quote(str(bootstrap_file))))
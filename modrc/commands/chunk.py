@@ -0,0 +1,93 @@
+import sys
+
+import click
+
+from modrc import exceptions
+from modrc.lib import chunk as modrc_chunk
+from modrc.lib import compiler, config, helper, manifest
+from modrc.lib import package as modrc_package
+from modrc.lib import system as modrc_system
+
+
+def get_package_name(package_name):
+    """Get the package to use, falling back on the default package.
+
+    Parameters
+    ----------
+    package_name : str or None
+        The package given on the command line.
+
+    Returns
+    -------
+    str
+        The package name.
+
+    Raises
+    ------
+    ModRCPackageDoesNotExistError
+        Raised if no package was given and there is no default package.
+    """
+    if package_name is None:
+        package_name = config.get_setting('defaultpackage')
+    if package_name is None:
+        raise exceptions.ModRCPackageDoesNotExistError('No package given and no default package is set')
+    return package_name
+
+
+@click.group(name='chunk')
+def chunk_command():
+    """Manage chunks that filters can include."""
+
+@chunk_command.command()
+@click.argument('chunk_name')
+@click.argument('package_name', required=False)
+def add(chunk_name, package_name):
+    """Add a chunk to a package. The default package is used if not specified."""
+    try:
+        chunk_file = modrc_chunk.create_chunk(chunk_name, get_package_name(package_name))
+    except exceptions.ModRCError as error:
+        click.secho(str(error), fg='red', bold=True)
+        sys.exit(2)
+    click.echo('Created {}'.format(chunk_file))
+
+@chunk_command.command()
+@click.argument('chunk_name')
+@click.argument('package_name', required=False)
+@click.option('-y', '--yes', is_flag=True, help='Remove the chunk without asking.')
+def remove(chunk_name, package_name, yes):
+    """Remove a chunk from a package. The default package is used if not specified."""
+    try:
+        package_name = get_package_name(package_name)
+        chunk_file = modrc_chunk.get_chunk(chunk_name, package_name)
+        dependents = modrc_chunk.get_dependents(manifest.load_manifest(helper.get_context().modrc_dir), chunk_file)
+        if dependents:
+            click.echo('Included by {}'.format(', '.join(dependents)))
+        if not yes and not click.confirm('Remove {}'.format(chunk_name)):
+            return
+        modrc_chunk.remove_chunk(chunk_name, package_name)
+    except exceptions.ModRCError as error:
+        click.secho(str(error), fg='red', bold=True)
+        sys.exit(2)
+
+@chunk_command.command()
+@click.argument('chunk_name')
+@click.argument('package_name', required=False)
+def edit(chunk_name, package_name):
+    """Edit a chunk and compile the live files that include it if autocompile is on."""
+    try:
+        chunk_file = modrc_chunk.get_chunk(chunk_name, get_package_name(package_name))
+        click.edit(filename=str(chunk_file), editor=config.get_setting('editor'))
+        if not config.get_setting('autocompile', False):
+            return
+        # only the live files that include the chunk need to be compiled again
+        dependents = modrc_chunk.get_dependents(manifest.load_manifest(helper.get_context().modrc_dir), chunk_file)
+        if not dependents:
+            return
+        results = compiler.compile_packages(modrc_package.list_packages(), modrc_system.get_targets(),
+                                            file_names=dependents)
+    except exceptions.ModRCError as error:
+        click.secho(str(error), fg='red', bold=True)
+        sys.exit(2)
+    for package_results in results.values():
+        for result in package_results:
+            click.echo('{}: {}'.format(result.file_name, result.status))
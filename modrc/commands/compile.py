@@ -0,0 +1,72 @@
+import pathlib
+import sys
+
+import click
+
+from modrc import exceptions
+from modrc.lib import bootstrap, compiler
+from modrc.lib import file as modrc_file
+from modrc.lib import package as modrc_package
+from modrc.lib import system as modrc_system
+
+
+@click.command(name='compile')
+@click.option('-p', '--package', 'package_name', help='The package to compile. All packages are compiled if not specified.')
+@click.option('-f', '--file', 'file_name', help='A single file to compile from the package.')
+@click.option('-s', '--system', help='The system string to compile for, same format as filter names. Detected if not specified.')
+@click.option('--force', is_flag=True, help='Compile files even if they are up to date.')
+@click.option('-j', '--jobs', default=1, type=click.IntRange(min=1), help='The number of files to compile concurrently.')
+@click.option('-n', '--dry-run', is_flag=True, help='List the live files that would change without writing them.')
+@click.option('-t', '--target', 'targets', multiple=True,
+              help='A system string to cross compile for, may be given more than once. Requires --output.')
+@click.option('-o', '--output', type=click.Path(file_okay=False),
+              help='The directory to write the live files of each target to, one directory per target.')
+def compile_command(package_name, file_name, system, force, jobs, dry_run, targets, output):
+    """Compile packages into live files."""
+    if file_name is not None and package_name is None:
+        click.secho('A package must be specified to compile a single file', fg='red', bold=True)
+        sys.exit(2)
+    if targets and (output is None or system is not None or dry_run):
+        click.secho('Targets must be compiled to an output directory without a system or a dry run', fg='red', bold=True)
+        sys.exit(2)
+    if output is not None and not targets:
+        click.secho('An output directory can only be used with targets', fg='red', bold=True)
+        sys.exit(2)
+    try:
+        # compile for other systems into per target directories
+        if targets:
+            package_names = [package_name] if package_name is not None else modrc_package.list_packages()
+            file_names = [file_name] if file_name is not None else None
+            results = compiler.cross_compile(package_names, list(targets), pathlib.Path(output).resolve(), jobs=jobs,
+                                             file_names=file_names)
+            for target, target_results in results.items():
+                for result in target_results:
+                    click.echo('{}/{}: {}'.format(target, result.file_name, result.status))
+            return
+        if system is None:
+            system = modrc_system.get_targets()
+        # list the live files that would change
+        if dry_run:
+            package_names = [package_name] if package_name is not None else modrc_package.list_packages()
+            file_names = [file_name] if file_name is not None else None
+            for result in compiler.plan_packages(package_names, system, file_names=file_names):
+                if result.status == compiler.CHANGED:
+                    click.echo('{}: {} ({} -> {} bytes)'.format(result.file_name, result.status, result.live_size, result.size))
+                else:
+                    click.echo('{}: {} ({} bytes)'.format(result.file_name, result.status, result.size))
+            return
+        # compile a single file
+        if file_name is not None:
+            result = modrc_file.compile_file(file_name, package_name, system, force=force)
+            bootstrap.update_bootstrap()
+            click.echo('{}: {}'.format(result.file_name, result.status))
+            return
+        # compile whole packages
+        package_names = [package_name] if package_name is not None else modrc_package.list_packages()
+        results = compiler.compile_packages(package_names, system, force=force, jobs=jobs)
+        for package_results in results.values():
+            for result in package_results:
+                click.echo('{}: {}'.format(result.file_name, result.status))
+    except exceptions.ModRCError as error:
+        click.secho(str(error), fg='red', bold=True)
+        sys.exit(2)
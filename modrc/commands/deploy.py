@@ -0,0 +1,29 @@
+import sys
+
+import click
+
+from modrc import exceptions
+from modrc.lib import deploy as modrc_deploy
+
+
+@click.command(name='deploy')
+@click.option('--copy', is_flag=True, help='Copy live files into place instead of symlinking them.')
+@click.option('-n', '--dry-run', is_flag=True, help='Print the changes without making them.')
+def deploy_command(copy, dry_run):
+    """Deploy live files into the home directory."""
+    try:
+        actions = modrc_deploy.deploy(modrc_deploy.COPY if copy else modrc_deploy.LINK, dry_run=dry_run)
+    except exceptions.ModRCError as error:
+        click.secho(str(error), fg='red', bold=True)
+        sys.exit(2)
+    if not actions:
+        click.echo('Everything is deployed')
+    for action in actions:
+        if action.action == modrc_deploy.CONFLICT:
+            click.secho('{}: {} is not managed by ModRC or was changed'.format(action.action, action.target), fg='red')
+        elif action.action == modrc_deploy.REMOVE:
+            click.echo('{}: {}'.format(action.action, action.target))
+        else:
+            click.echo('{}: {} -> {}'.format(action.action, action.target, action.source))
+    if any(action.action == modrc_deploy.CONFLICT for action in actions):
+        sys.exit(1)
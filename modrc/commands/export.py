@@ -0,0 +1,45 @@
+import pathlib
+import sys
+
+import click
+
+from modrc import exceptions
+from modrc.lib import export as modrc_export
+from modrc.lib import package as modrc_package
+
+
+@click.command(name='export')
+@click.option('-p', '--package', 'package_name', help='The package to export. All packages are exported if not specified.')
+@click.option('-f', '--file', 'file_name', help='A single file to export from the package.')
+@click.option('-t', '--target', 'targets', multiple=True, required=True,
+              help='A system string to compile for, may be given more than once.')
+@click.option('-o', '--output', required=True,
+              help='The directory to write an archive per target to, or the archive to write with --single, - for stdout.')
+@click.option('--format', 'archive_format', default=modrc_export.TAR, type=click.Choice(modrc_export.FORMATS),
+              help='The archive format.')
+@click.option('--single', is_flag=True, help='Write one archive with a directory per target.')
+@click.option('--hashes', is_flag=True, help='Add a SHA256SUMS file of the live files of each target.')
+def export_command(package_name, file_name, targets, output, archive_format, single, hashes):
+    """Export live files for other systems."""
+    if file_name is not None and package_name is None:
+        click.secho('A package must be specified to export a single file', fg='red', bold=True)
+        sys.exit(2)
+    if output == '-' and not single:
+        click.secho('Only a single archive can be written to stdout', fg='red', bold=True)
+        sys.exit(2)
+    # report on stderr when the archive is streamed to stdout
+    streaming = output == '-'
+    try:
+        package_names = [package_name] if package_name is not None else modrc_package.list_packages()
+        file_names = [file_name] if file_name is not None else None
+        results = modrc_export.export_bundles(
+            package_names, list(targets), sys.stdout.buffer if streaming else pathlib.Path(output).resolve(),
+            archive_format=archive_format, single=single, hashes=hashes, file_names=file_names
+        )
+    except exceptions.ModRCError as error:
+        click.secho(str(error), fg='red', bold=True, err=streaming)
+        sys.exit(2)
+    for result in results:
+        click.echo('{}: {} files, {} bytes{}'.format(
+            result.target, result.files, result.size, '' if result.archive is None else ' -> {}'.format(result.archive)
+        ), err=streaming)
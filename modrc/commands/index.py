@@ -0,0 +1,24 @@
+import sys
+
+import click
+
+from modrc import exceptions
+from modrc.lib import index as modrc_index
+
+
+@click.group(name='index')
+def index_command():
+    """Manage the package index."""
+
+@index_command.command()
+def rebuild():
+    """Rebuild the package index from the packages directory."""
+    try:
+        index = modrc_index.rebuild_index()
+    except exceptions.ModRCError as error:
+        click.secho(str(error), fg='red', bold=True)
+        sys.exit(2)
+    packages = index['packages'].values()
+    file_count = sum(len(package['files']) for package in packages)
+    filter_count = sum(len(file_entry['filters']) for package in packages for file_entry in package['files'].values())
+    click.echo('Indexed {} packages, {} files and {} filters'.format(len(packages), file_count, filter_count))
@@ -0,0 +1,30 @@
+import sys
+
+import click
+
+from modrc import exceptions
+from modrc.lib import package as modrc_package
+from modrc.lib import sync as modrc_sync
+
+
+@click.group(name='package')
+def package_command():
+    """Manage packages."""
+
+@package_command.command()
+@click.argument('package_name', required=False)
+@click.option('-j', '--jobs', default=4, type=click.IntRange(min=1), help='The number of packages to sync concurrently.')
+def sync(package_name, jobs):
+    """Sync packages with their repos. All packages are synced if not specified."""
+    try:
+        package_names = [package_name] if package_name is not None else modrc_package.list_packages()
+        results = modrc_sync.sync_packages(package_names, jobs=jobs)
+    except exceptions.ModRCError as error:
+        click.secho(str(error), fg='red', bold=True)
+        sys.exit(2)
+    for result in results:
+        click.echo('{}: {} ({:.2f}s)'.format(result.package_name, result.status, result.seconds))
+        if result.message:
+            click.secho(result.message, fg='red')
+    if any(result.status == modrc_sync.FAILED for result in results):
+        sys.exit(1)
@@ -0,0 +1,24 @@
+import sys
+
+import click
+
+from modrc import exceptions
+from modrc.lib import client
+from modrc.lib import server as modrc_server
+
+
+@click.command(name='serve')
+def serve_command():
+    """Run commands from a resident process."""
+    try:
+        server = modrc_server.create_server()
+    except exceptions.ModRCError as error:
+        click.secho(str(error), fg='red', bold=True)
+        sys.exit(2)
+    click.echo('Serving on {}'.format(client.get_socket_file()))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
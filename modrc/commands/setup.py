@@ -6,6 +6,7 @@ from modrc import exceptions
 from modrc.lib import helper as modrc_helper
 from modrc.lib import package as modrc_package
 from modrc.lib import setup as modrc_setup
+from modrc.lib import sync as modrc_sync
 
 
 @click.group()
@@ -14,12 +15,14 @@ def setup():
 
 @setup.command()
 @click.option('--ni', '--non-interactive', 'non_interactive', is_flag=True, help='Toggle interactive setup. Default settings will be used if not specified.')
-@click.option('-u', '--url', 'repo_url', help='The URL to a package repository. Will be ignored if name is specified.')
+@click.option('-u', '--url', 'repo_urls', multiple=True, help='The URL to a package repository, can be given more than once. Used as the repository of the new package if name is specified.')
 @click.option('-n', '--name', 'package_name', help='The name of the new package.')
 @click.option('-e', '--editor', default='vim', help='The default editor when opening files.')
 @click.option('--ac', '--auto-compile', 'auto_compile', is_flag=True, help='Toggle auto-compile on.')
 @click.option('--as', '--auto-sync', 'auto_sync', is_flag=True, help='Toggle auto-sync on.')
-def install(non_interactive, repo_url, package_name, editor, auto_compile, auto_sync):
+@click.option('-j', '--jobs', default=4, type=click.IntRange(min=1), help='The number of repositories to clone concurrently.')
+@click.option('--shallow', is_flag=True, help='Clone only the latest commit instead of the history without file contents.')
+def install(non_interactive, repo_urls, package_name, editor, auto_compile, auto_sync, jobs, shallow):
     """Install ModRC into the current user's home folder."""
     # check if ModRC is already installed
     try:
@@ -33,6 +36,7 @@ def install(non_interactive, repo_url, package_name, editor, auto_compile, auto_
     if not non_interactive:
         # choose package creation or installation
         package_name, repo_url = prompt_package_creation_installation()
+        repo_urls = [repo_url] if repo_url is not None else []
         # choose the default editor
         editor = click.prompt('File editor', default='vim')
         # choose to automatically compile default package changes
@@ -42,15 +46,18 @@ def install(non_interactive, repo_url, package_name, editor, auto_compile, auto_
 
     # setup the ModRC dir
     modrc_setup.initial_setup()
-    # set the system configuration settings
-    modrc_setup.populate_modrc_file(package_name, editor, auto_compile, auto_sync)
+    # set the system configuration settings, the first cloned package is the default if none is created
+    default_package = package_name
+    if default_package is None and repo_urls:
+        default_package = modrc_sync.package_name_from_url(repo_urls[0])
+    modrc_setup.populate_modrc_file(default_package, editor, auto_compile, auto_sync)
     # create a new package
     if package_name is not None:
-        modrc_package.create_package(package_name, repo_url=repo_url)
-    # clone an existing package
-    elif repo_url is not None:
-        # TODO: setup command URL clone option #44
-        pass
+        modrc_package.create_package(package_name, repo_url=repo_urls[0] if repo_urls else None)
+    # clone existing packages
+    elif repo_urls:
+        if not clone_packages(repo_urls, jobs, modrc_sync.SHALLOW if shallow else modrc_sync.BLOBLESS):
+            sys.exit(1)
 
     # react to the outcome of the installation
     click.echo('ModRC successfully installed at ~/.modrc')
@@ -65,6 +72,23 @@ def uninstall():
         click.echo('ModRC is not currently installed')
         sys.exit(2)
 
+def clone_packages(repo_urls, jobs, mode):
+    cloned = []
+
+    def progress(result):
+        cloned.append(result)
+        click.echo('[{}/{}] {}: {} ({:.2f}s)'.format(len(cloned), len(repo_urls), result.package_name, result.status,
+                                                      result.seconds))
+        if result.message:
+            click.secho(result.message, fg='red')
+
+    try:
+        results = modrc_sync.clone_packages(list(repo_urls), jobs=jobs, mode=mode, progress=progress)
+    except exceptions.ModRCError as error:
+        click.secho(str(error), fg='red', bold=True)
+        return False
+    return all(result.status == modrc_sync.CLONED for result in results)
+
 def prompt_package_creation_installation():
     package_name = None
     repo_url = None
@@ -0,0 +1,34 @@
+import sys
+
+import click
+
+from modrc import exceptions
+from modrc.lib import store as modrc_store
+
+
+@click.group(name='store')
+def store_command():
+    """Share identical filters through a store."""
+
+@store_command.command()
+@click.option('-n', '--dry-run', is_flag=True, help='Count the filters that would be linked without linking them.')
+def dedup(dry_run):
+    """Link identical filters in every package to a single object."""
+    try:
+        result = modrc_store.dedup(dry_run=dry_run)
+    except exceptions.ModRCError as error:
+        click.secho(str(error), fg='red', bold=True)
+        sys.exit(2)
+    click.echo('{} filters, {} distinct, {} {}linked, {} bytes saved'.format(
+        result.filters, result.objects, result.linked, 'to be ' if dry_run else '', result.saved
+    ))
+
+@store_command.command()
+def restore():
+    """Give every linked filter its own copy and empty the store."""
+    try:
+        restored = modrc_store.restore()
+    except exceptions.ModRCError as error:
+        click.secho(str(error), fg='red', bold=True)
+        sys.exit(2)
+    click.echo('{} filters restored'.format(restored))
@@ -0,0 +1,33 @@
+import sys
+
+import click
+
+from modrc import exceptions
+from modrc.lib import system as modrc_system
+from modrc.lib import watch as modrc_watch
+
+
+@click.command(name='watch')
+@click.option('-s', '--system', help='The system string to compile for, same format as filter names. Detected if not specified.')
+@click.option('-d', '--debounce', default=modrc_watch.DEBOUNCE_SECONDS, type=click.FloatRange(min=0), help='The seconds to wait for edits to settle before compiling.')
+@click.option('--poll', is_flag=True, help='Poll for changes even if inotify is available.')
+def watch_command(system, debounce, poll):
+    """Recompile files as their filters change."""
+    try:
+        if system is None:
+            system = modrc_system.get_targets()
+        for results in modrc_watch.watch(system, debounce=debounce, poll=poll):
+            if results is None:
+                click.echo('Changes not compiled, autocompile is off')
+                continue
+            if isinstance(results, exceptions.ModRCError):
+                click.echo('Changes not compiled: {}'.format(results), err=True)
+                continue
+            for package_results in results.values():
+                for result in package_results:
+                    click.echo('{}: {}'.format(result.file_name, result.status))
+    except exceptions.ModRCError as error:
+        click.secho(str(error), fg='red', bold=True)
+        sys.exit(2)
+    except KeyboardInterrupt:
+        pass
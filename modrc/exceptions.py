@@ -37,3 +37,35 @@ class ModRCFilterDoesNotExistError(ModRCError):
 
 class ModRCFilterNameError(ModRCError):
     """Raised when there is an invalid filter name"""
+
+
+class ModRCChunkExistsError(ModRCError):
+    """Raised when a chunk already exists."""
+
+
+class ModRCChunkDoesNotExistError(ModRCError):
+    """Raised when a chunk does not exist."""
+
+
+class ModRCChunkNameError(ModRCError):
+    """Raised when there is an invalid chunk name."""
+
+
+class ModRCChunkCycleError(ModRCError):
+    """Raised when chunks include each other in a cycle."""
+
+
+class ModRCTemplateError(ModRCError):
+    """Raised when a template filter cannot be rendered."""
+
+
+class ModRCServerRunningError(ModRCError):
+    """Raised when a ModRC server is already running."""
+
+
+class ModRCStoreError(ModRCError):
+    """Raised when filters cannot be linked into the object store."""
+
+
+class ModRCDeployTargetError(ModRCError):
+    """Raised when a live file would be deployed outside of the home directory or over another live file."""
@@ -0,0 +1,148 @@
+import os
+import shlex
+
+from modrc.lib import helper
+
+
+# the live files sourced by the bootstrap of each shell, by suffix. Files named like bashrc are not sourced, since
+# they are usually deployed as the shell init that sources the bootstrap
+SHELL_SOURCES = {
+    'sh': ('.sh',),
+    'bash': ('.sh', '.bash'),
+    'zsh': ('.sh', '.zsh')
+}
+STAMP_NAME = 'bootstrap.stamp'
+
+BOOTSTRAP_TEMPLATE = '''\
+# Generated by ModRC, do not edit. Rewritten when a compile changes the live files.
+# skip the script if a live file sourced by it sources it again
+if [ -z "$_modrc_sourcing" ]; then
+_modrc_sourcing=1
+_modrc_dir={modrc_dir}
+# compile again and source the rewritten script if any filter changed since the last compile, git metadata is skipped
+if [ -z "$_modrc_compiling" ] && command -v modrc >/dev/null 2>&1 \\
+        && [ -n "$(find "$_modrc_dir/packages" -name .git -prune -o -newer "$_modrc_dir/{stamp}" -print -quit \\
+            2>/dev/null)" ]; then
+    _modrc_compiling=1
+    modrc compile >/dev/null 2>&1
+    unset _modrc_sourcing
+    . "$_modrc_dir/bootstrap.{shell}"
+    unset _modrc_compiling
+else
+    :
+{sources}fi
+unset _modrc_dir _modrc_sourcing
+fi
+'''
+
+
+def get_bootstrap_file(modrc_dir, shell):
+    """Get the path to the bootstrap script of a shell within the ModRC directory.
+
+    Parameters
+    ----------
+    modrc_dir : :obj:`Path`
+        The path to the ModRC directory.
+    shell : str
+        The shell, one of sh, bash or zsh.
+
+    Returns
+    -------
+    :obj:`Path`
+        The path to the bootstrap script.
+    """
+    return modrc_dir.joinpath('bootstrap.{}'.format(shell))
+
+def get_stamp_file(modrc_dir):
+    """Get the path to the stamp touched by every compile within the ModRC directory.
+
+    Parameters
+    ----------
+    modrc_dir : :obj:`Path`
+        The path to the ModRC directory.
+
+    Returns
+    -------
+    :obj:`Path`
+        The path to the stamp file.
+    """
+    return modrc_dir.joinpath(STAMP_NAME)
+
+def select_sources(live_names, shell):
+    """Select the live files sourced by the bootstrap of a shell.
+
+    Parameters
+    ----------
+    live_names : iterable of str
+        The names of the live files.
+    shell : str
+        The shell, one of sh, bash or zsh.
+
+    Returns
+    -------
+    list of str
+        The sorted names of the live files to source.
+    """
+    return sorted(name for name in live_names if name.endswith(SHELL_SOURCES[shell]))
+
+def render_bootstrap(modrc_dir, live_dir, live_names, shell):
+    """Render the bootstrap script of a shell.
+
+    Parameters
+    ----------
+    modrc_dir : :obj:`Path`
+        The path to the ModRC directory.
+    live_dir : :obj:`Path`
+        The path to the live directory.
+    live_names : iterable of str
+        The names of the live files.
+    shell : str
+        The shell, one of sh, bash or zsh.
+
+    Returns
+    -------
+    str
+        The bootstrap script.
+    """
+    sources = ''.join(
+        '    . {}\n'.format(shlex.quote(os.path.join(str(live_dir), name)))
+        for name in select_sources(live_names, shell)
+    )
+    return BOOTSTRAP_TEMPLATE.format(modrc_dir=shlex.quote(str(modrc_dir)), stamp=STAMP_NAME, shell=shell,
+                                     sources=sources)
+
+def update_bootstrap(context=None):
+    """Rewrite the bootstrap scripts whose live files changed and touch the compile stamp.
+
+    Parameters
+    ----------
+    context : :obj:`ModRCContext`, optional
+        The context to resolve ModRC paths with. The shared context is used if None.
+
+    Returns
+    -------
+    list of :obj:`Path`
+        The paths to the bootstrap scripts that were written.
+
+    Raises
+    ------
+    ModRCIntegrityError
+        Raised if ModRC is not installed properly.
+    """
+    context = helper.get_context(context)
+    modrc_dir = context.modrc_dir
+    live_dir = context.live_dir
+    live_names = [entry.name for entry in os.scandir(str(live_dir)) if entry.is_file()]
+    written = []
+    for shell in sorted(SHELL_SOURCES):
+        bootstrap_file = get_bootstrap_file(modrc_dir, shell)
+        script = render_bootstrap(modrc_dir, live_dir, live_names, shell)
+        try:
+            if bootstrap_file.read_text() == script:
+                continue
+        except FileNotFoundError:
+            pass
+        helper.write_atomic(bootstrap_file, script)
+        written.append(bootstrap_file)
+    get_stamp_file(modrc_dir).touch()
+    return written
@@ -0,0 +1,332 @@
+import os
+import re
+import threading
+
+from modrc import exceptions
+from modrc.lib import helper, manifest, package, store
+
+
+# a line that includes a chunk, after any comment characters, such as "# modrc:include aliases"
+INCLUDE_PATTERN = re.compile(rb'^[^\n]*?modrc:include[ \t]+([^\s/]+(?:/[^\s/]+)?)[ \t]*$', re.MULTILINE)
+INCLUDE_MARKER = b'modrc:include'
+# filters are searched for the include marker in blocks of this size rather than read whole
+SCAN_BUFFER_SIZE = 64 * 1024
+CHUNK_NAME_PATTERN = re.compile(r'[^\s/]+')
+
+
+def valid_chunk_name(chunk_name):
+    """Validate a chunk name.
+
+    Parameters
+    ----------
+    chunk_name : str
+        The chunk name to validate.
+
+    Returns
+    -------
+    bool
+        Return True if the name is valid, False if invalid.
+    """
+    return CHUNK_NAME_PATTERN.fullmatch(chunk_name) is not None and chunk_name not in ('.', '..')
+
+def has_include(filter_path):
+    """Check if a filter has the include marker without reading it into memory.
+
+    The filter is read in blocks, keeping the end of each block so a marker split between two blocks
+    is still found.
+
+    Parameters
+    ----------
+    filter_path : str
+        The path to the filter.
+
+    Returns
+    -------
+    bool
+        Return True if the filter has the include marker, False if not.
+    """
+    overlap = len(INCLUDE_MARKER) - 1
+    tail = b''
+    with open(filter_path, 'rb') as ff:
+        while True:
+            block = ff.read(SCAN_BUFFER_SIZE)
+            if not block:
+                return False
+            if INCLUDE_MARKER in block or INCLUDE_MARKER in tail + block[:overlap]:
+                return True
+            tail = (tail + block)[-overlap:]
+
+def create_chunk(chunk_name, package_name, context=None):
+    """Create a new chunk in a package.
+
+    Parameters
+    ----------
+    chunk_name : str
+        The name of the chunk to create.
+    package_name : str
+        The name of the package that the chunk will go in.
+    context : :obj:`ModRCContext`, optional
+        The context to resolve ModRC paths with. The shared context is used if None.
+
+    Returns
+    -------
+    :obj:`Path`
+        Returns the path to the new chunk.
+
+    Raises
+    ------
+    ModRCIntegrityError
+        Raised if ModRC is not installed properly.
+    ModRCPackageDoesNotExistError
+        Raised if the package could not be found.
+    ModRCChunkNameError
+        Raised if the chunk name is invalid.
+    ModRCChunkExistsError
+        Raised if the chunk already exists in the package.
+    """
+    package_dir = package.get_package(package_name, context)
+    if not valid_chunk_name(chunk_name):
+        raise exceptions.ModRCChunkNameError('Invalid chunk name')
+    chunk_file = package_dir.joinpath('chunks', chunk_name)
+    if chunk_file.exists():
+        raise exceptions.ModRCChunkExistsError('Chunk already exists')
+    chunk_file.parent.mkdir(exist_ok=True)
+    chunk_file.touch()
+    return chunk_file
+
+def get_chunk(chunk_name, package_name, context=None):
+    """Retrieve a chunk from a package.
+
+    Parameters
+    ----------
+    chunk_name : str
+        The name of the chunk to retrieve.
+    package_name : str
+        The name of the package that the chunk is in.
+    context : :obj:`ModRCContext`, optional
+        The context to resolve ModRC paths with. The shared context is used if None.
+
+    Returns
+    -------
+    :obj:`Path`
+        Returns the path to the chunk.
+
+    Raises
+    ------
+    ModRCIntegrityError
+        Raised if ModRC is not installed properly.
+    ModRCPackageDoesNotExistError
+        Raised if the package could not be found.
+    ModRCChunkDoesNotExistError
+        Raised if the chunk does not exist in the package.
+    """
+    package_dir = package.get_package(package_name, context)
+    chunk_file = package_dir.joinpath('chunks', chunk_name)
+    if not valid_chunk_name(chunk_name) or not chunk_file.is_file():
+        raise exceptions.ModRCChunkDoesNotExistError('Chunk does not exist')
+    return chunk_file
+
+def remove_chunk(chunk_name, package_name, context=None):
+    """Remove a chunk from a package.
+
+    Parameters
+    ----------
+    chunk_name : str
+        The name of the chunk to remove.
+    package_name : str
+        The name of the package that the chunk is in.
+    context : :obj:`ModRCContext`, optional
+        The context to resolve ModRC paths with. The shared context is used if None.
+
+    Raises
+    ------
+    ModRCIntegrityError
+        Raised if ModRC is not installed properly.
+    ModRCPackageDoesNotExistError
+        Raised if the package could not be found.
+    ModRCChunkDoesNotExistError
+        Raised if the chunk does not exist in the package.
+    """
+    get_chunk(chunk_name, package_name, context).unlink()
+
+def get_dependents(compile_manifest, chunk_file):
+    """Find the live files that include a chunk, directly or through other chunks.
+
+    Parameters
+    ----------
+    compile_manifest : dict
+        The loaded compile manifest.
+    chunk_file : :obj:`Path`
+        The path to the chunk.
+
+    Returns
+    -------
+    list of str
+        The sorted names of the live files compiled from the chunk.
+    """
+    chunk_path = str(chunk_file)
+    return sorted(
+        file_name for file_name, entry in compile_manifest['files'].items()
+        if any(recorded['path'] == chunk_path for recorded in entry.get('chunks', []))
+    )
+
+
+class ChunkResolver:
+    """Expands the includes in filters, reading and expanding every chunk at most once.
+
+    A resolver is made for each compile, so a chunk included by many live files is only read once
+    however many files include it. Includes are resolved through the dependency graph of the chunks
+    with cycle detection. A chunk name is looked up in the package of the filter or chunk including it,
+    and package/chunk names a chunk in another package.
+
+    Every filter compiled is searched for includes, so an include of a chunk that does not exist is an
+    error even if no package has chunks yet. Filters are searched a block at a time, and only filters
+    with includes are read whole, so the rest are still streamed into the live file.
+    Filters linked to the same object in the object store are read once.
+    """
+
+    def __init__(self, packages_dir, blobs=None):
+        self.packages_dir = packages_dir
+        self.blobs = store.BlobCache() if blobs is None else blobs
+        # the expanded contents and the paths of every chunk they depend on, by package and chunk name
+        self._expanded = {}
+        # the manifest state of every chunk read, by path
+        self._states = {}
+        self._resolving = []
+        self._lock = threading.RLock()
+
+    def _chunk_key(self, package_name, reference):
+        if '/' in reference:
+            return tuple(reference.split('/', 1))
+        return package_name, reference
+
+    def _resolve(self, key):
+        with self._lock:
+            if key in self._expanded:
+                return self._expanded[key]
+            if key in self._resolving:
+                cycle = self._resolving[self._resolving.index(key):] + [key]
+                raise exceptions.ModRCChunkCycleError('Chunks include each other: {}'.format(
+                    ' -> '.join('/'.join(part) for part in cycle)))
+            # names such as .. must not reach outside the chunks directory
+            if not all(valid_chunk_name(part) for part in key):
+                raise exceptions.ModRCChunkNameError('Invalid chunk name: {}'.format('/'.join(key)))
+            chunk_path = os.path.join(str(self.packages_dir), key[0], 'chunks', key[1])
+            try:
+                with open(chunk_path, 'rb') as cf:
+                    data = cf.read()
+                    self._states[chunk_path] = manifest.get_state(chunk_path, data, os.fstat(cf.fileno()))
+            except OSError:
+                raise exceptions.ModRCChunkDoesNotExistError('Chunk does not exist: {}'.format('/'.join(key)))
+            self._resolving.append(key)
+            try:
+                data, chunk_paths = self.expand(key[0], data)
+            finally:
+                self._resolving.pop()
+            expanded = self._expanded[key] = (data, chunk_paths | {chunk_path})
+            return expanded
+
+    def expand(self, package_name, data):
+        """Replace every include line with the expanded contents of its chunk.
+
+        Parameters
+        ----------
+        package_name : str
+            The name of the package the contents are from.
+        data : bytes
+            The contents of a filter or chunk.
+
+        Returns
+        -------
+        tuple of (bytes, frozenset of str)
+            The expanded contents and the paths of every chunk they depend on.
+
+        Raises
+        ------
+        ModRCChunkDoesNotExistError
+            Raised if an included chunk does not exist.
+        ModRCChunkNameError
+            Raised if an include names a chunk outside of the chunks directory, such as ..
+        ModRCChunkCycleError
+            Raised if chunks include each other in a cycle.
+        """
+        if INCLUDE_MARKER not in data:
+            return data, frozenset()
+        chunk_paths = set()
+        parts = []
+        end = 0
+        for match in INCLUDE_PATTERN.finditer(data):
+            chunk_data, paths = self._resolve(self._chunk_key(package_name, match.group(1).decode()))
+            chunk_paths |= paths
+            parts.append(data[end:match.start()])
+            # the chunk takes the place of the line, which keeps its own line ending
+            parts.append(chunk_data[:-1] if chunk_data.endswith(b'\n') else chunk_data)
+            end = match.end()
+        parts.append(data[end:])
+        return b''.join(parts), frozenset(chunk_paths)
+
+    def expand_filters(self, package_name, filter_paths):
+        """Expand the includes in the filters of a live file.
+
+        Parameters
+        ----------
+        package_name : str
+            The name of the package the filters are from.
+        filter_paths : list of str
+            The paths to the filters, in order.
+
+        Returns
+        -------
+        tuple of (list, frozenset of str)
+            For each filter, its path if it has no includes or its expanded contents as bytes, and the
+            paths of every chunk the live file depends on.
+        """
+        sources = []
+        chunk_paths = set()
+        for filter_path in filter_paths:
+            # only filters with includes are read into memory, the rest are copied as they are
+            if not has_include(filter_path):
+                sources.append(filter_path)
+                continue
+            data, paths = self.expand(package_name, self.blobs.read(filter_path))
+            sources.append(data)
+            chunk_paths |= paths
+        return sources, frozenset(chunk_paths)
+
+    def get_states(self, chunk_paths):
+        """Get the manifest states of chunks from when they were read, so they are not read again.
+
+        Parameters
+        ----------
+        chunk_paths : iterable of str
+            The paths to chunks that were expanded by this resolver.
+
+        Returns
+        -------
+        list of dict
+            The states of the chunks, sorted by path.
+        """
+        return [self._states[chunk_path] for chunk_path in sorted(chunk_paths)]
+
+
+def get_resolver(context=None, blobs=None):
+    """Get a chunk resolver for a compile.
+
+    Parameters
+    ----------
+    context : :obj:`ModRCContext`, optional
+        The context to resolve ModRC paths with. The shared context is used if None.
+    blobs : :obj:`BlobCache`, optional
+        The cache to read filters through, shared with the rest of the compile. A new one is used if None.
+
+    Returns
+    -------
+    :obj:`ChunkResolver`
+        A resolver with nothing read yet.
+
+    Raises
+    ------
+    ModRCIntegrityError
+        Raised if ModRC is not installed properly.
+    """
+    return ChunkResolver(helper.get_context(context).packages_dir, blobs)
@@ -0,0 +1,103 @@
+import json
+import os
+import sys
+
+
+# commands that a server may run, the others need a terminal or change the ModRC layout
+FORWARDED_COMMANDS = {'compile', 'index'}
+SOCKET_NAME = 'modrc.sock'
+
+
+def get_socket_file():
+    """Get the path to the server socket within the ModRC directory.
+
+    Returns
+    -------
+    str
+        The path to the socket, which may not exist.
+    """
+    return os.path.join(os.path.expanduser('~/.modrc'), SOCKET_NAME)
+
+def send_request(socket_file, args):
+    """Send a command to a server and wait for the response.
+
+    Parameters
+    ----------
+    socket_file : str
+        The path to the server socket.
+    args : list of str
+        The command line arguments of the command.
+
+    Returns
+    -------
+    dict
+        The response with the keys exit_code, stdout and stderr.
+
+    Raises
+    ------
+    OSError
+        Raised if the server could not be reached.
+    ValueError
+        Raised if the response could not be read.
+    """
+    # imported here since it is only needed when a server may be running
+    import socket
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.connect(socket_file)
+        # the server runs the command in the working directory and environment of this process
+        request = {'args': args, 'cwd': os.getcwd(), 'environ': dict(os.environ)}
+        client.sendall(json.dumps(request).encode() + b'\n')
+        client.shutdown(socket.SHUT_WR)
+        chunks = []
+        while True:
+            chunk = client.recv(65536)
+            if not chunk:
+                break
+            chunks.append(chunk)
+    return json.loads(b''.join(chunks).decode())
+
+def forward(args):
+    """Forward a command to the server if one is running and the command can be run by it.
+
+    Parameters
+    ----------
+    args : list of str
+        The command line arguments of the command.
+
+    Returns
+    -------
+    dict or None
+        The response with the keys exit_code, stdout and stderr, or None if the command must be run in
+        this process.
+    """
+    if not args or args[0] not in FORWARDED_COMMANDS:
+        return None
+    socket_file = get_socket_file()
+    if not os.path.exists(socket_file):
+        return None
+    try:
+        return send_request(socket_file, args)
+    except (OSError, ValueError):
+        # the server is not running or went away, so run the command here
+        return None
+
+def run(args=None):
+    """Run the ModRC CLI, forwarding the command to a running server where possible.
+
+    The CLI is only imported if the command is run in this process, so forwarded commands skip most of
+    the startup time.
+
+    Parameters
+    ----------
+    args : list of str, optional
+        The command line arguments. The arguments of this process are used if None.
+    """
+    args = sys.argv[1:] if args is None else list(args)
+    response = forward(args)
+    if response is None:
+        from modrc.__main__ import main
+        main(args, prog_name='modrc')
+        return
+    sys.stdout.write(response['stdout'])
+    sys.stderr.write(response['stderr'])
+    sys.exit(response['exit_code'])
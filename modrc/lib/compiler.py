@@ -0,0 +1,730 @@
+import collections
+import errno
+import functools
+import hashlib
+import os
+import shutil
+import threading
+from concurrent import futures
+
+from modrc import exceptions
+from modrc.lib import bootstrap, chunk, filters, helper, index, manifest, system as modrc_system, template
+
+
+# compile statuses
+COMPILED = 'compiled'
+UP_TO_DATE = 'up to date'
+NO_FILTERS = 'no filters'
+
+CompileResult = collections.namedtuple('CompileResult', ['file_name', 'live_file', 'status'])
+
+# plan statuses
+NEW = 'new'
+CHANGED = 'changed'
+UNCHANGED = 'unchanged'
+
+PlanResult = collections.namedtuple('PlanResult', ['file_name', 'live_file', 'status', 'size', 'live_size'])
+
+# buffer size for copies that cannot be done by the kernel
+COPY_BUFFER_SIZE = 64 * 1024
+# largest single request made to a kernel copy
+KERNEL_COPY_SIZE = 64 * 1024 * 1024
+# errors raised when a kernel copy is not supported for a pair of files
+KERNEL_COPY_UNSUPPORTED = {
+    errno.EBADF, errno.EINVAL, errno.ENOSYS, errno.ENOTSOCK, errno.EOPNOTSUPP, errno.EXDEV, errno.ENOTSUP
+}
+
+
+def scan_package(loaded_index, package_name, context=None):
+    """Take a snapshot of every file and filter in a package from the package index.
+
+    Parameters
+    ----------
+    loaded_index : dict
+        The loaded package index.
+    package_name : str
+        The name of the package to scan.
+    context : :obj:`ModRCContext`, optional
+        The context to resolve ModRC paths with. The shared context is used if None.
+
+    Returns
+    -------
+    dict
+        Maps each file name to a dict of its filter names and filter paths.
+
+    Raises
+    ------
+    ModRCPackageDoesNotExistError
+        Raised if the package does not exist.
+    """
+    context = helper.get_context(context)
+    files_dir = os.path.join(str(context.packages_dir), package_name, 'files')
+    return {
+        file_name: {filter_name: os.path.join(files_dir, file_name, filter_name) for filter_name in filter_names}
+        for file_name, filter_names in index.get_files(loaded_index, package_name, context).items()
+    }
+
+def _copy_file_range(in_fd, out_fd, offset, count):
+    return os.copy_file_range(in_fd, out_fd, count, offset_src=offset)
+
+def _sendfile(in_fd, out_fd, offset, count):
+    return os.sendfile(out_fd, in_fd, offset, count)
+
+def get_kernel_copies():
+    """Get the kernel copy functions available on this platform, most preferred first.
+
+    Returns
+    -------
+    list of callable
+        Functions taking an input fd, output fd, input offset and count that return the number of bytes copied.
+    """
+    kernel_copies = []
+    if hasattr(os, 'copy_file_range'):
+        kernel_copies.append(_copy_file_range)
+    if hasattr(os, 'sendfile'):
+        kernel_copies.append(_sendfile)
+    return kernel_copies
+
+KERNEL_COPIES = get_kernel_copies()
+
+def copy_filter(filter_path, live_fp):
+    """Stream a filter onto the end of an open live file.
+
+    The bytes are copied by the kernel where the platform allows it, otherwise with fixed size buffered
+    copies, so a filter is never read into memory as a whole.
+
+    Parameters
+    ----------
+    filter_path : str
+        The path to the filter to copy.
+    live_fp : file object
+        The live file, opened for unbuffered binary writing.
+
+    Returns
+    -------
+    int
+        The number of bytes copied.
+    """
+    with open(filter_path, 'rb') as ff:
+        in_fd = ff.fileno()
+        out_fd = live_fp.fileno()
+        copied = 0
+        for kernel_copy in KERNEL_COPIES:
+            try:
+                while True:
+                    count = kernel_copy(in_fd, out_fd, copied, KERNEL_COPY_SIZE)
+                    if not count:
+                        return copied
+                    copied += count
+            except OSError as error:
+                if error.errno not in KERNEL_COPY_UNSUPPORTED:
+                    raise
+        # fall back to buffered copies from wherever the kernel copies stopped
+        ff.seek(copied)
+        buffer = bytearray(COPY_BUFFER_SIZE)
+        view = memoryview(buffer)
+        while True:
+            count = ff.readinto(buffer)
+            if not count:
+                return copied
+            live_fp.write(view[:count])
+            copied += count
+
+def write_live_file(live_file, sources):
+    """Concatenate filters into a live file, replacing any previous contents.
+
+    The live file is opened once and every filter is streamed onto it in order.
+
+    Parameters
+    ----------
+    live_file : :obj:`Path`
+        The path to the live file to write.
+    sources : list of str or bytes
+        The paths to the filters to concatenate, in order, or the contents of filters whose includes
+        were expanded.
+
+    Returns
+    -------
+    :obj:`Path`
+        Returns the path to the live file.
+    """
+    if live_file.exists():
+        live_file.unlink()
+    with open(str(live_file), 'wb', buffering=0) as live_fp:
+        for source in sources:
+            if isinstance(source, bytes):
+                view = memoryview(source)
+                while view:
+                    view = view[live_fp.write(view):]
+            else:
+                copy_filter(source, live_fp)
+    return live_file
+
+def _ends_with_newline(source):
+    # check the last byte of a filter without reading the rest of it, an empty filter needs no newline
+    if isinstance(source, bytes):
+        return not source or source.endswith(b'\n')
+    fd = os.open(source, os.O_RDONLY)
+    try:
+        size = os.fstat(fd).st_size
+        return size == 0 or os.pread(fd, 1, size - 1) == b'\n'
+    finally:
+        os.close(fd)
+
+def add_newlines(sources):
+    """Add a newline after every filter but the last that does not end with one.
+
+    Parameters
+    ----------
+    sources : list of str or bytes
+        The paths to the filters to concatenate, in order, or the contents of filters whose includes
+        were expanded.
+
+    Returns
+    -------
+    list of str or bytes
+        The sources with a newline source inserted wherever one is missing between two filters.
+    """
+    joined = []
+    for index, source in enumerate(sources):
+        joined.append(source)
+        if index < len(sources) - 1 and not _ends_with_newline(source):
+            joined.append(b'\n')
+    return joined
+
+def prepare_sources(package_name, filter_paths, resolver=None, renderer=None):
+    """Expand the includes in the filters of a live file, render them if they are templates and add newlines.
+
+    Filters are joined byte for byte unless their package sets newlines in its package.yml file, in which
+    case a newline is added after every filter but the last that does not end with one.
+
+    Parameters
+    ----------
+    package_name : str
+        The name of the package that the file is in.
+    filter_paths : list of str
+        The paths to the filters that apply to the system, in order.
+    resolver : :obj:`ChunkResolver`, optional
+        The resolver to expand includes with. Includes are not expanded if None.
+    renderer : :obj:`Renderer`, optional
+        The renderer to render templates with. Templates are not rendered and newlines are not added if
+        None.
+
+    Returns
+    -------
+    tuple of (list, frozenset of str, tuple of str)
+        For each filter, its path if it is copied as it is or its contents as bytes, the paths of every
+        chunk included and the names of every template variable used.
+    """
+    sources, chunk_paths, names = filter_paths, frozenset(), ()
+    if resolver is not None:
+        sources, chunk_paths = resolver.expand_filters(package_name, filter_paths)
+    if renderer is not None:
+        sources, names = renderer.render_sources(package_name, sources)
+        if renderer.adds_newlines(package_name):
+            sources = add_newlines(sources)
+    return sources, chunk_paths, names
+
+def compile_live_file(compile_manifest, package_name, file_name, filter_paths, live_dir, force=False, resolver=None,
+                      renderer=None):
+    """Compile a live file unless the manifest shows its filters, chunks and template variables are unchanged.
+
+    Parameters
+    ----------
+    compile_manifest : dict
+        The loaded compile manifest, updated if the live file is compiled.
+    package_name : str
+        The name of the package that the file is in.
+    file_name : str
+        The name of the file to compile.
+    filter_paths : list of str
+        The paths to the filters that apply to the system, in order.
+    live_dir : :obj:`Path`
+        The path to the live directory.
+    force : bool, optional
+        Compile the live file even if it is up to date. Defaults to False.
+    resolver : :obj:`ChunkResolver`, optional
+        The resolver to expand includes with. Includes are not expanded if None.
+    renderer : :obj:`Renderer`, optional
+        The renderer to render templates with. Templates are not rendered if None.
+
+    Returns
+    -------
+    :obj:`CompileResult`
+        The outcome of compiling the file.
+
+    Raises
+    ------
+    ModRCChunkDoesNotExistError
+        Raised if an included chunk does not exist.
+    ModRCChunkCycleError
+        Raised if chunks include each other in a cycle.
+    ModRCTemplateError
+        Raised if a template variable does not exist.
+    """
+    live_file = live_dir.joinpath(file_name)
+    if not force and manifest.is_up_to_date(compile_manifest, file_name, filter_paths, live_file):
+        # the filters are unchanged, but the template variables they were rendered with and how they were
+        # joined may not be
+        entry = compile_manifest['files'][file_name]
+        if renderer is None or (renderer.is_current(package_name, entry.get('variables'))
+                                and renderer.adds_newlines(package_name) == entry.get('newlines', False)):
+            return CompileResult(file_name, live_file, UP_TO_DATE)
+    sources, chunk_paths, names = prepare_sources(package_name, filter_paths, resolver, renderer)
+    write_live_file(live_file, sources)
+    chunk_states = () if resolver is None else resolver.get_states(chunk_paths)
+    variables = None if renderer is None else renderer.get_state(package_name, names)
+    newlines = renderer is not None and renderer.adds_newlines(package_name)
+    manifest.record(compile_manifest, file_name, package_name, filter_paths, live_file, chunk_states, variables,
+                    newlines)
+    return CompileResult(file_name, live_file, COMPILED)
+
+def select_filter_paths(file_filters, system):
+    """Select the filters of a file that apply to a system, in the order they are compiled.
+
+    Parameters
+    ----------
+    file_filters : dict
+        Maps each filter name of the file to its path.
+    system : str or list of str
+        The version string for the system, same format as filter names, or a list of them.
+
+    Returns
+    -------
+    list of str
+        The paths to the filters to concatenate, in order.
+    """
+    return [file_filters[name] for name in filters.select_filters(file_filters, system)]
+
+def _compile_file_chain(compile_manifest, chain, system, live_dir, force, resolver, renderer):
+    # compile the packages that share a live file name in order, so the last package wins as in a serial compile
+    results = []
+    for package_name, file_name, file_filters in chain:
+        if not file_filters:
+            results.append((package_name, CompileResult(file_name, None, NO_FILTERS)))
+            continue
+        filter_paths = select_filter_paths(file_filters, system)
+        result = compile_live_file(compile_manifest, package_name, file_name, filter_paths, live_dir, force, resolver,
+                                   renderer)
+        results.append((package_name, result))
+    return results
+
+def _scan_chains(package_names, file_names, context):
+    # snapshot every package and group the files by live file name so no two workers write the same live file
+    loaded_index = index.load_index(context)
+    snapshots = [scan_package(loaded_index, package_name, context) for package_name in package_names]
+    chains = collections.OrderedDict()
+    selected = None if file_names is None else set(file_names)
+    for package_name, snapshot in zip(package_names, snapshots):
+        for file_name in sorted(snapshot):
+            if selected is not None and file_name not in selected:
+                continue
+            chains.setdefault(file_name, []).append((package_name, file_name, snapshot[file_name]))
+    return chains
+
+def compile_packages(package_names, system, force=False, jobs=1, file_names=None, context=None):
+    """Compile every file in a list of packages from a single snapshot of each package tree.
+
+    The files and filters of every package are read from the package index, and the ModRC installation
+    is verified once for all of the packages rather than once per file. Files whose filters have not
+    changed since they were last compiled are not written again. With more than one job, files are
+    compiled concurrently on a thread pool. Files with the same name in different packages are compiled
+    by the same worker in package order. Includes are expanded with one chunk resolver for the whole
+    compile, so every chunk is read at most once, and the filters of packages that use templates are
+    rendered. Filters linked to the same object in the object store are read once. The shell bootstrap
+    scripts are rewritten afterwards if the live files changed.
+
+    Parameters
+    ----------
+    package_names : list of str
+        The names of the packages to compile.
+    system : str or list of str
+        The version string for the system, same format as filter names, or a list of them.
+    force : bool, optional
+        Compile every file even if it is up to date. Defaults to False.
+    jobs : int, optional
+        The number of worker threads. Defaults to 1.
+    file_names : iterable of str, optional
+        Only compile the live files with these names. Every file is compiled if None.
+    context : :obj:`ModRCContext`, optional
+        The context to resolve ModRC paths with. The shared context is used if None.
+
+    Returns
+    -------
+    :obj:`OrderedDict`
+        Maps each package name, in the order given, to a list of :obj:`CompileResult` sorted by file name.
+
+    Raises
+    ------
+    ModRCIntegrityError
+        Raised if ModRC is not installed properly.
+    ModRCPackageDoesNotExistError
+        Raised if a package could not be found.
+    ModRCChunkDoesNotExistError
+        Raised if an included chunk does not exist.
+    ModRCChunkCycleError
+        Raised if chunks include each other in a cycle.
+    ModRCTemplateError
+        Raised if a template variable does not exist.
+    """
+    # verify the installation once
+    context = helper.get_context(context)
+    modrc_dir = context.modrc_dir
+    live_dir = context.live_dir
+    compile_manifest = manifest.load_manifest(modrc_dir)
+    executor = futures.ThreadPoolExecutor(max_workers=jobs) if jobs > 1 else None
+    try:
+        chains = _scan_chains(package_names, file_names, context)
+        # compile every file from the snapshots
+        resolver = chunk.get_resolver(context)
+        compile_chain = functools.partial(_compile_file_chain, compile_manifest, system=system, live_dir=live_dir,
+                                          force=force, resolver=resolver,
+                                          renderer=template.Renderer(context, blobs=resolver.blobs))
+        if executor is None:
+            chain_results = [compile_chain(chain) for chain in chains.values()]
+        else:
+            chain_results = list(executor.map(compile_chain, chains.values()))
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    manifest.save_manifest(modrc_dir, compile_manifest)
+    bootstrap.update_bootstrap(context)
+    # collect the results by package
+    results = collections.OrderedDict((package_name, []) for package_name in package_names)
+    for chain_result in chain_results:
+        for package_name, result in chain_result:
+            results[package_name].append(result)
+    for package_results in results.values():
+        package_results.sort(key=lambda result: result.file_name)
+    return results
+
+def _check_targets(targets):
+    # every system string of a target must be a valid filter name, targets also name output paths
+    for target in targets:
+        if not all(filters.valid_filter_name(system_string) for system_string in target.split(',')):
+            raise exceptions.ModRCFilterNameError('Invalid target: {}'.format(target))
+
+def _target_system(target):
+    # a target of comma separated system strings, such as a version string and a MAC address
+    system_strings = target.split(',')
+    return system_strings[0] if len(system_strings) == 1 else system_strings
+
+def _target_fingerprint(target):
+    # the fingerprint of a target system, merged from each of its system strings
+    fingerprint = {'os': None, 'distro': None, 'version': None, 'mac': None}
+    for system_string in target.split(','):
+        for key, value in modrc_system.parse_system(system_string).items():
+            if value is not None:
+                fingerprint[key] = value
+    return fingerprint
+
+def _last_with_filters(chain):
+    # the last package with filters for a live file decides its contents, as in a serial compile
+    for package_name, file_name, file_filters in reversed(chain):
+        if file_filters:
+            return file_name, package_name, file_filters
+    return chain[0][1], None, None
+
+def cross_sources(package_names, targets, file_names=None, context=None):
+    """Get the sources of the live files of many systems, without compiling them.
+
+    The packages are read from the package index once, then the sources of each target are worked out lazily as they are
+    iterated, so only the live file being read is held in memory. Filters are left as paths unless they
+    have includes or are templates, which are expanded or rendered for each target.
+
+    Parameters
+    ----------
+    package_names : list of str
+        The names of the packages to compile.
+    targets : list of str
+        The systems to compile for, each a version string in the same format as filter names, or
+        several of them separated by commas such as a version string and a MAC address.
+    file_names : iterable of str, optional
+        Only include the live files with these names. Every file is included if None.
+    context : :obj:`ModRCContext`, optional
+        The context to resolve ModRC paths with. The shared context is used if None.
+
+    Returns
+    -------
+    :obj:`OrderedDict`
+        Maps each target, in the order given, to an iterator of the name of each live file, sorted by
+        name, and its sources as they would be passed to :func:`write_live_file`.
+
+    Raises
+    ------
+    ModRCIntegrityError
+        Raised if ModRC is not installed properly.
+    ModRCPackageDoesNotExistError
+        Raised if a package could not be found.
+    ModRCFilterNameError
+        Raised if a system string of a target is not a valid filter name.
+    """
+    _check_targets(targets)
+    context = helper.get_context(context)
+    resolver = chunk.get_resolver(context)
+    chains = _scan_chains(package_names, file_names, context)
+    selected = sorted(
+        (file_name, package_name, file_filters)
+        for file_name, package_name, file_filters in map(_last_with_filters, chains.values())
+        if file_filters is not None
+    )
+
+    def iter_sources(target):
+        renderer = template.Renderer(context, _target_fingerprint(target), resolver.blobs)
+        for file_name, package_name, file_filters in selected:
+            filter_paths = select_filter_paths(file_filters, _target_system(target))
+            sources, _, _ = prepare_sources(package_name, filter_paths, resolver, renderer)
+            yield file_name, sources
+
+    return collections.OrderedDict((target, iter_sources(target)) for target in targets)
+
+def cross_compile(package_names, targets, output_dir, jobs=1, file_names=None, context=None):
+    """Compile packages for many systems in a single pass, writing each system's live files to its own directory.
+
+    Every filter is read at most once and shared by every target that selects it. Includes are
+    expanded once per filter, and targets that select the same filters share the compiled contents
+    unless the package uses templates, which are rendered with the fingerprint in each target. The live
+    directory and the compile manifest are not touched.
+
+    Parameters
+    ----------
+    package_names : list of str
+        The names of the packages to compile.
+    targets : list of str
+        The systems to compile for, each a version string in the same format as filter names, or
+        several of them separated by commas such as a version string and a MAC address.
+    output_dir : :obj:`Path`
+        The directory to write the live files of each target to, in a subdirectory named after the target.
+    jobs : int, optional
+        The number of worker threads. Defaults to 1.
+    file_names : iterable of str, optional
+        Only compile the live files with these names. Every file is compiled if None.
+    context : :obj:`ModRCContext`, optional
+        The context to resolve ModRC paths with. The shared context is used if None.
+
+    Returns
+    -------
+    :obj:`OrderedDict`
+        Maps each target, in the order given, to a list of :obj:`CompileResult` sorted by file name.
+
+    Raises
+    ------
+    ModRCIntegrityError
+        Raised if ModRC is not installed properly.
+    ModRCPackageDoesNotExistError
+        Raised if a package could not be found.
+    ModRCChunkDoesNotExistError
+        Raised if an included chunk does not exist.
+    ModRCChunkCycleError
+        Raised if chunks include each other in a cycle.
+    ModRCTemplateError
+        Raised if a template variable does not exist for a target.
+    ModRCFilterNameError
+        Raised if a system string of a target is not a valid filter name.
+    """
+    _check_targets(targets)
+    context = helper.get_context(context)
+    resolver = chunk.get_resolver(context)
+    renderers = {target: template.Renderer(context, _target_fingerprint(target)) for target in targets}
+    target_dirs = collections.OrderedDict((target, output_dir.joinpath(target)) for target in targets)
+    for target_dir in target_dirs.values():
+        target_dir.mkdir(parents=True, exist_ok=True)
+    lock = threading.Lock()
+    # the expanded contents of every filter read, by path
+    filter_contents = {}
+
+    def read_filter(package_name, filter_path):
+        with lock:
+            data = filter_contents.get(filter_path)
+        if data is None:
+            with open(filter_path, 'rb') as ff:
+                data = ff.read()
+            data, _ = resolver.expand(package_name, data)
+            with lock:
+                data = filter_contents.setdefault(filter_path, data)
+        return data
+
+    def compile_chain(chain):
+        file_name, package_name, file_filters = _last_with_filters(chain)
+        if file_filters is None:
+            return []
+        # targets that select the same filters share the compiled contents
+        compiled = {}
+        results = []
+        for target, target_dir in target_dirs.items():
+            filter_paths = tuple(select_filter_paths(file_filters, _target_system(target)))
+            templated = renderers[target].uses_templates(package_name)
+            key = (filter_paths, target if templated else None)
+            if key not in compiled:
+                contents = [read_filter(package_name, filter_path) for filter_path in filter_paths]
+                if templated:
+                    contents = [renderers[target].render(package_name, data)[0] for data in contents]
+                if renderers[target].adds_newlines(package_name):
+                    contents = add_newlines(contents)
+                compiled[key] = contents
+            live_file = write_live_file(target_dir.joinpath(file_name), compiled[key])
+            results.append((target, CompileResult(file_name, live_file, COMPILED)))
+        return results
+
+    executor = futures.ThreadPoolExecutor(max_workers=jobs) if jobs > 1 else None
+    try:
+        chains = _scan_chains(package_names, file_names, context)
+        if executor is None:
+            chain_results = [compile_chain(chain) for chain in chains.values()]
+        else:
+            chain_results = list(executor.map(compile_chain, chains.values()))
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    results = collections.OrderedDict((target, []) for target in targets)
+    for chain_result in chain_results:
+        for target, result in chain_result:
+            results[target].append(result)
+    for target_results in results.values():
+        target_results.sort(key=lambda result: result.file_name)
+    return results
+
+def compile_package(package_name, system, force=False, jobs=1, context=None):
+    """Compile every file in a package from a single snapshot of the package tree.
+
+    Parameters
+    ----------
+    package_name : str
+        The name of the package to compile.
+    system : str or list of str
+        The version string for the system, same format as filter names, or a list of them.
+    force : bool, optional
+        Compile every file even if it is up to date. Defaults to False.
+    jobs : int, optional
+        The number of worker threads. Defaults to 1.
+    context : :obj:`ModRCContext`, optional
+        The context to resolve ModRC paths with. The shared context is used if None.
+
+    Returns
+    -------
+    list of :obj:`CompileResult`
+        The outcome for each file in the package, sorted by file name.
+
+    Raises
+    ------
+    ModRCIntegrityError
+        Raised if ModRC is not installed properly.
+    ModRCPackageDoesNotExistError
+        Raised if the package could not be found.
+    """
+    return compile_packages([package_name], system, force=force, jobs=jobs, context=context)[package_name]
+
+def hash_filters(sources):
+    """Hash the concatenation of filters without writing it anywhere.
+
+    Parameters
+    ----------
+    sources : list of str or bytes
+        The paths to the filters to concatenate, in order, or the contents of filters whose includes
+        were expanded.
+
+    Returns
+    -------
+    tuple of (str, int)
+        The hex SHA-256 digest and size of the concatenated filters.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    buffer = bytearray(COPY_BUFFER_SIZE)
+    view = memoryview(buffer)
+    for source in sources:
+        if isinstance(source, bytes):
+            digest.update(source)
+            size += len(source)
+            continue
+        with open(source, 'rb', buffering=0) as ff:
+            while True:
+                count = ff.readinto(buffer)
+                if not count:
+                    break
+                digest.update(view[:count])
+                size += count
+    return digest.hexdigest(), size
+
+def plan_live_file(file_name, sources, live_dir):
+    """Work out whether compiling a live file would change it, down to the byte.
+
+    The filters are streamed through a hasher. The live file is only read if it has the same size as
+    the compiled output would.
+
+    Parameters
+    ----------
+    file_name : str
+        The name of the live file.
+    sources : list of str or bytes
+        The paths to the filters that apply to the system, in order, or the contents of filters whose
+        includes were expanded.
+    live_dir : :obj:`Path`
+        The path to the live directory.
+
+    Returns
+    -------
+    :obj:`PlanResult`
+        The planned outcome of compiling the file.
+    """
+    live_file = live_dir.joinpath(file_name)
+    digest, size = hash_filters(sources)
+    try:
+        live_size = os.stat(str(live_file)).st_size
+    except FileNotFoundError:
+        return PlanResult(file_name, live_file, NEW, size, None)
+    if live_size == size and manifest.hash_file(str(live_file)) == digest:
+        return PlanResult(file_name, live_file, UNCHANGED, size, live_size)
+    return PlanResult(file_name, live_file, CHANGED, size, live_size)
+
+def plan_packages(package_names, system, file_names=None, context=None):
+    """Work out which live files compiling a list of packages would change, without writing anything.
+
+    Files, filters, includes and templates are selected, expanded and rendered exactly as
+    :func:`compile_packages` does.
+    Where packages share a live file name, the last package with filters for the file decides its
+    contents.
+
+    Parameters
+    ----------
+    package_names : list of str
+        The names of the packages to plan.
+    system : str or list of str
+        The version string for the system, same format as filter names, or a list of them.
+    file_names : iterable of str, optional
+        Only plan the live files with these names. Every file is planned if None.
+    context : :obj:`ModRCContext`, optional
+        The context to resolve ModRC paths with. The shared context is used if None.
+
+    Returns
+    -------
+    list of :obj:`PlanResult`
+        The planned outcome for each live file, sorted by file name.
+
+    Raises
+    ------
+    ModRCIntegrityError
+        Raised if ModRC is not installed properly.
+    ModRCPackageDoesNotExistError
+        Raised if a package could not be found.
+    ModRCChunkDoesNotExistError
+        Raised if an included chunk does not exist.
+    ModRCChunkCycleError
+        Raised if chunks include each other in a cycle.
+    ModRCTemplateError
+        Raised if a template variable does not exist.
+    """
+    context = helper.get_context(context)
+    live_dir = context.live_dir
+    chains = _scan_chains(package_names, file_names, context)
+    resolver = chunk.get_resolver(context)
+    renderer = template.Renderer(context, blobs=resolver.blobs)
+    plan = []
+    for file_name, chain in sorted(chains.items()):
+        with_filters = [(package_name, file_filters) for package_name, _, file_filters in chain if file_filters]
+        if not with_filters:
+            continue
+        package_name, file_filters = with_filters[-1]
+        sources, _, _ = prepare_sources(package_name, select_filter_paths(file_filters, system), resolver, renderer)
+        plan.append(plan_live_file(file_name, sources, live_dir))
+    return plan
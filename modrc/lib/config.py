@@ -0,0 +1,150 @@
+import copy
+import os
+import threading
+
+import yaml
+
+from modrc.lib import helper
+
+
+# use libyaml when PyYAML was built with it since it is much faster than the pure Python implementation
+SafeLoader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+SafeDumper = getattr(yaml, 'CSafeDumper', yaml.SafeDumper)
+
+# parsed config files by path, each with the stamp of the file it was parsed from
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def get_stamp(config_file):
+    """Get a cheap stamp of a config file that changes whenever the file is written.
+
+    Parameters
+    ----------
+    config_file : :obj:`Path`
+        The path to the config file.
+
+    Returns
+    -------
+    tuple
+        The inode, size and mtime of the file.
+    """
+    config_stat = os.stat(str(config_file))
+    return config_stat.st_ino, config_stat.st_size, config_stat.st_mtime_ns
+
+def clear_cache():
+    """Forget every parsed config file so they are parsed again on the next load."""
+    with _cache_lock:
+        _cache.clear()
+
+def load_config(config_file):
+    """Load a YAML config file, only parsing it if it has changed since it was last parsed.
+
+    Parameters
+    ----------
+    config_file : :obj:`Path`
+        The path to the config file.
+
+    Returns
+    -------
+    dict
+        A copy of the parsed config, or an empty dict if the file is empty.
+
+    Raises
+    ------
+    FileNotFoundError
+        Raised if the config file does not exist.
+    """
+    key = str(config_file)
+    stamp = get_stamp(config_file)
+    with _cache_lock:
+        cached = _cache.get(key)
+    if cached is not None and cached[0] == stamp:
+        return copy.deepcopy(cached[1])
+    with open(key, 'r') as yf:
+        config = yaml.load(yf, Loader=SafeLoader)
+    if config is None:
+        config = {}
+    with _cache_lock:
+        _cache[key] = (stamp, config)
+    return copy.deepcopy(config)
+
+def save_config(config_file, config):
+    """Atomically write a YAML config file and cache it.
+
+    Parameters
+    ----------
+    config_file : :obj:`Path`
+        The path to the config file.
+    config : dict
+        The config to write.
+    """
+    key = str(config_file)
+    helper.write_atomic(config_file, yaml.dump(config, Dumper=SafeDumper, default_flow_style=False))
+    with _cache_lock:
+        _cache[key] = (get_stamp(config_file), copy.deepcopy(config))
+
+def update_config(config_file, settings):
+    """Apply several setting changes to a YAML config file with a single write.
+
+    Parameters
+    ----------
+    config_file : :obj:`Path`
+        The path to the config file.
+    settings : dict
+        The settings to change. Settings that are None are not modified.
+
+    Returns
+    -------
+    dict
+        The updated config.
+    """
+    config = load_config(config_file)
+    changes = {name: value for name, value in settings.items() if value is not None}
+    if any(name not in config or config[name] != value for name, value in changes.items()):
+        config.update(changes)
+        save_config(config_file, config)
+    return config
+
+def load_modrc_config(context=None):
+    """Load the ModRC config from modrc.yml.
+
+    Parameters
+    ----------
+    context : :obj:`ModRCContext`, optional
+        The context to resolve ModRC paths with. The shared context is used if None.
+
+    Returns
+    -------
+    dict
+        A copy of the ModRC config.
+
+    Raises
+    ------
+    ModRCIntegrityError
+        Raised if the ModRC directory or file do not exist.
+    """
+    return load_config(helper.get_context(context).modrc_file)
+
+def get_setting(name, default=None, context=None):
+    """Get a single setting from the ModRC config.
+
+    Parameters
+    ----------
+    name : str
+        The name of the setting, such as defaultpackage, editor, autocompile or autosync.
+    default : optional
+        The value to return if the setting is not set. Defaults to None.
+    context : :obj:`ModRCContext`, optional
+        The context to resolve ModRC paths with. The shared context is used if None.
+
+    Returns
+    -------
+    The value of the setting or the default.
+
+    Raises
+    ------
+    ModRCIntegrityError
+        Raised if the ModRC directory or file do not exist.
+    """
+    return load_modrc_config(context).get(name, default)
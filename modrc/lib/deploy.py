@@ -0,0 +1,280 @@
+import collections
+import json
+import os
+import pathlib
+import shutil
+import stat
+
+from modrc import exceptions
+from modrc.lib import helper, package
+
+
+STATE_VERSION = 1
+
+# deploy modes
+LINK = 'link'
+COPY = 'copy'
+
+# plan actions
+CREATE = 'create'
+UPDATE = 'update'
+REMOVE = 'remove'
+CONFLICT = 'conflict'
+
+Action = collections.namedtuple('Action', ['action', 'target', 'source'])
+
+
+def get_state_file(modrc_dir):
+    """Get the path to the deploy state within the ModRC directory.
+
+    Parameters
+    ----------
+    modrc_dir : :obj:`Path`
+        The path to the ModRC directory.
+
+    Returns
+    -------
+    :obj:`Path`
+        The path to the deploy state file.
+    """
+    return modrc_dir.joinpath('deploy.json')
+
+def load_state(modrc_dir):
+    """Load the deploy state.
+
+    Parameters
+    ----------
+    modrc_dir : :obj:`Path`
+        The path to the ModRC directory.
+
+    Returns
+    -------
+    dict
+        Maps each deployed target to the source, mode and size and mtime it was deployed with, or an empty
+        dict if nothing was deployed or the state cannot be read.
+    """
+    try:
+        with open(str(get_state_file(modrc_dir)), 'r') as sf:
+            state = json.load(sf)
+    except (OSError, ValueError):
+        state = None
+    if not isinstance(state, dict) or state.get('version') != STATE_VERSION:
+        return {}
+    return state['targets']
+
+def save_state(modrc_dir, targets):
+    """Atomically write the deploy state.
+
+    Parameters
+    ----------
+    modrc_dir : :obj:`Path`
+        The path to the ModRC directory.
+    targets : dict
+        Maps each deployed target to the source, mode and size and mtime it was deployed with.
+    """
+    state = {'version': STATE_VERSION, 'targets': targets}
+    helper.write_atomic(get_state_file(modrc_dir), json.dumps(state, separators=(',', ':'), sort_keys=True))
+
+def get_default_target(file_name, home):
+    """Get the default target of a live file, a dotfile with the same name in the home directory.
+
+    Parameters
+    ----------
+    file_name : str
+        The name of the live file.
+    home : :obj:`Path`
+        The path to the home directory.
+
+    Returns
+    -------
+    :obj:`Path`
+        The path to deploy the live file to.
+    """
+    return home.joinpath(file_name if file_name.startswith('.') else '.' + file_name)
+
+def get_desired(home, context=None):
+    """Work out where every live file should be deployed.
+
+    Live files go to the default target unless the deploy mapping in a package.yml file names another
+    target, relative to the home directory, or maps the file to false to not deploy it. Later packages
+    override earlier ones.
+
+    Parameters
+    ----------
+    home : :obj:`Path`
+        The path to the home directory.
+    context : :obj:`ModRCContext`, optional
+        The context to resolve ModRC paths with. The shared context is used if None.
+
+    Returns
+    -------
+    dict
+        Maps each target path to the path of its live file.
+
+    Raises
+    ------
+    ModRCDeployTargetError
+        Raised if a target is not inside the home directory or two live files share a target.
+    """
+    context = helper.get_context(context)
+    home_path = os.path.normpath(str(home))
+    live_dir = context.live_dir
+    mapping = {}
+    for package_name in package.list_packages(context):
+        try:
+            package_deploy = package.load_package_config(package_name, context).get('deploy')
+        except exceptions.ModRCPackageDoesNotExistError:
+            continue
+        if isinstance(package_deploy, dict):
+            mapping.update(package_deploy)
+    desired = {}
+    for entry in sorted(os.scandir(str(live_dir)), key=lambda entry: entry.name):
+        if not entry.is_file():
+            continue
+        target = mapping.get(entry.name)
+        if target is False:
+            continue
+        if target is None:
+            target = get_default_target(entry.name, home)
+        else:
+            target = home.joinpath(pathlib.Path(str(target)).expanduser())
+        # resolved without following symlinks, since targets are often links themselves
+        target = os.path.normpath(str(target))
+        if os.path.commonpath([home_path, target]) != home_path or target == home_path:
+            raise exceptions.ModRCDeployTargetError('Deploy target is outside of the home directory: {}'.format(target))
+        if target in desired:
+            raise exceptions.ModRCDeployTargetError('Live files {} and {} are both deployed to {}'.format(
+                os.path.basename(desired[target]), entry.name, target))
+        desired[target] = entry.path
+    return desired
+
+def _lstat(path):
+    try:
+        return os.lstat(path)
+    except FileNotFoundError:
+        return None
+
+def _is_deployed(target_stat, target, source, mode, recorded):
+    # check if a target already holds what deploying the source would put there
+    if target_stat is None:
+        return False
+    if mode == LINK:
+        return stat.S_ISLNK(target_stat.st_mode) and os.readlink(target) == source
+    if recorded is None or recorded['mode'] != COPY or recorded['source'] != source:
+        return False
+    source_stat = os.stat(source)
+    return (stat.S_ISREG(target_stat.st_mode)
+            and [target_stat.st_size, target_stat.st_mtime_ns] == recorded['stat']
+            and [source_stat.st_size, source_stat.st_mtime_ns] == recorded['source_stat'])
+
+def _is_unmodified(target_stat, target, recorded):
+    # check if a managed target is still as it was deployed, so replacing or removing it loses nothing
+    if recorded['mode'] == LINK:
+        return stat.S_ISLNK(target_stat.st_mode) and os.readlink(target) == recorded['source']
+    return stat.S_ISREG(target_stat.st_mode) and [target_stat.st_size, target_stat.st_mtime_ns] == recorded['stat']
+
+def diff(desired, state, mode=LINK):
+    """Compare the desired deployment with the current state of every target.
+
+    Each target is checked with a single lstat. Targets that ModRC did not deploy, or that were changed
+    since they were deployed, are never overwritten or removed and are reported as conflicts.
+
+    Parameters
+    ----------
+    desired : dict
+        Maps each target path to the path of its live file.
+    state : dict
+        The loaded deploy state.
+    mode : str, optional
+        LINK to symlink targets to live files or COPY to copy live files to targets. Defaults to LINK.
+
+    Returns
+    -------
+    list of :obj:`Action`
+        The changes needed, sorted by target. Empty if everything is deployed.
+    """
+    actions = []
+    for target in sorted(set(desired) | set(state)):
+        target_stat = _lstat(target)
+        source = desired.get(target)
+        recorded = state.get(target)
+        if source is None:
+            # remove targets that are no longer wanted if they are still as they were deployed
+            if target_stat is not None and _is_unmodified(target_stat, target, recorded):
+                actions.append(Action(REMOVE, target, recorded['source']))
+            continue
+        if _is_deployed(target_stat, target, source, mode, recorded):
+            continue
+        if target_stat is None:
+            actions.append(Action(CREATE, target, source))
+        elif recorded is not None and _is_unmodified(target_stat, target, recorded):
+            actions.append(Action(UPDATE, target, source))
+        else:
+            actions.append(Action(CONFLICT, target, source))
+    return actions
+
+def _replace(target, mode, source):
+    # put the new target next to the old one and swap it in atomically
+    temp = str(helper.get_temp_file(pathlib.Path(target)))
+    if os.path.lexists(temp):
+        os.unlink(temp)
+    if mode == LINK:
+        os.symlink(source, temp)
+    else:
+        shutil.copy2(source, temp)
+    os.replace(temp, target)
+
+def deploy(mode=LINK, dry_run=False, home=None, context=None):
+    """Deploy live files into the home directory, only touching targets that differ.
+
+    The deploy state is only written if it changed, so deploying an unchanged system writes nothing.
+
+    Parameters
+    ----------
+    mode : str, optional
+        LINK to symlink targets to live files or COPY to copy live files to targets. Defaults to LINK.
+    dry_run : bool, optional
+        Only plan the changes without applying them. Defaults to False.
+    home : :obj:`Path`, optional
+        The path to the home directory. The home directory of the current user is used if None.
+    context : :obj:`ModRCContext`, optional
+        The context to resolve ModRC paths with. The shared context is used if None.
+
+    Returns
+    -------
+    list of :obj:`Action`
+        The changes that were applied, or would be applied in a dry run. Conflicts are never applied.
+
+    Raises
+    ------
+    ModRCIntegrityError
+        Raised if ModRC is not installed properly.
+    ModRCDeployTargetError
+        Raised if a target is not inside the home directory or two live files share a target.
+    """
+    context = helper.get_context(context)
+    home = pathlib.Path.home() if home is None else home
+    desired = get_desired(home, context)
+    state = load_state(context.modrc_dir)
+    actions = diff(desired, state, mode)
+    if dry_run:
+        return actions
+    # forget targets that are no longer wanted, whether they are removed or were changed by the user
+    targets = {target: recorded for target, recorded in state.items() if target in desired}
+    for action in actions:
+        if action.action == REMOVE:
+            os.unlink(action.target)
+        elif action.action in (CREATE, UPDATE):
+            os.makedirs(os.path.dirname(action.target), exist_ok=True)
+            _replace(action.target, mode, action.source)
+            target_stat = os.lstat(action.target)
+            source_stat = os.stat(action.source)
+            targets[action.target] = {
+                'source': action.source,
+                'mode': mode,
+                'stat': [target_stat.st_size, target_stat.st_mtime_ns],
+                'source_stat': [source_stat.st_size, source_stat.st_mtime_ns]
+            }
+    if targets != state:
+        save_state(context.modrc_dir, targets)
+    return actions
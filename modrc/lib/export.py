@@ -0,0 +1,224 @@
+import collections
+import functools
+import hashlib
+import io
+import os
+import shutil
+import sys
+import tarfile
+import time
+import zipfile
+
+from modrc.lib import compiler, helper
+
+
+# archive formats
+TAR = 'tar'
+TAR_GZ = 'tar.gz'
+ZIP = 'zip'
+FORMATS = (TAR, TAR_GZ, ZIP)
+# tar archives are written as streams, so they never seek and can be piped
+TAR_MODES = {TAR: 'w|', TAR_GZ: 'w|gz'}
+# the file listing the hash of every live file of a target, in the format read by sha256sum --check
+HASHES_NAME = 'SHA256SUMS'
+COPY_BUFFER_SIZE = 64 * 1024
+# zip entries can only be streamed into from python 3.6, before that each entry is read whole
+ZIP_STREAMING = sys.version_info >= (3, 6)
+
+ExportResult = collections.namedtuple('ExportResult', ['target', 'archive', 'files', 'size'])
+
+
+class _SourceReader:
+    """Reads the concatenated sources of a live file in order, hashing the contents as they are read."""
+
+    def __init__(self, sources):
+        self._sources = iter(sources)
+        self._current = None
+        self.digest = hashlib.sha256()
+
+    def read(self, size=-1):
+        # fill the whole request across sources, tarfile treats a short read as the end of the data
+        parts = []
+        while size != 0:
+            if self._current is None:
+                source = next(self._sources, None)
+                if source is None:
+                    break
+                self._current = io.BytesIO(source) if isinstance(source, bytes) else open(source, 'rb')
+            data = self._current.read(size)
+            if not data:
+                self.close()
+                continue
+            parts.append(data)
+            if size > 0:
+                size -= len(data)
+        data = b''.join(parts)
+        self.digest.update(data)
+        return data
+
+    def close(self):
+        if self._current is not None:
+            self._current.close()
+            self._current = None
+
+
+class _Archive:
+    """Writes entries into a tar or zip archive streamed onto a file object."""
+
+    def __init__(self, fileobj, archive_format):
+        self.mtime = time.time()
+        if archive_format == ZIP:
+            self._zip = zipfile.ZipFile(fileobj, 'w', zipfile.ZIP_DEFLATED)
+            self._tar = None
+        else:
+            self._zip = None
+            self._tar = tarfile.open(fileobj=fileobj, mode=TAR_MODES[archive_format])
+
+    def add(self, name, reader, size):
+        if self._tar is not None:
+            info = tarfile.TarInfo(name)
+            info.size = size
+            info.mtime = self.mtime
+            info.mode = 0o644
+            self._tar.addfile(info, reader)
+            return
+        info = zipfile.ZipInfo(name, time.localtime(self.mtime)[:6])
+        info.compress_type = zipfile.ZIP_DEFLATED
+        info.external_attr = 0o644 << 16
+        if not ZIP_STREAMING:
+            self._zip.writestr(info, reader.read())
+            return
+        # the size is known up front so zip64 records are only written for files that need them
+        info.file_size = size
+        with self._zip.open(info, 'w') as entry:
+            shutil.copyfileobj(reader, entry, COPY_BUFFER_SIZE)
+
+    def close(self):
+        if self._tar is not None:
+            self._tar.close()
+        else:
+            self._zip.close()
+
+
+def get_source_size(sources):
+    """Get the size of a live file from its sources without reading them.
+
+    Parameters
+    ----------
+    sources : list of str or bytes
+        The paths to the filters, in order, or the contents of filters whose includes were expanded.
+
+    Returns
+    -------
+    int
+        The size of the live file in bytes.
+    """
+    return sum(len(source) if isinstance(source, bytes) else os.stat(source).st_size for source in sources)
+
+def _write_bundle(archive, target, entries, prefix='', hashes=False):
+    # stream the live files of a target into an archive, hashing them on the way for the SHA256SUMS file
+    lines = []
+    files = 0
+    total = 0
+    for file_name, sources in entries:
+        size = get_source_size(sources)
+        reader = _SourceReader(sources)
+        try:
+            archive.add(prefix + file_name, reader, size)
+        finally:
+            reader.close()
+        lines.append('{}  {}\n'.format(reader.digest.hexdigest(), file_name))
+        files += 1
+        total += size
+    if hashes:
+        data = ''.join(lines).encode()
+        archive.add(prefix + HASHES_NAME, io.BytesIO(data), len(data))
+    return ExportResult(target, None, files, total)
+
+def _write_archive(path, archive_format, write):
+    # write an archive next to its path and swap it in once it is complete
+    temp_file = helper.get_temp_file(path)
+    try:
+        with open(str(temp_file), 'wb') as af:
+            archive = _Archive(af, archive_format)
+            results = write(archive)
+            archive.close()
+        os.replace(str(temp_file), str(path))
+    except BaseException:
+        if temp_file.exists():
+            temp_file.unlink()
+        raise
+    return results
+
+def export_bundles(package_names, targets, output, archive_format=TAR, single=False, hashes=False, file_names=None,
+                   context=None):
+    """Compile packages for many systems and stream the live files of each target into an archive.
+
+    Live files are streamed from their filters into the archives without being written to the live
+    directory or anywhere else first, and one live file is read at a time, so memory use does not grow
+    with the number of targets or the size of the files. Tar archives are written as streams and can be
+    piped.
+
+    Parameters
+    ----------
+    package_names : list of str
+        The names of the packages to compile.
+    targets : list of str
+        The systems to compile for, each a version string in the same format as filter names, or
+        several of them separated by commas such as a version string and a MAC address.
+    output : :obj:`Path` or file object
+        The directory to write an archive for each target to, named after the target. With single, the
+        path to the archive or a binary file object to stream it onto.
+    archive_format : str, optional
+        One of TAR, TAR_GZ or ZIP. Defaults to TAR.
+    single : bool, optional
+        Write one archive with the live files of each target in a directory named after the target.
+        Defaults to False.
+    hashes : bool, optional
+        Add a SHA256SUMS file listing the hash of every live file of each target. Defaults to False.
+    file_names : iterable of str, optional
+        Only export the live files with these names. Every file is exported if None.
+    context : :obj:`ModRCContext`, optional
+        The context to resolve ModRC paths with. The shared context is used if None.
+
+    Returns
+    -------
+    list of :obj:`ExportResult`
+        The archive, number of live files and total size of each target, in the order given. The archive
+        is None if it was streamed onto a file object.
+
+    Raises
+    ------
+    ModRCIntegrityError
+        Raised if ModRC is not installed properly.
+    ModRCPackageDoesNotExistError
+        Raised if a package could not be found.
+    ModRCChunkDoesNotExistError
+        Raised if an included chunk does not exist.
+    ModRCChunkCycleError
+        Raised if chunks include each other in a cycle.
+    ModRCTemplateError
+        Raised if a template variable does not exist for a target.
+    ModRCFilterNameError
+        Raised if a system string of a target is not a valid filter name.
+    """
+    bundles = compiler.cross_sources(package_names, targets, file_names, context)
+    if single:
+        def write(archive):
+            return [_write_bundle(archive, target, entries, target + '/', hashes) for target, entries in bundles.items()]
+
+        if hasattr(output, 'write'):
+            archive = _Archive(output, archive_format)
+            results = write(archive)
+            archive.close()
+            return results
+        results = _write_archive(output, archive_format, write)
+        return [result._replace(archive=output) for result in results]
+    output.mkdir(parents=True, exist_ok=True)
+    results = []
+    for target, entries in bundles.items():
+        path = output.joinpath('{}.{}'.format(target, archive_format))
+        write = functools.partial(_write_bundle, target=target, entries=entries, hashes=hashes)
+        result = _write_archive(path, archive_format, write)
+        results.append(result._replace(archive=path))
+    return results
@@ -1,10 +1,8 @@
-import os
-
 from modrc import exceptions
-from modrc.lib import helper, package
+from modrc.lib import chunk, compiler, filters, helper, index, manifest, package, template
 
 
-def create_file(file_name, package_name):
+def create_file(file_name, package_name, context=None):
     """Create a new file in a package.
 
     Parameters
@@ -13,6 +11,8 @@ def create_file(file_name, package_name):
         The name of the file to create.
     package_name : str
         The name of the package that the file will go in.
+    context : :obj:`ModRCContext`, optional
+        The context to resolve ModRC paths with. The shared context is used if None.
 
     Returns
     -------
@@ -29,16 +29,17 @@ def create_file(file_name, package_name):
         Raised if the file already exists in the package.
     """
     # try to get the package
-    package_dir = package.get_package(package_name)
+    package_dir = package.get_package(package_name, context)
     # check if the file already exists
     file_dir = package_dir.joinpath('files', file_name)
     if file_dir.is_dir():
         raise exceptions.ModRCFileExistsError('File already exists')
     # create the file dir
     file_dir.mkdir(parents=True)
+    index.add_file(file_name, package_name, context)
     return file_dir
 
-def get_file(file_name, package_name):
+def get_file(file_name, package_name, context=None):
     """Retrieve a file from a package.
 
     Parameters
@@ -47,6 +48,8 @@ def get_file(file_name, package_name):
         The name of the file to retrieve.
     package_name : str
         The name of the package that the file is in.
+    context : :obj:`ModRCContext`, optional
+        The context to resolve ModRC paths with. The shared context is used if None.
 
     Returns
     -------
@@ -63,14 +66,14 @@ def get_file(file_name, package_name):
         Raised if the file of package is not found.
     """
     # try to get the package directory
-    package_dir = package.get_package(package_name)
+    package_dir = package.get_package(package_name, context)
     # try to the file directory
     file_dir = package_dir.joinpath('files', file_name)
     if not file_dir.is_dir():
         raise exceptions.ModRCFileDoesNotExistError('File does not exist')
     return file_dir
 
-def create_file_filter(filter_name, file_name, package_name):
+def create_file_filter(filter_name, file_name, package_name, context=None):
     """Create a new file filter for a file.
 
     Parameters
@@ -81,6 +84,8 @@ def create_file_filter(filter_name, file_name, package_name):
         The file to create the filter for.
     package_name : str
         The package that the file is in.
+    context : :obj:`ModRCContext`, optional
+        The context to resolve ModRC paths with. The shared context is used if None.
 
     Returns
     -------
@@ -99,31 +104,44 @@ def create_file_filter(filter_name, file_name, package_name):
         Raised if the filter name is invalid.
     """
     # try to get the file
-    file_dir = get_file(file_name, package_name)
+    file_dir = get_file(file_name, package_name, context)
     # validate file filter name
-    if not helper.valid_filter_name(filter_name):
+    if not filters.valid_filter_name(filter_name):
         raise exceptions.ModRCFilterNameError('Invalid file filter name')
     # create the file filter
     file_filter = file_dir.joinpath(filter_name)
     file_filter.touch()
+    index.add_filter(filter_name, file_name, package_name, context)
     return file_filter
 
-def compile_file(file_name, package_name, system):
+def compile_file(file_name, package_name, system, force=False, context=None, compile_manifest=None,
+                 loaded_index=None):
     """Compile a given file from a package.
 
+    The live file is not written again if its filters have not changed since it was last compiled.
+
     Parameters
     ----------
     file_name : str
         The name of the file to compile.
     package_name : str
         The name of the package that the file is in.
-    system : str
-        The version string for the system, same format as filter names.
+    system : str or list of str
+        The version string for the system, same format as filter names, or a list of them.
+    force : bool, optional
+        Compile the file even if it is up to date. Defaults to False.
+    context : :obj:`ModRCContext`, optional
+        The context to resolve ModRC paths with. The shared context is used if None.
+    compile_manifest : dict, optional
+        An already loaded compile manifest to check and record the file in, so compiling many files
+        reads and writes it once. The caller saves it. The manifest is loaded and saved if None.
+    loaded_index : dict, optional
+        An already loaded package index to look the filters up in. The index is loaded if None.
 
     Returns
     -------
-    :obj:`Path`
-        Returns the path to the live file.
+    :obj:`CompileResult`
+        The path to the live file and whether it was compiled or was already up to date.
 
     Raises
     ------
@@ -135,36 +153,43 @@ def compile_file(file_name, package_name, system):
         Raised if the file or package could not be found.
     ModRCFilterDoesNotExistError
         Raised if no filters exist for the file being compiled.
+    ModRCChunkDoesNotExistError
+        Raised if an included chunk does not exist.
+    ModRCChunkCycleError
+        Raised if chunks include each other in a cycle.
+    ModRCTemplateError
+        Raised if a template variable does not exist.
     """
-    # try to get the file
-    file_dir = get_file(file_name, package_name)
-    # check for filters
-    if not os.listdir(str(file_dir)):
+    context = helper.get_context(context)
+    # get the filters of the file from the index
+    if loaded_index is None:
+        loaded_index = index.load_index(context)
+    filter_names = index.get_filters(loaded_index, file_name, package_name, context)
+    if not filter_names:
         raise exceptions.ModRCFilterDoesNotExistError('No filters exist in the file')
-    # create the compiled file
-    compiled_file = helper.get_live_dir().joinpath(file_name)
-    if compiled_file.exists():
-        compiled_file.unlink()
-    compiled_file.touch()
-    # iterate over all file filters and write their contents to the compiled file
-    for file_filter in file_dir.iterdir():
-        # skip files that do not match part of the system string
-        if str(file_filter.name) != 'global' and system.find(str(file_filter.name)) != 0:
-            continue
-        # concatenate the filter to the end of the compiled file
-        with open(str(compiled_file), 'a') as cf, open(str(file_filter), 'r') as ff:
-            for line in ff.readlines():
-                cf.write(line)
-    # return the path to the compiled file
-    return compiled_file
-
-def get_live_file(file_name):
+    file_dir = context.packages_dir.joinpath(package_name, 'files', file_name)
+    file_filters = {filter_name: str(file_dir.joinpath(filter_name)) for filter_name in filter_names}
+    # concatenate the filters that match the system into the compiled file
+    filter_paths = compiler.select_filter_paths(file_filters, system)
+    save = compile_manifest is None
+    if save:
+        compile_manifest = manifest.load_manifest(context.modrc_dir)
+    resolver = chunk.get_resolver(context)
+    result = compiler.compile_live_file(compile_manifest, package_name, file_name, filter_paths,
+                                        context.live_dir, force, resolver, template.Renderer(context, blobs=resolver.blobs))
+    if save:
+        manifest.save_manifest(context.modrc_dir, compile_manifest)
+    return result
+
+def get_live_file(file_name, context=None):
     """Retrieve a live file.
 
     Parameters
     ----------
     file_name : str
         The name of the live file to retrieve.
+    context : :obj:`ModRCContext`, optional
+        The context to resolve ModRC paths with. The shared context is used if None.
 
     Returns
     -------
@@ -179,7 +204,7 @@ def get_live_file(file_name):
         Raised if the file or package could not be found.
     """
     # try and get the live file
-    live_file = helper.get_live_dir().joinpath(file_name)
+    live_file = helper.get_context(context).live_dir.joinpath(file_name)
     if not live_file.is_file():
         raise exceptions.ModRCLiveFileDoesNotExistError('Live file does not exist')
     return live_file
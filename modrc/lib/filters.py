@@ -0,0 +1,106 @@
+import functools
+import re
+
+
+# every valid filter name: global, macOS versions, Linux distros and versions, and MAC addresses
+FILTER_NAME_PATTERN = re.compile(
+    r'global'
+    r'|macos(\.10(\.[0-9]+){0,2})?'
+    r'|linux(\.[a-z]+(\.[0-9]+)*)?'
+    r'|[0-9a-f]{12}'
+)
+
+
+def valid_filter_name(filter_name):
+    """Validate a filter name.
+
+    Parameters
+    ----------
+    filter_name
+        The filter name to validate.
+
+    Returns
+    -------
+    bool
+        Return True if the name is valid, False if invalid.
+    """
+    return FILTER_NAME_PATTERN.fullmatch(filter_name) is not None
+
+@functools.lru_cache(maxsize=256)
+def build_trie(filter_names):
+    """Build a prefix trie of filter names split on their dotted segments.
+
+    Tries are cached since most files in a package share the same set of filter names.
+
+    Parameters
+    ----------
+    filter_names : frozenset of str
+        The filter names to build the trie from.
+
+    Returns
+    -------
+    dict
+        The root node of the trie. Each node maps a segment to its child node, and maps None to the
+        filter name ending at that node. The global filter ends at the root node.
+    """
+    root = {}
+    for filter_name in filter_names:
+        node = root
+        if filter_name != 'global':
+            for segment in filter_name.split('.'):
+                node = node.setdefault(segment, {})
+        node[None] = filter_name
+    return root
+
+def match_trie(trie, system):
+    """Find the filters in a trie that apply to a system with a single walk down the system segments.
+
+    Parameters
+    ----------
+    trie : dict
+        The root node of a filter name trie.
+    system : str
+        The version string for the system, same format as filter names.
+
+    Returns
+    -------
+    list of str
+        The names of the filters that apply to the system, from least to most specific.
+    """
+    node = trie
+    matched = [node[None]] if None in node else []
+    for segment in system.split('.'):
+        node = node.get(segment)
+        if node is None:
+            break
+        if None in node:
+            matched.append(node[None])
+    return matched
+
+def select_filters(filter_names, system):
+    """Select the filters that apply to a system in the order they are compiled.
+
+    A filter applies if it is global or if its segments are a prefix of the system segments.
+
+    Parameters
+    ----------
+    filter_names : iterable of str
+        The names of the filters to select from.
+    system : str or list of str
+        The version string for the system, same format as filter names. A list of strings selects the
+        filters for each of them, such as a system version string followed by its MAC address.
+
+    Returns
+    -------
+    list of str
+        The names of the filters that apply to the system, from least to most specific.
+    """
+    trie = build_trie(frozenset(filter_names))
+    if isinstance(system, str):
+        return match_trie(trie, system)
+    selected = []
+    for system_string in system:
+        for name in match_trie(trie, system_string):
+            if name not in selected:
+                selected.append(name)
+    return selected
@@ -1,9 +1,97 @@
+import os
 import pathlib
-import re
+import threading
 
 from modrc import exceptions
+from modrc.lib import filters
 
 
+class ModRCContext:
+    """Resolves and validates the ModRC directory layout once and hands out the cached paths.
+
+    Paths are only cached once they have been validated, so a missing installation is checked again on
+    the next lookup. Call :meth:`invalidate` after changing the layout, such as in setup or teardown.
+    """
+
+    def __init__(self):
+        self._paths = {}
+
+    def invalidate(self):
+        """Forget every cached path so the layout is resolved and validated again."""
+        self._paths.clear()
+
+    def _get(self, name, resolve):
+        try:
+            return self._paths[name]
+        except KeyError:
+            path = self._paths[name] = resolve()
+            return path
+
+    @property
+    def path(self):
+        """:obj:`Path`: The path to the ModRC directory, which may not exist."""
+        return self._get('path', lambda: pathlib.Path('~/.modrc').expanduser())
+
+    @property
+    def modrc_dir(self):
+        """:obj:`Path`: The validated path to the ModRC directory."""
+        def resolve():
+            verify_modrc_dir()
+            return self.path
+        return self._get('modrc_dir', resolve)
+
+    @property
+    def modrc_file(self):
+        """:obj:`Path`: The validated path to the ModRC file."""
+        return self._get('modrc_file', lambda: self._child('modrc.yml', 'is_file', 'Not a valid ModRC directory'))
+
+    @property
+    def packages_dir(self):
+        """:obj:`Path`: The validated path to the packages directory."""
+        return self._get('packages_dir', lambda: self._child('packages', 'is_dir', 'Packages directory does not exist'))
+
+    @property
+    def live_dir(self):
+        """:obj:`Path`: The validated path to the live directory."""
+        return self._get('live_dir', lambda: self._child('live', 'is_dir', 'Live directory does not exist'))
+
+    def warm(self):
+        """Resolve and validate every path up front, so later lookups are served from the cache.
+
+        Raises
+        ------
+        ModRCIntegrityError
+            Raised if ModRC is not installed properly.
+        """
+        for name in ('modrc_dir', 'modrc_file', 'packages_dir', 'live_dir'):
+            getattr(self, name)
+
+    def _child(self, name, check, message):
+        child = self.modrc_dir.joinpath(name)
+        if not getattr(child, check)():
+            raise exceptions.ModRCIntegrityError(message)
+        return child
+
+
+# context shared by everything in this process that is not given its own context
+_context = ModRCContext()
+
+
+def get_context(context=None):
+    """Get the ModRC context to resolve paths with.
+
+    Parameters
+    ----------
+    context : :obj:`ModRCContext`, optional
+        The context to use. The context shared by the process is used if None.
+
+    Returns
+    -------
+    :obj:`ModRCContext`
+        The given context or the shared context.
+    """
+    return _context if context is None else context
+
 def verify_modrc_dir():
     """Verify that the ModRC directory exist and is valid.
 
@@ -115,16 +203,42 @@ def valid_filter_name(filter_name):
     bool
         Return True if the name is valid, False if invalid.
     """
-    # explicit matching
-    if filter_name == 'global':
-        return True
-    # macos matching
-    if re.fullmatch(r'macos(\.10(\.[0-9]+){0,2})?', filter_name):
-        return True
-    # linux matching
-    if re.fullmatch(r'linux(\.[a-z]+(\.[0-9]+)*)?', filter_name):
-        return True
-    # MAC address matching
-    if re.fullmatch(r'[0-9a-f]{12}', filter_name):
-        return True
-    return False
+    return filters.valid_filter_name(filter_name)
+
+def get_temp_file(path):
+    """Get a temporary path next to a file to write its new contents to before swapping them in.
+
+    The name is unique to the process and thread, so concurrent writers of the same file never share
+    a temporary file.
+
+    Parameters
+    ----------
+    path : :obj:`Path`
+        The path to the file.
+
+    Returns
+    -------
+    :obj:`Path`
+        The path to the temporary file.
+    """
+    return path.with_name('{}.{}-{}.tmp'.format(path.name, os.getpid(), threading.get_ident()))
+
+def write_atomic(path, data):
+    """Atomically replace the contents of a file.
+
+    Parameters
+    ----------
+    path : :obj:`Path`
+        The path to the file.
+    data : str or bytes
+        The new contents.
+    """
+    temp_file = get_temp_file(path)
+    try:
+        with open(str(temp_file), 'wb' if isinstance(data, bytes) else 'w') as tf:
+            tf.write(data)
+        os.replace(str(temp_file), str(path))
+    except BaseException:
+        if temp_file.exists():
+            temp_file.unlink()
+        raise
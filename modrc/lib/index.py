@@ -0,0 +1,355 @@
+import json
+import os
+import time
+
+from modrc import exceptions
+from modrc.lib import helper
+
+
+INDEX_VERSION = 2
+# the stamp of a directory that does not exist
+MISSING = -1
+# directories changed this recently may change again without their mtime moving, so they are not trusted
+RACY_NS = 2 * 10 ** 9
+
+
+def get_index_file(modrc_dir):
+    """Get the path to the package index within the ModRC directory.
+
+    Parameters
+    ----------
+    modrc_dir : :obj:`Path`
+        The path to the ModRC directory.
+
+    Returns
+    -------
+    :obj:`Path`
+        The path to the index file.
+    """
+    return modrc_dir.joinpath('index.json')
+
+def get_stamp(path):
+    """Get the stamp of a directory, which changes whenever an entry is added to or removed from it.
+
+    Parameters
+    ----------
+    path : str
+        The path to the directory.
+
+    Returns
+    -------
+    int
+        The mtime of the directory in nanoseconds, or MISSING if it does not exist.
+    """
+    try:
+        return os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return MISSING
+
+def _scan_stamp(path):
+    # stamp a directory before it is listed, so an entry added while listing makes the stamp stale
+    stamp = get_stamp(path)
+    if stamp != MISSING and time.time() * 10 ** 9 - stamp < RACY_NS:
+        return None
+    return stamp
+
+def scan_filters(file_dir):
+    """List the filters of a file.
+
+    Parameters
+    ----------
+    file_dir : str
+        The path to the file directory.
+
+    Returns
+    -------
+    dict
+        The stamp of the file directory and the sorted names of its filters. The stamp is None if the
+        directory changed too recently to be trusted.
+    """
+    stamp = _scan_stamp(file_dir)
+    filter_names = sorted(entry.name for entry in os.scandir(file_dir) if entry.is_file())
+    return {'stamp': stamp, 'filters': filter_names}
+
+def scan_files(package_dir):
+    """List the filters of every file in a package.
+
+    Parameters
+    ----------
+    package_dir : str
+        The path to the package directory.
+
+    Returns
+    -------
+    dict
+        The stamp of the files directory of the package and the filters of each file.
+    """
+    files_dir = os.path.join(package_dir, 'files')
+    stamp = _scan_stamp(files_dir)
+    try:
+        file_entries = list(os.scandir(files_dir))
+    except FileNotFoundError:
+        return {'stamp': MISSING, 'files': {}}
+    files = {entry.name: scan_filters(entry.path) for entry in file_entries if entry.is_dir()}
+    return {'stamp': stamp, 'files': files}
+
+def _list_package_names(packages_dir):
+    return [entry.name for entry in os.scandir(str(packages_dir)) if entry.is_dir()]
+
+def build_index(packages_dir):
+    """Build the index by walking the packages directory.
+
+    Parameters
+    ----------
+    packages_dir : :obj:`Path`
+        The path to the packages directory.
+
+    Returns
+    -------
+    dict
+        The index, mapping each package name to its files and each file name to the names of its filters,
+        along with the stamps of the directories they were listed from.
+    """
+    stamp = _scan_stamp(str(packages_dir))
+    packages = {
+        package_name: scan_files(str(packages_dir.joinpath(package_name)))
+        for package_name in _list_package_names(packages_dir)
+    }
+    return {'version': INDEX_VERSION, 'stamp': stamp, 'packages': packages}
+
+def save_index(modrc_dir, index):
+    """Atomically write the index.
+
+    Parameters
+    ----------
+    modrc_dir : :obj:`Path`
+        The path to the ModRC directory.
+    index : dict
+        The index to save.
+    """
+    helper.write_atomic(get_index_file(modrc_dir), json.dumps(index, separators=(',', ':'), sort_keys=True))
+
+def rebuild_index(context=None):
+    """Rebuild the index from the packages directory and save it.
+
+    Parameters
+    ----------
+    context : :obj:`ModRCContext`, optional
+        The context to resolve ModRC paths with. The shared context is used if None.
+
+    Returns
+    -------
+    dict
+        The rebuilt index.
+
+    Raises
+    ------
+    ModRCIntegrityError
+        Raised if ModRC is not installed properly.
+    """
+    context = helper.get_context(context)
+    index = build_index(context.packages_dir)
+    save_index(context.modrc_dir, index)
+    return index
+
+def load_index(context=None):
+    """Load the index with a single read.
+
+    The index is rebuilt if it does not exist or cannot be read. If packages were added or removed since
+    the index was saved, only the packages directory is listed again, and the entries of the packages
+    that are left are kept until they are read.
+
+    Parameters
+    ----------
+    context : :obj:`ModRCContext`, optional
+        The context to resolve ModRC paths with. The shared context is used if None.
+
+    Returns
+    -------
+    dict
+        The index.
+
+    Raises
+    ------
+    ModRCIntegrityError
+        Raised if ModRC is not installed properly.
+    """
+    context = helper.get_context(context)
+    try:
+        with open(str(get_index_file(context.modrc_dir)), 'r') as xf:
+            index = json.load(xf)
+    except (OSError, ValueError):
+        index = None
+    if not isinstance(index, dict) or index.get('version') != INDEX_VERSION:
+        return rebuild_index(context)
+    packages_dir = context.packages_dir
+    if index['stamp'] is None or index['stamp'] != get_stamp(str(packages_dir)):
+        index['stamp'] = _scan_stamp(str(packages_dir))
+        packages = index['packages']
+        index['packages'] = {
+            package_name: packages.get(package_name) or scan_files(str(packages_dir.joinpath(package_name)))
+            for package_name in _list_package_names(packages_dir)
+        }
+        save_index(context.modrc_dir, index)
+    return index
+
+def _package_is_current(package_dir, package_entry):
+    # a package entry is current if no file or filter was added to or removed from the package since it was listed
+    files_dir = os.path.join(package_dir, 'files')
+    if package_entry['stamp'] is None or package_entry['stamp'] != get_stamp(files_dir):
+        return False
+    return all(
+        file_entry['stamp'] is not None and file_entry['stamp'] == get_stamp(os.path.join(files_dir, file_name))
+        for file_name, file_entry in package_entry['files'].items()
+    )
+
+def add_package(package_name, context=None):
+    """Add a package and everything in it to the index.
+
+    Parameters
+    ----------
+    package_name : str
+        The name of the package to add.
+    context : :obj:`ModRCContext`, optional
+        The context to resolve ModRC paths with. The shared context is used if None.
+    """
+    context = helper.get_context(context)
+    index = load_index(context)
+    package_dir = context.packages_dir.joinpath(package_name)
+    index['packages'][package_name] = scan_files(str(package_dir))
+    save_index(context.modrc_dir, index)
+
+def add_file(file_name, package_name, context=None):
+    """Add a file and its filters to the index.
+
+    The other files of the package are listed again too, since adding the file changed the stamp of the
+    files directory.
+
+    Parameters
+    ----------
+    file_name : str
+        The name of the file to add.
+    package_name : str
+        The name of the package that the file is in.
+    context : :obj:`ModRCContext`, optional
+        The context to resolve ModRC paths with. The shared context is used if None.
+    """
+    add_package(package_name, context)
+
+def add_filter(filter_name, file_name, package_name, context=None):
+    """Add a filter to the index.
+
+    Parameters
+    ----------
+    filter_name : str
+        The name of the filter to add.
+    file_name : str
+        The name of the file that the filter is for.
+    package_name : str
+        The name of the package that the file is in.
+    context : :obj:`ModRCContext`, optional
+        The context to resolve ModRC paths with. The shared context is used if None.
+    """
+    context = helper.get_context(context)
+    index = load_index(context)
+    file_dir = context.packages_dir.joinpath(package_name, 'files', file_name)
+    package_entry = index['packages'].setdefault(package_name, {'stamp': None, 'files': {}})
+    package_entry['files'][file_name] = scan_filters(str(file_dir))
+    save_index(context.modrc_dir, index)
+
+def list_packages(index):
+    """List the names of every package in the index.
+
+    Parameters
+    ----------
+    index : dict
+        The loaded index.
+
+    Returns
+    -------
+    list of str
+        The sorted package names.
+    """
+    return sorted(index['packages'])
+
+def get_files(index, package_name, context=None):
+    """Get the filters of every file in a package from the index.
+
+    The package is listed again and the index saved if a file or filter was added to or removed from the
+    package since it was indexed. Checking the package takes a stat of each of its directories rather
+    than a listing of them.
+
+    Parameters
+    ----------
+    index : dict
+        The loaded index.
+    package_name : str
+        The name of the package.
+    context : :obj:`ModRCContext`, optional
+        The context to resolve ModRC paths with. The shared context is used if None.
+
+    Returns
+    -------
+    dict
+        Maps each file name to the sorted names of its filters.
+
+    Raises
+    ------
+    ModRCIntegrityError
+        Raised if ModRC is not installed properly.
+    ModRCPackageDoesNotExistError
+        Raised if the package does not exist.
+    """
+    context = helper.get_context(context)
+    package_dir = str(context.packages_dir.joinpath(package_name))
+    package_entry = index['packages'].get(package_name)
+    if package_entry is None or not _package_is_current(package_dir, package_entry):
+        if not os.path.isdir(package_dir):
+            raise exceptions.ModRCPackageDoesNotExistError('Package does not exist')
+        package_entry = index['packages'][package_name] = scan_files(package_dir)
+        save_index(context.modrc_dir, index)
+    return {file_name: file_entry['filters'] for file_name, file_entry in package_entry['files'].items()}
+
+def get_filters(index, file_name, package_name, context=None):
+    """Get the filters of a file from the index.
+
+    The file is listed again and the index saved if a filter was added to or removed from it since it was
+    indexed.
+
+    Parameters
+    ----------
+    index : dict
+        The loaded index.
+    file_name : str
+        The name of the file.
+    package_name : str
+        The name of the package that the file is in.
+    context : :obj:`ModRCContext`, optional
+        The context to resolve ModRC paths with. The shared context is used if None.
+
+    Returns
+    -------
+    list of str
+        The sorted filter names.
+
+    Raises
+    ------
+    ModRCIntegrityError
+        Raised if ModRC is not installed properly.
+    ModRCPackageDoesNotExistError
+        Raised if the package does not exist.
+    ModRCFileDoesNotExistError
+        Raised if the file does not exist.
+    """
+    context = helper.get_context(context)
+    file_dir = str(context.packages_dir.joinpath(package_name, 'files', file_name))
+    file_entry = index['packages'].get(package_name, {'files': {}})['files'].get(file_name)
+    if file_entry is None or file_entry['stamp'] is None or file_entry['stamp'] != get_stamp(file_dir):
+        if not os.path.isdir(file_dir):
+            if not context.packages_dir.joinpath(package_name).is_dir():
+                raise exceptions.ModRCPackageDoesNotExistError('Package does not exist')
+            raise exceptions.ModRCFileDoesNotExistError('File does not exist')
+        file_entry = scan_filters(file_dir)
+        index['packages'].setdefault(package_name, {'stamp': None, 'files': {}})['files'][file_name] = file_entry
+        save_index(context.modrc_dir, index)
+    return file_entry['filters']
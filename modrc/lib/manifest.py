@@ -0,0 +1,217 @@
+import hashlib
+import json
+import os
+import time
+
+from modrc.lib import helper
+
+
+MANIFEST_VERSION = 1
+# filters modified this close to being recorded are always hashed on the next check
+RACY_SECONDS = 2
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def get_manifest_file(modrc_dir):
+    """Get the path to the compile manifest within the ModRC directory.
+
+    Parameters
+    ----------
+    modrc_dir : :obj:`Path`
+        The path to the ModRC directory.
+
+    Returns
+    -------
+    :obj:`Path`
+        The path to the manifest file.
+    """
+    return modrc_dir.joinpath('manifest.json')
+
+def load_manifest(modrc_dir):
+    """Load the compile manifest.
+
+    Parameters
+    ----------
+    modrc_dir : :obj:`Path`
+        The path to the ModRC directory.
+
+    Returns
+    -------
+    dict
+        The manifest, or an empty manifest if it does not exist or cannot be read.
+    """
+    try:
+        with open(str(get_manifest_file(modrc_dir)), 'r') as mf:
+            manifest = json.load(mf)
+    except (OSError, ValueError):
+        manifest = None
+    if not isinstance(manifest, dict) or manifest.get('version') != MANIFEST_VERSION:
+        manifest = {'version': MANIFEST_VERSION, 'files': {}}
+    manifest['dirty'] = False
+    return manifest
+
+def save_manifest(modrc_dir, manifest):
+    """Atomically write the compile manifest if it has changed since it was loaded.
+
+    Parameters
+    ----------
+    modrc_dir : :obj:`Path`
+        The path to the ModRC directory.
+    manifest : dict
+        The manifest to save.
+
+    Returns
+    -------
+    bool
+        Return True if the manifest was written, False if it was unchanged.
+    """
+    if not manifest.pop('dirty', False):
+        manifest['dirty'] = False
+        return False
+    # encode in one call, json.dump encodes piece by piece in pure Python
+    helper.write_atomic(get_manifest_file(modrc_dir), json.dumps(manifest, separators=(',', ':')))
+    manifest['dirty'] = False
+    return True
+
+def hash_file(path):
+    """Hash the contents of a file.
+
+    Parameters
+    ----------
+    path : str
+        The path to the file to hash.
+
+    Returns
+    -------
+    str
+        The hex SHA-256 digest of the file.
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def is_up_to_date(manifest, file_name, filter_paths, live_file):
+    """Check if a live file was produced from the same filters as it would be now.
+
+    Filters and included chunks whose size and mtime match the manifest are trusted without being read.
+    Those whose mtime changed are hashed, and only a changed hash makes the live file out of date.
+
+    Parameters
+    ----------
+    manifest : dict
+        The loaded manifest.
+    file_name : str
+        The name of the live file.
+    filter_paths : list of str
+        The paths to the filters that would be compiled, in order.
+    live_file : :obj:`Path`
+        The path to the live file.
+
+    Returns
+    -------
+    bool
+        Return True if the live file does not need to be compiled again.
+    """
+    entry = manifest['files'].get(file_name)
+    if entry is None or [f['path'] for f in entry['filters']] != filter_paths:
+        return False
+    # the live file must not have been changed or removed since it was compiled
+    try:
+        live_stat = os.stat(str(live_file))
+    except FileNotFoundError:
+        return False
+    if [live_stat.st_size, live_stat.st_mtime_ns] != entry['live']:
+        return False
+    # compare every filter and included chunk to the state that produced the live file
+    for recorded in entry['filters'] + entry.get('chunks', []):
+        try:
+            filter_stat = os.stat(recorded['path'])
+        except FileNotFoundError:
+            return False
+        if filter_stat.st_size != recorded['size']:
+            return False
+        if filter_stat.st_mtime_ns == recorded['mtime']:
+            continue
+        if hash_file(recorded['path']) != recorded['hash']:
+            return False
+        # the content is unchanged, remember the new mtime to skip hashing next time
+        mtime = _trusted_mtime(filter_stat)
+        if mtime is not None:
+            recorded['mtime'] = mtime
+            manifest['dirty'] = True
+    return True
+
+def get_state(path, data=None, path_stat=None):
+    """Get the state of a filter or chunk as it is recorded in the manifest.
+
+    Parameters
+    ----------
+    path : str
+        The path to the filter or chunk.
+    data : bytes, optional
+        The contents of the file if they were already read, so it is not read again.
+    path_stat : :obj:`stat_result`, optional
+        The stat of the file the contents were read from. Required if data is given.
+
+    Returns
+    -------
+    dict
+        The path, size, mtime and hash of the file.
+    """
+    if data is None:
+        path_stat = os.stat(path)
+        digest = hash_file(path)
+    else:
+        digest = hashlib.sha256(data).hexdigest()
+    return {
+        'path': path,
+        'size': path_stat.st_size,
+        'mtime': _trusted_mtime(path_stat),
+        'hash': digest
+    }
+
+def record(manifest, file_name, package_name, filter_paths, live_file, chunk_states=(), variables=None,
+           newlines=False):
+    """Record the filters that produced a live file.
+
+    Parameters
+    ----------
+    manifest : dict
+        The loaded manifest.
+    file_name : str
+        The name of the live file.
+    package_name : str
+        The name of the package the file is in.
+    filter_paths : list of str
+        The paths to the filters that were compiled, in order.
+    live_file : :obj:`Path`
+        The path to the live file.
+    chunk_states : list of dict, optional
+        The states of the chunks included by the filters, as returned by get_state. Defaults to none.
+    variables : dict, optional
+        The state of the template variables the filters were rendered with. Defaults to None if the filters
+        are not templates.
+    newlines : bool, optional
+        Whether a newline was added after filters that do not end with one. Defaults to False.
+    """
+    live_stat = os.stat(str(live_file))
+    entry = manifest['files'][file_name] = {
+        'package': package_name,
+        'filters': [get_state(filter_path) for filter_path in filter_paths],
+        'live': [live_stat.st_size, live_stat.st_mtime_ns]
+    }
+    if chunk_states:
+        entry['chunks'] = [dict(state) for state in chunk_states]
+    if variables is not None:
+        entry['variables'] = variables
+    if newlines:
+        entry['newlines'] = True
+    manifest['dirty'] = True
+
+def _trusted_mtime(stat_result):
+    # a file modified within the mtime granularity could change again without its mtime changing
+    if time.time() - stat_result.st_mtime < RACY_SECONDS:
+        return None
+    return stat_result.st_mtime_ns
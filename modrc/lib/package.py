@@ -1,10 +1,8 @@
-import yaml
-
 from modrc import exceptions
-from modrc.lib import helper
+from modrc.lib import config, helper, index
 
 
-def create_package(package_name, repo_url=None):
+def create_package(package_name, repo_url=None, context=None):
     """Create a new ModRC package.
 
     Parameters
@@ -13,6 +11,8 @@ def create_package(package_name, repo_url=None):
         The name of the new package.
     repo_url : str
         The URL of the packages repository.
+    context : :obj:`ModRCContext`, optional
+        The context to resolve ModRC paths with. The shared context is used if None.
 
     Returns
     -------
@@ -25,7 +25,7 @@ def create_package(package_name, repo_url=None):
         Raised if either the ModRC or packages directory do not exist.
     """
     # get the packges directory
-    packages_dir = helper.get_packages_dir()
+    packages_dir = helper.get_context(context).packages_dir
     # define the package directories and files
     new_package_dir = packages_dir.joinpath(package_name)
     new_package_yml = new_package_dir.joinpath('package.yml')
@@ -33,25 +33,19 @@ def create_package(package_name, repo_url=None):
     new_package_dir.mkdir()
     new_package_yml.touch()
     # add the repo url to package.yml if it was passed into the method
-    if repo_url is not None:
-        package_file = new_package_dir.joinpath('package.yml')
-        with open(str(package_file), 'r') as yf:
-            package_yaml = yaml.safe_load(yf)
-            if package_yaml is None:
-                package_yaml = {}
-        package_yaml['repourl'] = repo_url
-        # write to the package.yml
-        with open(str(package_file), 'w') as yf:
-            yaml.safe_dump(package_yaml, yf, default_flow_style=False)
+    config.update_config(new_package_yml, {'repourl': repo_url})
+    index.add_package(package_name, context)
     return new_package_dir
 
-def get_package(package_name):
+def get_package(package_name, context=None):
     """Get a package by name.
 
     Parameters
     ----------
     package_name : str
         The name of the package to get.
+    context : :obj:`ModRCContext`, optional
+        The context to resolve ModRC paths with. The shared context is used if None.
 
     Returns
     -------
@@ -65,19 +59,21 @@ def get_package(package_name):
     ModRCPackageDoesNotExistError
         Raised if the package does not exist.
     """
-    packages_dir = helper.get_packages_dir()
+    packages_dir = helper.get_context(context).packages_dir
     new_package_dir = packages_dir.joinpath(package_name)
     if not new_package_dir.is_dir():
         raise exceptions.ModRCPackageDoesNotExistError('Package does not exist')
     return new_package_dir
 
-def get_package_file(package_name):
+def get_package_file(package_name, context=None):
     """Get a package.yml file by package name.
 
     Parameters
     ----------
     package_name : str
         The name of the package to the package.yml file from.
+    context : :obj:`ModRCContext`, optional
+        The context to resolve ModRC paths with. The shared context is used if None.
 
     Returns
     -------
@@ -91,8 +87,52 @@ def get_package_file(package_name):
     ModRCPackageDoesNotExistError
         Raised if the package or package.yml file does not exist.
     """
-    package_dir = get_package(package_name)
+    package_dir = get_package(package_name, context)
     package_file = package_dir.joinpath('package.yml')
     if not package_file.is_file():
         raise exceptions.ModRCPackageDoesNotExistError
     return package_file
+
+def load_package_config(package_name, context=None):
+    """Load the config of a package from its package.yml file.
+
+    Parameters
+    ----------
+    package_name : str
+        The name of the package to load the config of.
+    context : :obj:`ModRCContext`, optional
+        The context to resolve ModRC paths with. The shared context is used if None.
+
+    Returns
+    -------
+    dict
+        A copy of the package config.
+
+    Raises
+    ------
+    ModRCIntegrityError
+        Raised if the packages directory does not exist.
+    ModRCPackageDoesNotExistError
+        Raised if the package or package.yml file does not exist.
+    """
+    return config.load_config(get_package_file(package_name, context))
+
+def list_packages(context=None):
+    """List the names of all installed packages.
+
+    Parameters
+    ----------
+    context : :obj:`ModRCContext`, optional
+        The context to resolve ModRC paths with. The shared context is used if None.
+
+    Returns
+    -------
+    list of str
+        The sorted names of every package in the packages directory, read from the package index.
+
+    Raises
+    ------
+    ModRCIntegrityError
+        Raised if the packages directory does not exist.
+    """
+    return index.list_packages(index.load_index(context))
@@ -0,0 +1,276 @@
+import builtins
+import collections
+import contextlib
+import functools
+import importlib
+import io
+import json
+import os
+import threading
+import time
+
+
+# the functions timed as each phase, patched in only while a profile is running
+PHASES = [
+    ('resolve', 'modrc.lib.helper', 'ModRCContext._get'),
+    ('resolve', 'modrc.lib.helper', 'verify_modrc_dir'),
+    ('resolve', 'modrc.lib.helper', 'get_modrc_dir'),
+    ('resolve', 'modrc.lib.helper', 'get_packages_dir'),
+    ('resolve', 'modrc.lib.helper', 'get_live_dir'),
+    ('load config', 'modrc.lib.config', 'load_config'),
+    ('select filters', 'modrc.lib.filters', 'select_filters'),
+    ('read', 'modrc.lib.index', 'load_index'),
+    ('read', 'modrc.lib.compiler', 'scan_package'),
+    ('read', 'modrc.lib.compiler', 'hash_filters'),
+    ('read', 'modrc.lib.manifest', 'load_manifest'),
+    ('read', 'modrc.lib.manifest', 'hash_file'),
+    ('write', 'modrc.lib.compiler', 'write_live_file'),
+    ('write', 'modrc.lib.manifest', 'save_manifest'),
+    ('write', 'modrc.lib.config', 'save_config'),
+    ('write', 'modrc.lib.bootstrap', 'update_bootstrap')
+]
+# the filesystem calls that are counted
+FS_CALLS = [
+    'stat', 'lstat', 'scandir', 'listdir', 'open', 'mkdir', 'rmdir', 'unlink', 'rename', 'replace', 'symlink',
+    'readlink', 'utime', 'read', 'write', 'sendfile', 'copy_file_range'
+]
+# the filesystem calls that return the number of bytes they moved
+FS_BYTES = {'read': 'read', 'write': 'written', 'sendfile': 'written', 'copy_file_range': 'written'}
+
+Span = collections.namedtuple('Span', ['name', 'detail', 'thread', 'start', 'seconds'])
+
+
+class _CountingFile:
+    """Wraps a file object opened while profiling to count the bytes read and written through it."""
+
+    def __init__(self, profiler, file_obj):
+        self._profiler = profiler
+        self._file = file_obj
+
+    def __getattr__(self, name):
+        return getattr(self._file, name)
+
+    def __enter__(self):
+        self._file.__enter__()
+        return self
+
+    def __exit__(self, *exc_info):
+        return self._file.__exit__(*exc_info)
+
+    def __iter__(self):
+        for line in self._file:
+            self._profiler.add_bytes('read', len(line))
+            yield line
+
+    def read(self, *args):
+        data = self._file.read(*args)
+        self._profiler.add_bytes('read', len(data))
+        return data
+
+    def readline(self, *args):
+        line = self._file.readline(*args)
+        self._profiler.add_bytes('read', len(line))
+        return line
+
+    def readinto(self, buffer):
+        count = self._file.readinto(buffer)
+        self._profiler.add_bytes('read', count or 0)
+        return count
+
+    def write(self, data):
+        count = self._file.write(data)
+        self._profiler.add_bytes('written', count or 0)
+        return count
+
+
+class Profiler:
+    """Records how long each phase of a command takes and counts its filesystem calls and bytes moved.
+
+    Nothing is instrumented until :meth:`start` patches timing wrappers around the functions of every
+    phase and the filesystem calls, and :meth:`stop` puts the originals back, so ModRC runs with no
+    overhead when it is not being profiled. A phase entered again while it is running, such as a path
+    lookup resolving its parent, is only timed once.
+    """
+
+    def __init__(self):
+        self.origin = time.perf_counter()
+        self.spans = []
+        self.calls = collections.Counter()
+        self.bytes = {'read': 0, 'written': 0}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._patches = []
+        self.seconds = None
+
+    def _running(self):
+        try:
+            return self._local.running
+        except AttributeError:
+            running = self._local.running = set()
+            return running
+
+    @contextlib.contextmanager
+    def span(self, name, detail=None):
+        """Time a block as a phase.
+
+        Parameters
+        ----------
+        name : str
+            The name of the phase.
+        detail : str, optional
+            What the block does within the phase.
+        """
+        running = self._running()
+        if name in running:
+            yield
+            return
+        running.add(name)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            running.discard(name)
+            with self._lock:
+                self.spans.append(Span(name, detail, threading.get_ident(), start, seconds))
+
+    def add_bytes(self, direction, count):
+        """Count bytes moved by a filesystem call.
+
+        Parameters
+        ----------
+        direction : str
+            Either read or written.
+        count : int
+            The number of bytes.
+        """
+        with self._lock:
+            self.bytes[direction] += count
+
+    def _count(self, name):
+        with self._lock:
+            self.calls[name] += 1
+
+    def _patch(self, owner, attribute, wrapper):
+        self._patches.append((owner, attribute, getattr(owner, attribute)))
+        setattr(owner, attribute, wrapper)
+
+    def _wrap_phase(self, phase, detail, func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with self.span(phase, detail):
+                return func(*args, **kwargs)
+        return wrapper
+
+    def _wrap_fs(self, name, func):
+        direction = FS_BYTES.get(name)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            self._count(name)
+            result = func(*args, **kwargs)
+            if direction is not None:
+                self.add_bytes(direction, len(result) if isinstance(result, bytes) else result)
+            return result
+        return wrapper
+
+    def _wrap_open(self, func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            self._count('open')
+            return _CountingFile(self, func(*args, **kwargs))
+        return wrapper
+
+    def start(self):
+        """Patch in the instrumentation. The instrumented modules are imported as part of the import phase."""
+        modules = {}
+        for phase, module_name, qualified_name in PHASES:
+            if module_name not in modules:
+                with self.span('import', module_name):
+                    modules[module_name] = importlib.import_module(module_name)
+            owner = modules[module_name]
+            *owner_path, attribute = qualified_name.split('.')
+            for name in owner_path:
+                owner = getattr(owner, name)
+            self._patch(owner, attribute, self._wrap_phase(phase, '{}.{}'.format(module_name, qualified_name),
+                                                           getattr(owner, attribute)))
+        for name in FS_CALLS:
+            if hasattr(os, name):
+                self._patch(os, name, self._wrap_fs(name, getattr(os, name)))
+        # os.open is counted above, file objects are counted as opens and wrapped to count their bytes
+        self._patch(builtins, 'open', self._wrap_open(builtins.open))
+        self._patch(io, 'open', self._wrap_open(io.open))
+
+    def stop(self):
+        """Put back every function patched by :meth:`start` and record the total time profiled."""
+        self.seconds = time.perf_counter() - self.origin
+        while self._patches:
+            owner, attribute, original = self._patches.pop()
+            setattr(owner, attribute, original)
+
+    def summary(self):
+        """Format the time spent in each phase, the filesystem calls and the bytes moved as a table.
+
+        Returns
+        -------
+        str
+            The summary table.
+        """
+        totals = collections.OrderedDict()
+        for span in sorted(self.spans, key=lambda span: span.start):
+            count, seconds = totals.get(span.name, (0, 0.0))
+            totals[span.name] = (count + 1, seconds + span.seconds)
+        lines = ['{:<16}{:>8}{:>12}'.format('phase', 'calls', 'ms')]
+        for name, (count, seconds) in totals.items():
+            lines.append('{:<16}{:>8}{:>12.3f}'.format(name, count, seconds * 1000))
+        if self.seconds is not None:
+            lines.append('{:<16}{:>8}{:>12.3f}'.format('total', '', self.seconds * 1000))
+        lines.append('')
+        lines.append('{:<16}{:>8}'.format('filesystem', 'calls'))
+        for name, count in sorted(self.calls.items()):
+            lines.append('{:<16}{:>8}'.format(name, count))
+        lines.append('')
+        lines.append('{:<16}{:>8}'.format('bytes read', self.bytes['read']))
+        lines.append('{:<16}{:>8}'.format('bytes written', self.bytes['written']))
+        return '\n'.join(lines)
+
+    def chrome_trace(self):
+        """Convert the phases and counts to the Chrome trace event format.
+
+        Returns
+        -------
+        dict
+            The trace, which can be loaded into chrome://tracing or Perfetto.
+        """
+        pid = os.getpid()
+        events = []
+        end = 0.0
+        for span in self.spans:
+            event = {
+                'name': span.name,
+                'cat': 'modrc',
+                'ph': 'X',
+                'ts': (span.start - self.origin) * 1e6,
+                'dur': span.seconds * 1e6,
+                'pid': pid,
+                'tid': span.thread
+            }
+            if span.detail is not None:
+                event['args'] = {'function': span.detail}
+            events.append(event)
+            end = max(end, event['ts'] + event['dur'])
+        events.append({'name': 'filesystem calls', 'ph': 'C', 'ts': end, 'pid': pid, 'args': dict(self.calls)})
+        events.append({'name': 'bytes', 'ph': 'C', 'ts': end, 'pid': pid, 'args': dict(self.bytes)})
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def write_trace(self, trace_file):
+        """Write the Chrome trace to a file.
+
+        Parameters
+        ----------
+        trace_file : str
+            The path to write the trace to.
+        """
+        with open(trace_file, 'w') as tf:
+            json.dump(self.chrome_trace(), tf)
+
@@ -0,0 +1,220 @@
+import contextlib
+import io
+import json
+import os
+import socket
+import socketserver
+import traceback
+
+import click
+
+from modrc import exceptions
+from modrc.lib import client, config, helper, system
+
+
+@contextlib.contextmanager
+def client_process(cwd=None, environ=None):
+    """Run a block in the working directory and environment of the client that sent a command.
+
+    Parameters
+    ----------
+    cwd : str, optional
+        The working directory of the client. The working directory of the server is kept if None.
+    environ : dict, optional
+        The environment of the client. The environment of the server is kept if None.
+    """
+    server_cwd = os.getcwd()
+    server_environ = dict(os.environ)
+    try:
+        if environ is not None:
+            os.environ.clear()
+            os.environ.update(environ)
+        if cwd is not None:
+            os.chdir(cwd)
+        yield
+    finally:
+        os.chdir(server_cwd)
+        os.environ.clear()
+        os.environ.update(server_environ)
+
+def handle_request(main, args, cwd=None, environ=None):
+    """Run a command in this process and capture its output.
+
+    Parameters
+    ----------
+    main : :obj:`click.Group`
+        The ModRC CLI.
+    args : list of str
+        The command line arguments of the command.
+    cwd : str, optional
+        The working directory of the client, which relative paths are resolved against. The working
+        directory of the server is used if None.
+    environ : dict, optional
+        The environment of the client, seen by templates and tracing. The environment of the server is
+        used if None.
+
+    Returns
+    -------
+    dict
+        The response with the keys exit_code, stdout and stderr.
+    """
+    stdout = io.StringIO()
+    stderr = io.StringIO()
+    with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+        try:
+            with client_process(cwd, environ):
+                result = main.main(args, prog_name='modrc', standalone_mode=False)
+            exit_code = result if isinstance(result, int) else 0
+        except SystemExit as error:
+            exit_code = error.code if isinstance(error.code, int) else int(error.code is not None)
+        except click.ClickException as error:
+            error.show()
+            exit_code = error.exit_code
+        except click.Abort:
+            click.echo('Aborted!', err=True)
+            exit_code = 1
+        except Exception:
+            # a failing command must not take the server down
+            traceback.print_exc()
+            exit_code = 1
+    return {'exit_code': exit_code, 'stdout': stdout.getvalue(), 'stderr': stderr.getvalue()}
+
+def _stat_stamp(path):
+    try:
+        return config.get_stamp(path)
+    except OSError:
+        return None
+
+def get_cache_stamp(context=None):
+    """Get a stamp of the files the caches warmed by the server are loaded from.
+
+    Parameters
+    ----------
+    context : :obj:`ModRCContext`, optional
+        The context to resolve ModRC paths with. The shared context is used if None.
+
+    Returns
+    -------
+    list
+        Where the ModRC directory is, the stamps of modrc.yml and system.json and the stamp of the
+        operating system release files.
+    """
+    context = helper.get_context(context)
+    modrc_path = context.path
+    return [
+        os.path.realpath(str(modrc_path)),
+        _stat_stamp(modrc_path.joinpath('modrc.yml')),
+        _stat_stamp(system.get_fingerprint_file(modrc_path)),
+        system.get_release_stamp()
+    ]
+
+
+class RequestHandler(socketserver.StreamRequestHandler):
+    """Runs one command per connection and writes back its response."""
+
+    def handle(self):
+        try:
+            request = json.loads(self.rfile.readline().decode())
+            args = [str(arg) for arg in request['args']]
+        except (ValueError, KeyError, TypeError):
+            return
+        cwd = request.get('cwd')
+        environ = request.get('environ')
+        if not args or args[0] not in client.FORWARDED_COMMANDS:
+            response = {'exit_code': 2, 'stdout': '', 'stderr': 'Command cannot be run by the server\n'}
+        elif not isinstance(cwd, (str, type(None))) or not isinstance(environ, (dict, type(None))):
+            response = {'exit_code': 2, 'stdout': '', 'stderr': 'Invalid request\n'}
+        else:
+            self.server.refresh()
+            environ = None if environ is None else {str(name): str(value) for name, value in environ.items()}
+            response = handle_request(self.server.main, args, cwd, environ)
+        self.wfile.write(json.dumps(response).encode())
+
+
+class ModRCServer(socketserver.UnixStreamServer):
+    """A server that runs ModRC commands with the configuration, paths and compile engine kept warm.
+
+    Commands are run one at a time since their output is captured by redirecting the standard streams,
+    each in the working directory and environment of its client. The warm caches are dropped before a
+    command if the ModRC layout, config, cached fingerprint or operating system changed since the last
+    one. The socket is removed when the server is closed.
+    """
+
+    def __init__(self, socket_file, main, context=None):
+        self.socket_file = socket_file
+        self.main = main
+        self.context = helper.get_context(context)
+        self.cache_stamp = get_cache_stamp(self.context)
+        super().__init__(socket_file, RequestHandler)
+
+    def refresh(self):
+        """Drop the warm caches if the files they were loaded from changed."""
+        cache_stamp = get_cache_stamp(self.context)
+        if cache_stamp != self.cache_stamp:
+            self.context.invalidate()
+            config.clear_cache()
+            system.clear_cache()
+            self.cache_stamp = cache_stamp
+
+    def server_close(self):
+        super().server_close()
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(self.socket_file)
+
+
+def is_running(socket_file):
+    """Check if a server is listening on a socket.
+
+    Parameters
+    ----------
+    socket_file : str
+        The path to the server socket.
+
+    Returns
+    -------
+    bool
+        Return True if a server accepted a connection on the socket.
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+        try:
+            probe.connect(socket_file)
+        except OSError:
+            return False
+    return True
+
+def create_server(context=None):
+    """Warm the caches used by commands and bind a server to the socket in the ModRC directory.
+
+    Parameters
+    ----------
+    context : :obj:`ModRCContext`, optional
+        The context to resolve ModRC paths with. The shared context is used if None.
+
+    Returns
+    -------
+    :obj:`ModRCServer`
+        The bound server.
+
+    Raises
+    ------
+    ModRCIntegrityError
+        Raised if ModRC is not installed properly.
+    ModRCServerRunningError
+        Raised if a server is already running.
+    """
+    # imported here since the CLI imports this module through the serve command
+    from modrc.__main__ import main
+    context = helper.get_context(context)
+    # resolve the layout, parse the config, detect the system and load the forwarded commands up front
+    context.warm()
+    config.load_modrc_config(context)
+    system.get_targets(context=context)
+    for cmd_name in sorted(client.FORWARDED_COMMANDS):
+        main.get_command(None, cmd_name)
+    # replace a socket left behind by a server that is no longer running
+    socket_file = client.get_socket_file()
+    if os.path.exists(socket_file):
+        if is_running(socket_file):
+            raise exceptions.ModRCServerRunningError('A ModRC server is already running')
+        os.unlink(socket_file)
+    return ModRCServer(socket_file, main, context)
@@ -1,18 +1,18 @@
-import pathlib
 import shutil
-import yaml
 
 from modrc import exceptions
-from modrc.lib import helper
+from modrc.lib import config, helper
 
 
-def initial_setup(symlink=None):
+def initial_setup(symlink=None, context=None):
     """The initial setup process for ModRC to create the ModRC directory and its file structure.
 
     Parameters
     ----------
     symlink : :obj:`Path` or None
         The path where actual ModRC files exist that should be symlinked to.
+    context : :obj:`ModRCContext`, optional
+        The context to resolve ModRC paths with. The shared context is used if None.
 
     Returns
     -------
@@ -25,7 +25,8 @@ def initial_setup(symlink=None):
         Raised if ModRC is already installed
     """
     # create the modrc directory
-    modrc_dir = pathlib.Path('~/.modrc').expanduser()
+    context = helper.get_context(context)
+    modrc_dir = context.path
     if modrc_dir.is_dir():
         raise exceptions.ModRCInstalledError('A ModRC directory is already here')
     if symlink is None:
@@ -39,10 +40,12 @@ def initial_setup(symlink=None):
     modrc_file.touch()
     packages_dir.mkdir()
     live_dir.mkdir()
+    # the layout changed so paths must be resolved again
+    context.invalidate()
     # symlink the ModRC directory if it is not in the user's home directory
     return modrc_dir
 
-def populate_modrc_file(default_package=None, editor=None, auto_compile=None, auto_sync=None):
+def populate_modrc_file(default_package=None, editor=None, auto_compile=None, auto_sync=None, context=None):
     """Populate the ModRC file with setup values.
 
     Parameters
@@ -55,41 +58,31 @@ def populate_modrc_file(default_package=None, editor=None, auto_compile=None, au
         Should changes to the default package be compiled automatically. Will not be modified if None.
     auto_sync : bool, optional
         Should changes to the default package be synced to the repo automatically. Will not be modified if None.
+    context : :obj:`ModRCContext`, optional
+        The context to resolve ModRC paths with. The shared context is used if None.
 
     Raises
     ------
     ModRCIntegrityError
         Raised if the ModRC directory or file do not exist.
     """
-    # open the ModRC file
-    modrc_file = helper.get_modrc_file()
-    with open(str(modrc_file), 'r') as yf:
-        modrc_yaml = yaml.safe_load(yf)
-        if modrc_yaml is None:
-            modrc_yaml = {}
-    # set the default package
-    if default_package is not None:
-        modrc_yaml['defaultpackage'] = default_package
-    # set the editor
-    if editor is not None:
-        modrc_yaml['editor'] = editor
-    # set auto compile
-    if auto_compile is not None:
-        modrc_yaml['autocompile'] = auto_compile
-    # set auto sync
-    if auto_sync is not None:
-        modrc_yaml['autosync'] = auto_sync
-    # write to the ModRC file
-    with open(str(modrc_file), 'w') as yf:
-        yaml.safe_dump(modrc_yaml, yf, default_flow_style=False)
+    # set every given setting with a single write to the ModRC file
+    config.update_config(helper.get_context(context).modrc_file, {
+        'defaultpackage': default_package,
+        'editor': editor,
+        'autocompile': auto_compile,
+        'autosync': auto_sync
+    })
 
-def teardown(ignore_errors=False):
+def teardown(ignore_errors=False, context=None):
     """The teardown process for ModRC to delete the ModRC directory and its file structure.
 
     Parameters
     ----------
     ignore_errors : bool, optional
         Ignore errors for teardown. Defaults to False.
+    context : :obj:`ModRCContext`, optional
+        The context to resolve ModRC paths with. The shared context is used if None.
 
     Returns
     -------
@@ -101,8 +94,11 @@ def teardown(ignore_errors=False):
     ModRCIntegrityError
         Raised if there is no ModRC directory to delete.
     """
-    # get the ModRC directory path
-    modrc_dir = pathlib.Path('~/.modrc').expanduser()
+    # get the ModRC directory path and forget the cached paths since the layout is changing
+    context = helper.get_context(context)
+    modrc_dir = context.path
+    context.invalidate()
+    config.clear_cache()
     # delete a symlink
     if modrc_dir.is_symlink():
         modrc_dir.unlink()
@@ -0,0 +1,271 @@
+import collections
+import errno
+import os
+import shutil
+import stat
+import threading
+
+from modrc import exceptions
+from modrc.lib import helper, manifest
+
+
+# objects are read only so an editor cannot change every filter linked to one by writing in place
+OBJECT_MODE = 0o444
+EXECUTABLE_MODE = 0o555
+# the modes filters are given back when they are restored
+FILTER_MODE = 0o644
+EXECUTABLE_FILTER_MODE = 0o755
+# the suffix of the temporary links swapped in for filters
+TEMP_SUFFIX = '.modrc-tmp'
+
+DedupResult = collections.namedtuple('DedupResult', ['filters', 'objects', 'linked', 'saved'])
+
+
+class BlobCache:
+    """Reads the contents of filters, reading filters that are linked to the same object only once.
+
+    Only files with more than one link are kept in memory, so a tree without a store reads every filter
+    as it did before and memory use grows with the deduplicated contents only.
+    """
+
+    def __init__(self):
+        self._blobs = {}
+        self._lock = threading.Lock()
+
+    def read(self, path):
+        """Read the contents of a file.
+
+        Parameters
+        ----------
+        path : str
+            The path to the file.
+
+        Returns
+        -------
+        bytes
+            The contents of the file.
+        """
+        path_stat = os.stat(path)
+        key = (path_stat.st_dev, path_stat.st_ino, path_stat.st_size, path_stat.st_mtime_ns)
+        if path_stat.st_nlink > 1:
+            with self._lock:
+                data = self._blobs.get(key)
+            if data is not None:
+                return data
+        with open(path, 'rb') as f:
+            data = f.read()
+        if path_stat.st_nlink > 1:
+            with self._lock:
+                self._blobs[key] = data
+        return data
+
+
+def get_store_dir(modrc_dir):
+    """Get the path to the object store within the ModRC directory.
+
+    Parameters
+    ----------
+    modrc_dir : :obj:`Path`
+        The path to the ModRC directory.
+
+    Returns
+    -------
+    :obj:`Path`
+        The path to the object store.
+    """
+    return modrc_dir.joinpath('objects')
+
+def get_object_path(store_dir, digest, executable=False):
+    """Get the path to the object holding some contents.
+
+    Parameters
+    ----------
+    store_dir : :obj:`Path`
+        The path to the object store.
+    digest : str
+        The hex SHA-256 digest of the contents.
+    executable : bool, optional
+        Get the object for executable filters, which are stored apart from the others. Defaults to False.
+
+    Returns
+    -------
+    :obj:`Path`
+        The path to the object, in a directory named after the first two digits of the digest.
+    """
+    return store_dir.joinpath(digest[:2], digest[2:] + ('-x' if executable else ''))
+
+def list_filters(packages_dir):
+    """Find the filter of every file in every package.
+
+    The directories are read completely before anything is linked, so temporary links made while
+    linking are never picked up as filters.
+
+    Parameters
+    ----------
+    packages_dir : :obj:`Path`
+        The path to the packages directory.
+
+    Returns
+    -------
+    list of :obj:`DirEntry`
+        The directory entry of each filter. Symlinks and temporary links left behind by an interrupted
+        run are skipped.
+    """
+    filter_entries = []
+    for package_entry in os.scandir(str(packages_dir)):
+        files_dir = os.path.join(package_entry.path, 'files')
+        if not package_entry.is_dir() or not os.path.isdir(files_dir):
+            continue
+        for file_entry in os.scandir(files_dir):
+            if not file_entry.is_dir(follow_symlinks=False):
+                continue
+            filter_entries.extend(
+                filter_entry for filter_entry in os.scandir(file_entry.path)
+                if filter_entry.is_file(follow_symlinks=False) and not filter_entry.name.endswith(TEMP_SUFFIX)
+            )
+    return filter_entries
+
+def _link(source, target):
+    # replace the target with a hard link to the source, through a temporary link swapped in atomically
+    temp = str(target) + TEMP_SUFFIX
+    if os.path.lexists(temp):
+        os.unlink(temp)
+    try:
+        os.link(str(source), temp)
+    except OSError as error:
+        if error.errno == errno.EXDEV:
+            raise exceptions.ModRCStoreError('The packages are not on the same filesystem as the object store')
+        raise
+    os.replace(temp, str(target))
+
+def dedup(dry_run=False, context=None):
+    """Store every distinct filter once in the object store and hard link each filter to its object.
+
+    The first filter found with some contents becomes the object, so nothing is copied. Objects are
+    made read only, so filters linked to them must be replaced rather than written in place, which is
+    what git does. Objects no longer linked to any filter are removed.
+
+    Parameters
+    ----------
+    dry_run : bool, optional
+        Only count what would be linked without changing anything. Defaults to False.
+    context : :obj:`ModRCContext`, optional
+        The context to resolve ModRC paths with. The shared context is used if None.
+
+    Returns
+    -------
+    :obj:`DedupResult`
+        The number of filters, the number of distinct filters, the number of filters linked and the
+        bytes saved by sharing objects.
+
+    Raises
+    ------
+    ModRCIntegrityError
+        Raised if ModRC is not installed properly.
+    ModRCStoreError
+        Raised if the packages are on another filesystem than the object store.
+    """
+    context = helper.get_context(context)
+    store_dir = get_store_dir(context.modrc_dir)
+    filters = linked = saved = 0
+    seen = set()
+    # the object of every inode hashed, so filters that are already linked are only read once
+    inodes = {}
+    for filter_entry in list_filters(context.packages_dir):
+        filter_stat = filter_entry.stat()
+        executable = bool(filter_stat.st_mode & stat.S_IXUSR)
+        inode = (filter_stat.st_dev, filter_stat.st_ino)
+        object_path = inodes.get(inode)
+        if object_path is None:
+            object_path = inodes[inode] = get_object_path(store_dir, manifest.hash_file(filter_entry.path), executable)
+        filters += 1
+        if object_path in seen:
+            saved += filter_stat.st_size
+        seen.add(object_path)
+        try:
+            if os.path.samestat(filter_stat, os.stat(str(object_path))):
+                continue
+            object_exists = True
+        except FileNotFoundError:
+            object_exists = False
+        linked += 1
+        if dry_run:
+            continue
+        if object_exists:
+            _link(object_path, filter_entry.path)
+        else:
+            object_path.parent.mkdir(parents=True, exist_ok=True)
+            _link(filter_entry.path, object_path)
+            os.chmod(str(object_path), EXECUTABLE_MODE if executable else OBJECT_MODE)
+    if not dry_run:
+        prune(store_dir)
+    return DedupResult(filters, len(seen), linked, saved)
+
+def prune(store_dir):
+    """Remove the objects that no filter is linked to anymore.
+
+    Parameters
+    ----------
+    store_dir : :obj:`Path`
+        The path to the object store.
+
+    Returns
+    -------
+    int
+        The number of objects removed.
+    """
+    removed = 0
+    try:
+        fanout_entries = list(os.scandir(str(store_dir)))
+    except FileNotFoundError:
+        return removed
+    for fanout_entry in fanout_entries:
+        if not fanout_entry.is_dir(follow_symlinks=False):
+            continue
+        for object_entry in os.scandir(fanout_entry.path):
+            if object_entry.stat(follow_symlinks=False).st_nlink == 1:
+                os.unlink(object_entry.path)
+                removed += 1
+        try:
+            os.rmdir(fanout_entry.path)
+        except OSError:
+            pass
+    return removed
+
+def restore(context=None):
+    """Give every filter linked to the object store its own writable copy again and empty the store.
+
+    Parameters
+    ----------
+    context : :obj:`ModRCContext`, optional
+        The context to resolve ModRC paths with. The shared context is used if None.
+
+    Returns
+    -------
+    int
+        The number of filters restored.
+
+    Raises
+    ------
+    ModRCIntegrityError
+        Raised if ModRC is not installed properly.
+    """
+    context = helper.get_context(context)
+    store_dir = get_store_dir(context.modrc_dir)
+    objects = set()
+    if store_dir.is_dir():
+        for fanout_entry in os.scandir(str(store_dir)):
+            if fanout_entry.is_dir(follow_symlinks=False):
+                objects.update((entry.stat().st_dev, entry.stat().st_ino) for entry in os.scandir(fanout_entry.path))
+    restored = 0
+    for filter_entry in list_filters(context.packages_dir):
+        filter_stat = filter_entry.stat()
+        if (filter_stat.st_dev, filter_stat.st_ino) not in objects:
+            continue
+        temp = filter_entry.path + TEMP_SUFFIX
+        shutil.copyfile(filter_entry.path, temp)
+        os.chmod(temp, EXECUTABLE_FILTER_MODE if filter_stat.st_mode & stat.S_IXUSR else FILTER_MODE)
+        os.replace(temp, filter_entry.path)
+        restored += 1
+    prune(store_dir)
+    return restored
@@ -0,0 +1,263 @@
+import collections
+import posixpath
+import subprocess
+import time
+from concurrent import futures
+
+from modrc import exceptions
+from modrc.lib import config, helper, index
+
+
+# sync statuses
+SYNCED = 'synced'
+UP_TO_DATE = 'up to date'
+NOT_A_REPOSITORY = 'not a repository'
+CLONED = 'cloned'
+FAILED = 'failed'
+
+SyncResult = collections.namedtuple('SyncResult', ['package_name', 'status', 'seconds', 'message'])
+
+REMOTE = 'origin'
+
+# clone modes, blobless clones keep the history but only fetch the files that are checked out
+BLOBLESS = 'blobless'
+SHALLOW = 'shallow'
+FULL = 'full'
+CLONE_ARGS = {
+    BLOBLESS: ['--filter=blob:none'],
+    SHALLOW: ['--depth=1', '--no-single-branch'],
+    FULL: []
+}
+
+
+def run_git(package_dir, *args):
+    """Run a git command in a package.
+
+    Parameters
+    ----------
+    package_dir : :obj:`Path`
+        The path to the package.
+    *args : str
+        The arguments to git.
+
+    Returns
+    -------
+    str
+        The output of the command without surrounding whitespace.
+
+    Raises
+    ------
+    CalledProcessError
+        Raised if the command failed.
+    """
+    completed = subprocess.run(['git'] + list(args), cwd=str(package_dir), stdout=subprocess.PIPE,
+                               stderr=subprocess.PIPE, universal_newlines=True, check=True)
+    return completed.stdout.strip()
+
+def _rev_parse(package_dir, ref):
+    # the commit a ref points to, or None if the ref does not exist
+    try:
+        return run_git(package_dir, 'rev-parse', '--verify', '-q', ref + '^{commit}') or None
+    except subprocess.CalledProcessError:
+        return None
+
+def _abort_rebase(package_dir):
+    # abort a rebase left in progress by a failed pull, there may be none if the pull failed before rebasing
+    try:
+        run_git(package_dir, 'rebase', '--abort')
+    except (subprocess.CalledProcessError, OSError):
+        pass
+
+def sync_package(package_name, package_dir):
+    """Commit local edits to a package, then pull and push it only if it differs from the remote.
+
+    Every local edit is batched into a single commit. The remote branch is compared to the ref fetched
+    on the last sync with a single ls-remote, so a package without local or remote changes is not
+    fetched or pushed.
+
+    Parameters
+    ----------
+    package_name : str
+        The name of the package.
+    package_dir : :obj:`Path`
+        The path to the package.
+
+    Returns
+    -------
+    :obj:`SyncResult`
+        The outcome of syncing the package.
+    """
+    start = time.perf_counter()
+
+    def result(status, message=None):
+        return SyncResult(package_name, status, time.perf_counter() - start, message)
+
+    if not package_dir.joinpath('.git').exists():
+        return result(NOT_A_REPOSITORY)
+    try:
+        branch = run_git(package_dir, 'symbolic-ref', '--short', 'HEAD')
+        # batch every local edit into one commit
+        changed = run_git(package_dir, 'status', '--porcelain').splitlines()
+        if changed:
+            run_git(package_dir, 'add', '--all')
+            run_git(package_dir, 'commit', '-q', '-m', 'Sync {} changed files'.format(len(changed)))
+        local = _rev_parse(package_dir, 'HEAD')
+        tracking = _rev_parse(package_dir, 'refs/remotes/{}/{}'.format(REMOTE, branch))
+        remote_refs = run_git(package_dir, 'ls-remote', REMOTE, 'refs/heads/' + branch).split()
+        remote = remote_refs[0] if remote_refs else None
+        # nothing to do if neither side moved since the last sync
+        if remote == tracking and local == tracking:
+            return result(UP_TO_DATE)
+        if remote is not None and remote != tracking:
+            try:
+                run_git(package_dir, 'pull', '-q', '--rebase', REMOTE, branch)
+            except subprocess.CalledProcessError:
+                # leave the package as it was rather than stuck in a conflicted rebase
+                _abort_rebase(package_dir)
+                raise
+            local = _rev_parse(package_dir, 'HEAD')
+        if local is not None and local != remote:
+            run_git(package_dir, 'push', '-q', REMOTE, branch)
+        # record the pushed or pulled state for the next comparison
+        if local is not None:
+            run_git(package_dir, 'update-ref', 'refs/remotes/{}/{}'.format(REMOTE, branch), local)
+    except subprocess.CalledProcessError as error:
+        return result(FAILED, error.stderr.strip())
+    except OSError as error:
+        return result(FAILED, str(error))
+    return result(SYNCED)
+
+def sync_packages(package_names, jobs=4, context=None):
+    """Sync a list of packages concurrently.
+
+    Parameters
+    ----------
+    package_names : list of str
+        The names of the packages to sync.
+    jobs : int, optional
+        The most packages synced at once. Defaults to 4.
+    context : :obj:`ModRCContext`, optional
+        The context to resolve ModRC paths with. The shared context is used if None.
+
+    Returns
+    -------
+    list of :obj:`SyncResult`
+        The outcome for each package, in the order given.
+
+    Raises
+    ------
+    ModRCIntegrityError
+        Raised if ModRC is not installed properly.
+    ModRCPackageDoesNotExistError
+        Raised if a package could not be found.
+    """
+    packages_dir = helper.get_context(context).packages_dir
+    package_dirs = [packages_dir.joinpath(package_name) for package_name in package_names]
+    for package_dir in package_dirs:
+        if not package_dir.is_dir():
+            raise exceptions.ModRCPackageDoesNotExistError('Package does not exist')
+    if jobs <= 1 or len(package_names) <= 1:
+        return [sync_package(package_name, package_dir) for package_name, package_dir in zip(package_names, package_dirs)]
+    with futures.ThreadPoolExecutor(max_workers=jobs) as executor:
+        return list(executor.map(sync_package, package_names, package_dirs))
+
+def package_name_from_url(repo_url):
+    """Get the name of a package from the URL of its repo.
+
+    Parameters
+    ----------
+    repo_url : str
+        The URL of the package repo.
+
+    Returns
+    -------
+    str
+        The last segment of the URL without a .git suffix.
+    """
+    name = posixpath.basename(repo_url.rstrip('/').replace(':', '/'))
+    return name[:-len('.git')] if name.endswith('.git') else name
+
+def clone_package(repo_url, package_name, package_dir, mode=BLOBLESS):
+    """Clone a package repo.
+
+    A package.yml file with the repo URL is added if the repo does not have one.
+
+    Parameters
+    ----------
+    repo_url : str
+        The URL of the package repo.
+    package_name : str
+        The name of the package.
+    package_dir : :obj:`Path`
+        The path to clone the package to.
+    mode : str, optional
+        The clone mode, one of BLOBLESS, SHALLOW or FULL. Defaults to BLOBLESS.
+
+    Returns
+    -------
+    :obj:`SyncResult`
+        The outcome of cloning the package.
+    """
+    start = time.perf_counter()
+    try:
+        run_git(package_dir.parent, 'clone', '-q', *CLONE_ARGS[mode], '--', repo_url, str(package_dir))
+        package_file = package_dir.joinpath('package.yml')
+        if not package_file.is_file():
+            package_file.touch()
+            config.update_config(package_file, {'repourl': repo_url})
+    except subprocess.CalledProcessError as error:
+        return SyncResult(package_name, FAILED, time.perf_counter() - start, error.stderr.strip())
+    except OSError as error:
+        return SyncResult(package_name, FAILED, time.perf_counter() - start, str(error))
+    return SyncResult(package_name, CLONED, time.perf_counter() - start, None)
+
+def clone_packages(repo_urls, jobs=4, mode=BLOBLESS, progress=None, context=None):
+    """Clone several package repos concurrently.
+
+    Parameters
+    ----------
+    repo_urls : list of str
+        The URLs of the package repos. Each package is named after the last segment of its URL.
+    jobs : int, optional
+        The most repos cloned at once. Defaults to 4.
+    mode : str, optional
+        The clone mode, one of BLOBLESS, SHALLOW or FULL. Defaults to BLOBLESS.
+    progress : callable, optional
+        Called with each :obj:`SyncResult` as soon as its clone finishes.
+    context : :obj:`ModRCContext`, optional
+        The context to resolve ModRC paths with. The shared context is used if None.
+
+    Returns
+    -------
+    list of :obj:`SyncResult`
+        The outcome for each repo, in the order given.
+
+    Raises
+    ------
+    ModRCIntegrityError
+        Raised if ModRC is not installed properly.
+    ModRCPackageExistsError
+        Raised if a package already exists or two URLs have the same package name.
+    """
+    context = helper.get_context(context)
+    packages_dir = context.packages_dir
+    package_names = [package_name_from_url(repo_url) for repo_url in repo_urls]
+    if len(set(package_names)) != len(package_names):
+        raise exceptions.ModRCPackageExistsError('Two repos have the same package name')
+    for package_name in package_names:
+        if packages_dir.joinpath(package_name).exists():
+            raise exceptions.ModRCPackageExistsError('Package already exists')
+    results = {}
+    with futures.ThreadPoolExecutor(max_workers=max(1, jobs)) as executor:
+        pending = {
+            executor.submit(clone_package, repo_url, package_name, packages_dir.joinpath(package_name), mode): package_name
+            for repo_url, package_name in zip(repo_urls, package_names)
+        }
+        for future in futures.as_completed(pending):
+            result = future.result()
+            results[pending[future]] = result
+            if result.status == CLONED:
+                index.add_package(result.package_name, context)
+            if progress is not None:
+                progress(result)
+    return [results[package_name] for package_name in package_names]
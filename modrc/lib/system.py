@@ -0,0 +1,198 @@
+import json
+import os
+import platform
+import re
+import uuid
+
+import distro
+
+from modrc import exceptions
+from modrc.lib import helper
+
+
+# files whose changes mean the operating system was upgraded or replaced
+RELEASE_FILES = [
+    '/etc/os-release',
+    '/usr/lib/os-release',
+    '/System/Library/CoreServices/SystemVersion.plist'
+]
+
+# fingerprint detected or loaded by this process
+_fingerprint = None
+
+
+def get_fingerprint_file(modrc_dir):
+    """Get the path to the cached system fingerprint within the ModRC directory.
+
+    Parameters
+    ----------
+    modrc_dir : :obj:`Path`
+        The path to the ModRC directory.
+
+    Returns
+    -------
+    :obj:`Path`
+        The path to the system fingerprint file.
+    """
+    return modrc_dir.joinpath('system.json')
+
+def get_release_stamp():
+    """Get a cheap stamp of the operating system release files.
+
+    Returns
+    -------
+    list
+        The name of the kernel followed by the path, size and mtime of every release file that exists.
+    """
+    stamp = [os.uname().sysname]
+    for release_file in RELEASE_FILES:
+        try:
+            release_stat = os.stat(release_file)
+        except OSError:
+            continue
+        stamp.append([release_file, release_stat.st_size, release_stat.st_mtime_ns])
+    return stamp
+
+def _version_segments(version):
+    # filter names only allow numeric version segments
+    return [segment for segment in version.split('.') if re.fullmatch(r'[0-9]+', segment)]
+
+def _mac_address():
+    node = uuid.getnode()
+    # a set multicast bit means no hardware address was found and the node is random
+    if node >> 40 & 1:
+        return None
+    return '{:012x}'.format(node)
+
+def detect_fingerprint():
+    """Detect the OS, distro, version and MAC address of this system.
+
+    Returns
+    -------
+    dict
+        The fingerprint with the keys os, distro, version and mac. Values that could not be detected are None.
+    """
+    fingerprint = {'os': None, 'distro': None, 'version': None, 'mac': _mac_address()}
+    sysname = platform.system()
+    if sysname == 'Darwin':
+        fingerprint['os'] = 'macos'
+        fingerprint['version'] = '.'.join(_version_segments(platform.mac_ver()[0])) or None
+    elif sysname == 'Linux':
+        fingerprint['os'] = 'linux'
+        distro_id = re.sub(r'[^a-z]', '', distro.id().lower())
+        if distro_id:
+            fingerprint['distro'] = distro_id
+            fingerprint['version'] = '.'.join(_version_segments(distro.version(best=True))) or None
+    return fingerprint
+
+def format_system(fingerprint):
+    """Format a fingerprint as a system version string, same format as filter names.
+
+    Parameters
+    ----------
+    fingerprint : dict
+        The system fingerprint.
+
+    Returns
+    -------
+    str or None
+        The system version string, or None if the OS is not supported.
+    """
+    if fingerprint['os'] is None:
+        return None
+    segments = [fingerprint['os']]
+    if fingerprint['distro'] is not None:
+        segments.append(fingerprint['distro'])
+    if fingerprint['version'] is not None:
+        segments.append(fingerprint['version'])
+    return '.'.join(segments)
+
+def parse_system(system_string):
+    """Parse a system version string, or a MAC address, into a fingerprint.
+
+    Parameters
+    ----------
+    system_string : str
+        The version string for a system, same format as filter names, or a MAC address.
+
+    Returns
+    -------
+    dict
+        The fingerprint with the keys os, distro, version and mac. Values not in the string are None.
+    """
+    fingerprint = {'os': None, 'distro': None, 'version': None, 'mac': None}
+    if re.fullmatch(r'[0-9a-f]{12}', system_string):
+        fingerprint['mac'] = system_string
+        return fingerprint
+    segments = system_string.split('.')
+    fingerprint['os'] = segments.pop(0)
+    if fingerprint['os'] == 'linux' and segments and not segments[0].isdigit():
+        fingerprint['distro'] = segments.pop(0)
+    fingerprint['version'] = '.'.join(segments) or None
+    return fingerprint
+
+def clear_cache():
+    """Forget the fingerprint loaded by this process so it is loaded again on the next lookup."""
+    global _fingerprint
+    _fingerprint = None
+
+def get_fingerprint(refresh=False, context=None):
+    """Get the fingerprint of this system, detecting it only if the cached fingerprint is stale.
+
+    The fingerprint is cached in the ModRC directory along with a stamp of the operating system release
+    files, and is detected again when the stamp changes.
+
+    Parameters
+    ----------
+    refresh : bool, optional
+        Detect the fingerprint even if the cached fingerprint is current. Defaults to False.
+    context : :obj:`ModRCContext`, optional
+        The context to resolve ModRC paths with. The shared context is used if None.
+
+    Returns
+    -------
+    dict
+        The system fingerprint.
+    """
+    global _fingerprint
+    if _fingerprint is not None and not refresh:
+        return _fingerprint
+    stamp = get_release_stamp()
+    # the fingerprint can only be cached if ModRC is installed
+    try:
+        fingerprint_file = get_fingerprint_file(helper.get_context(context).modrc_dir)
+    except exceptions.ModRCIntegrityError:
+        fingerprint_file = None
+    # load the cached fingerprint if it is still current
+    if fingerprint_file is not None and not refresh:
+        try:
+            with open(str(fingerprint_file), 'r') as ff:
+                cached = json.load(ff)
+            if cached['stamp'] == stamp:
+                _fingerprint = cached['fingerprint']
+                return _fingerprint
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+    # detect the fingerprint and cache it
+    _fingerprint = detect_fingerprint()
+    if fingerprint_file is not None:
+        helper.write_atomic(fingerprint_file, json.dumps({'stamp': stamp, 'fingerprint': _fingerprint}))
+    return _fingerprint
+
+def get_targets(refresh=False, context=None):
+    """Get the compile targets for this system.
+
+    Parameters
+    ----------
+    refresh : bool, optional
+        Detect the fingerprint even if the cached fingerprint is current. Defaults to False.
+    context : :obj:`ModRCContext`, optional
+        The context to resolve ModRC paths with. The shared context is used if None.
+
+    Returns
+    -------
+    list of str
+        The system version string followed by the MAC address, each only if detected.
+    """
+    fingerprint = get_fingerprint(refresh, context)
+    return [target for target in (format_system(fingerprint), fingerprint['mac']) if target is not None]
@@ -0,0 +1,326 @@
+import collections
+import getpass
+import hashlib
+import json
+import os
+import re
+import socket
+import threading
+
+from modrc import exceptions
+from modrc.lib import helper, package, store, system
+
+
+# a variable in a template filter, such as {{ system.hostname }}, {{ env.USER }} or {{ package.email }}, anything
+# else in braces is left as it is
+VARIABLE_PATTERN = re.compile(rb'\{\{[ \t]*([A-Za-z_][\w-]*(?:\.[\w-]+)+)[ \t]*\}\}')
+VARIABLE_MARKER = b'{{'
+# the most parsed templates kept in memory
+TEMPLATE_CACHE_SIZE = 4096
+
+Template = collections.namedtuple('Template', ['names', 'render'])
+
+# parsed templates by the hash of their contents, least recently used first
+_cache = collections.OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def parse_template(data):
+    """Parse a template into a render function.
+
+    Parameters
+    ----------
+    data : bytes
+        The contents of the template.
+
+    Returns
+    -------
+    :obj:`Template`
+        The sorted names of the variables used and a function that takes a lookup function, which maps a
+        variable name to its value as bytes, and returns the rendered contents.
+    """
+    literals = []
+    names = []
+    end = 0
+    for match in VARIABLE_PATTERN.finditer(data):
+        literals.append(data[end:match.start()])
+        names.append(match.group(1).decode())
+        end = match.end()
+    if not names:
+        return Template((), lambda lookup: data)
+    tail = data[end:]
+    parts = list(zip(literals, names))
+
+    def render(lookup):
+        rendered = []
+        for literal, name in parts:
+            rendered.append(literal)
+            rendered.append(lookup(name))
+        rendered.append(tail)
+        return b''.join(rendered)
+
+    return Template(tuple(sorted(set(names))), render)
+
+def get_template(data):
+    """Get the parsed template for some contents, only parsing contents that were not parsed before.
+
+    Parameters
+    ----------
+    data : bytes
+        The contents of the template.
+
+    Returns
+    -------
+    :obj:`Template`
+        The parsed template.
+    """
+    key = hashlib.sha256(data).digest()
+    with _cache_lock:
+        template = _cache.get(key)
+        if template is not None:
+            _cache.move_to_end(key)
+            return template
+    template = parse_template(data)
+    with _cache_lock:
+        _cache[key] = template
+        while len(_cache) > TEMPLATE_CACHE_SIZE:
+            _cache.popitem(last=False)
+    return template
+
+def clear_cache():
+    """Forget every parsed template."""
+    with _cache_lock:
+        _cache.clear()
+
+def format_value(value):
+    """Format a variable value the way it is written into a live file.
+
+    Parameters
+    ----------
+    value
+        The value of the variable.
+
+    Returns
+    -------
+    str
+        The value as text, with booleans written as true or false and None as nothing.
+    """
+    if value is None:
+        return ''
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    return str(value)
+
+
+class Renderer:
+    """Renders the filters of packages that have templates turned on in their package.yml file.
+
+    The renderer also tells whether the filters of a package are joined with newlines, since it already
+    holds the package configs.
+
+    A renderer is made for each compile. The system variables, the package configs and whether each
+    package uses templates are looked up once per renderer, and parsed templates are shared by every
+    renderer in the process.
+
+    Variables are system.os, system.distro, system.version, system.mac, system.name, system.hostname,
+    system.user and system.home, env.NAME for the environment and package.KEY for a value from the
+    package.yml file of the filter's package, with dots reaching into nested values. When rendering for
+    another system from its fingerprint, only the system variables in the fingerprint exist. Filters are
+    read through a blob cache, which can be shared with the chunk resolver of the compile.
+    """
+
+    def __init__(self, context=None, fingerprint=None, blobs=None):
+        self.context = helper.get_context(context)
+        self.blobs = store.BlobCache() if blobs is None else blobs
+        self._system = None if fingerprint is None else dict(fingerprint, name=system.format_system(fingerprint))
+        self._packages = {}
+        self._lock = threading.Lock()
+
+    def _get_system(self):
+        if self._system is None:
+            fingerprint = system.get_fingerprint(context=self.context)
+            self._system = dict(fingerprint, name=system.format_system(fingerprint), hostname=socket.gethostname(),
+                                user=getpass.getuser(), home=os.path.expanduser('~'))
+        return self._system
+
+    def _get_package_config(self, package_name):
+        with self._lock:
+            try:
+                return self._packages[package_name]
+            except KeyError:
+                try:
+                    package_config = package.load_package_config(package_name, self.context)
+                except exceptions.ModRCPackageDoesNotExistError:
+                    package_config = None
+                if not isinstance(package_config, dict):
+                    package_config = {}
+                self._packages[package_name] = package_config
+                return package_config
+
+    def uses_templates(self, package_name):
+        """Check if the filters of a package are templates.
+
+        Parameters
+        ----------
+        package_name : str
+            The name of the package.
+
+        Returns
+        -------
+        bool
+            Return True if templates is set in the package.yml file of the package.
+        """
+        return bool(self._get_package_config(package_name).get('templates'))
+
+    def adds_newlines(self, package_name):
+        """Check if a newline is added after the filters of a package that do not end with one.
+
+        Parameters
+        ----------
+        package_name : str
+            The name of the package.
+
+        Returns
+        -------
+        bool
+            Return True if newlines is set in the package.yml file of the package. Filters are otherwise
+            joined byte for byte.
+        """
+        return bool(self._get_package_config(package_name).get('newlines'))
+
+    def lookup(self, package_name, name):
+        """Look up the value of a variable.
+
+        Parameters
+        ----------
+        package_name : str
+            The name of the package the template is from.
+        name : str
+            The name of the variable.
+
+        Returns
+        -------
+        str
+            The formatted value.
+
+        Raises
+        ------
+        ModRCTemplateError
+            Raised if the variable does not exist.
+        """
+        namespace, _, key = name.partition('.')
+        if namespace == 'env' and key and key in os.environ:
+            return os.environ[key]
+        if namespace in ('system', 'package') and key:
+            value = self._get_system() if namespace == 'system' else self._get_package_config(package_name)
+            for segment in key.split('.'):
+                if not isinstance(value, dict) or segment not in value:
+                    break
+                value = value[segment]
+            else:
+                return format_value(value)
+        raise exceptions.ModRCTemplateError('Template variable does not exist: {}'.format(name))
+
+    def render(self, package_name, data):
+        """Render the contents of a filter.
+
+        Parameters
+        ----------
+        package_name : str
+            The name of the package the filter is from.
+        data : bytes
+            The contents of the filter.
+
+        Returns
+        -------
+        tuple of (bytes, tuple of str)
+            The rendered contents and the names of the variables used.
+
+        Raises
+        ------
+        ModRCTemplateError
+            Raised if a variable does not exist.
+        """
+        if VARIABLE_MARKER not in data:
+            return data, ()
+        template = get_template(data)
+        return template.render(lambda name: self.lookup(package_name, name).encode()), template.names
+
+    def render_sources(self, package_name, sources):
+        """Render the filters of a live file if its package uses templates.
+
+        Parameters
+        ----------
+        package_name : str
+            The name of the package the filters are from.
+        sources : list of str or bytes
+            The paths to the filters, in order, or the contents of filters whose includes were expanded.
+
+        Returns
+        -------
+        tuple of (list, tuple of str)
+            The sources with every template rendered to bytes, and the sorted names of the variables used.
+
+        Raises
+        ------
+        ModRCTemplateError
+            Raised if a variable does not exist.
+        """
+        if not self.uses_templates(package_name):
+            return sources, ()
+        rendered = []
+        names = set()
+        for source in sources:
+            if not isinstance(source, bytes):
+                source = self.blobs.read(source)
+            data, used = self.render(package_name, source)
+            rendered.append(data)
+            names.update(used)
+        return rendered, tuple(sorted(names))
+
+    def get_state(self, package_name, names):
+        """Get the state of the variables a live file was rendered with, to be recorded in the manifest.
+
+        Parameters
+        ----------
+        package_name : str
+            The name of the package the live file is from.
+        names : iterable of str
+            The names of the variables used.
+
+        Returns
+        -------
+        dict or None
+            The names of the variables and a hash of their values, or None if the package does not use
+            templates.
+        """
+        if not self.uses_templates(package_name):
+            return None
+        names = sorted(names)
+        values = []
+        for name in names:
+            try:
+                values.append(self.lookup(package_name, name))
+            except exceptions.ModRCTemplateError:
+                values.append(None)
+        return {'names': names, 'hash': hashlib.sha256(json.dumps(values).encode()).hexdigest()}
+
+    def is_current(self, package_name, recorded):
+        """Check if a live file was rendered with the variables it would be rendered with now.
+
+        Parameters
+        ----------
+        package_name : str
+            The name of the package the live file is from.
+        recorded : dict or None
+            The variables state recorded in the manifest for the live file.
+
+        Returns
+        -------
+        bool
+            Return True if the variables have not changed and the package still uses templates, or still
+            does not.
+        """
+        if recorded is None:
+            return not self.uses_templates(package_name)
+        return self.get_state(package_name, recorded['names']) == recorded
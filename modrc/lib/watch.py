@@ -0,0 +1,327 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+
+from modrc import exceptions
+from modrc.lib import compiler, config, helper, index, package
+
+
+# seconds without any new change before a burst of changes is compiled
+DEBOUNCE_SECONDS = 0.2
+# seconds between scans of the packages directory when inotify is not available
+POLL_SECONDS = 1.0
+
+# inotify constants from <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = getattr(os, 'O_CLOEXEC', 0)
+WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+              | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR)
+EVENT_HEADER = struct.Struct('iIII')
+READ_SIZE = 64 * 1024
+
+
+def snapshot_packages(packages_dir):
+    """Stat every filter of every file in every package.
+
+    Parameters
+    ----------
+    packages_dir : :obj:`Path`
+        The path to the packages directory.
+
+    Returns
+    -------
+    dict
+        Maps each package and file name pair to the size and mtime of the file's filters.
+    """
+    snapshot = {}
+    for package_entry in os.scandir(str(packages_dir)):
+        files_dir = os.path.join(package_entry.path, 'files')
+        if not package_entry.is_dir() or not os.path.isdir(files_dir):
+            continue
+        for file_entry in os.scandir(files_dir):
+            if not file_entry.is_dir():
+                continue
+            snapshot[(package_entry.name, file_entry.name)] = {
+                filter_entry.name: [filter_entry.stat().st_size, filter_entry.stat().st_mtime_ns]
+                for filter_entry in os.scandir(file_entry.path)
+                if filter_entry.is_file()
+            }
+    return snapshot
+
+
+class PollingWatcher:
+    """Finds changed files by comparing snapshots of the packages directory."""
+
+    def __init__(self, packages_dir, poll_seconds=POLL_SECONDS):
+        self.packages_dir = packages_dir
+        self.poll_seconds = poll_seconds
+        self.snapshot = snapshot_packages(packages_dir)
+
+    def wait(self, timeout=None):
+        """Wait for files to change.
+
+        Parameters
+        ----------
+        timeout : float, optional
+            The most seconds to wait. The poll interval is used if None.
+
+        Returns
+        -------
+        set of tuple
+            The package and file name pairs that changed, which is empty if nothing changed.
+        """
+        time.sleep(self.poll_seconds if timeout is None else timeout)
+        snapshot = snapshot_packages(self.packages_dir)
+        changed = {key for key in set(snapshot) | set(self.snapshot) if snapshot.get(key) != self.snapshot.get(key)}
+        self.snapshot = snapshot
+        return changed
+
+    def close(self):
+        """Stop watching."""
+
+
+class InotifyWatcher:
+    """Finds changed files from inotify events on the package tree.
+
+    Every directory down to the file directories is watched, so a change to a filter reports exactly
+    the file it belongs to without scanning the packages directory.
+    """
+
+    def __init__(self, packages_dir):
+        self.packages_dir = packages_dir
+        self._libc = load_libc()
+        self.fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+        # path parts relative to the packages directory by watch descriptor
+        self.watches = {}
+        self._watch_tree(())
+
+    def _watch(self, parts):
+        path = os.path.join(str(self.packages_dir), *parts)
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), WATCH_MASK)
+        if wd >= 0:
+            self.watches[wd] = parts
+
+    def _watch_tree(self, parts):
+        # watch a directory and every directory below it down to the file directories
+        self._watch(parts)
+        if len(parts) == 3:
+            return
+        try:
+            entries = list(os.scandir(os.path.join(str(self.packages_dir), *parts)))
+        except OSError:
+            return
+        for entry in entries:
+            if entry.is_dir() and (len(parts) != 1 or entry.name == 'files'):
+                self._watch_tree(parts + (entry.name,))
+
+    def _files_below(self, parts):
+        # every package and file name pair at or below a directory
+        if len(parts) == 3:
+            return {(parts[0], parts[2])}
+        package_dir = os.path.join(str(self.packages_dir), parts[0])
+        return {(parts[0], file_name) for file_name in index.scan_files(package_dir)['files']}
+
+    def _read_events(self):
+        events = []
+        while True:
+            try:
+                data = os.read(self.fd, READ_SIZE)
+            except BlockingIOError:
+                return events
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+                offset += EVENT_HEADER.size
+                name = os.fsdecode(data[offset:offset + length].rstrip(b'\0'))
+                offset += length
+                events.append((wd, mask, name))
+
+    def wait(self, timeout=None):
+        """Wait for files to change.
+
+        Parameters
+        ----------
+        timeout : float, optional
+            The most seconds to wait. Waits until something changes if None.
+
+        Returns
+        -------
+        set of tuple or None
+            The package and file name pairs that changed, which is empty if nothing changed. None if
+            events were lost and any file may have changed.
+        """
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return set()
+        changed = set()
+        for wd, mask, name in self._read_events():
+            if mask & IN_Q_OVERFLOW:
+                # events were dropped so watch the whole tree again
+                for lost_wd in list(self.watches):
+                    self._libc.inotify_rm_watch(self.fd, lost_wd)
+                self.watches.clear()
+                self._watch_tree(())
+                return None
+            if mask & IN_IGNORED:
+                self.watches.pop(wd, None)
+                continue
+            parts = self.watches.get(wd)
+            if parts is None:
+                continue
+            if len(parts) == 3:
+                changed.add((parts[0], parts[2]))
+                continue
+            if not name or (len(parts) == 1 and name != 'files'):
+                continue
+            child = parts + (name,)
+            if len(child) == 3:
+                # a file was added to or removed from a package
+                changed.add((child[0], child[2]))
+            if mask & (IN_CREATE | IN_MOVED_TO):
+                # a new directory may already have files in it by the time it is watched
+                self._watch_tree(child)
+                changed |= self._files_below(child)
+        return changed
+
+    def close(self):
+        """Stop watching."""
+        os.close(self.fd)
+
+
+def load_libc():
+    """Load the C library with the inotify functions.
+
+    Returns
+    -------
+    :obj:`CDLL`
+        The C library.
+
+    Raises
+    ------
+    OSError
+        Raised if inotify is not available on this platform.
+    """
+    if not sys.platform.startswith('linux'):
+        raise OSError('inotify is only available on Linux')
+    libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+    if not hasattr(libc, 'inotify_init1'):
+        raise OSError('inotify is not available')
+    libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+    return libc
+
+def get_watcher(packages_dir, poll=False):
+    """Get a watcher for the packages directory, using inotify where it is available.
+
+    Parameters
+    ----------
+    packages_dir : :obj:`Path`
+        The path to the packages directory.
+    poll : bool, optional
+        Poll for changes even if inotify is available. Defaults to False.
+
+    Returns
+    -------
+    :obj:`InotifyWatcher` or :obj:`PollingWatcher`
+        The watcher.
+    """
+    if not poll:
+        try:
+            return InotifyWatcher(packages_dir)
+        except OSError:
+            pass
+    return PollingWatcher(packages_dir)
+
+def wait_for_changes(watcher, debounce=DEBOUNCE_SECONDS):
+    """Wait for a burst of changes to end.
+
+    Changes are collected until none have been seen for the debounce period, so an editor saving a
+    file several times in a row only causes one compile.
+
+    Parameters
+    ----------
+    watcher : :obj:`InotifyWatcher` or :obj:`PollingWatcher`
+        The watcher to wait on.
+    debounce : float, optional
+        The seconds without a change that end a burst. Defaults to DEBOUNCE_SECONDS.
+
+    Returns
+    -------
+    set of tuple or None
+        The package and file name pairs that changed, or None if any file may have changed.
+    """
+    changed = set()
+    while changed is not None and not changed:
+        changed = watcher.wait()
+    while True:
+        more = watcher.wait(debounce)
+        if more is None:
+            changed = None
+        elif not more:
+            return changed
+        elif changed is not None:
+            changed |= more
+
+def watch(system, debounce=DEBOUNCE_SECONDS, poll=False, context=None):
+    """Compile live files whenever their filters change while autocompile is on.
+
+    The autocompile setting is read again for every burst of changes, so turning it off pauses
+    compiling without stopping the watch. An error compiling a burst does not stop the watch either.
+
+    Parameters
+    ----------
+    system : str or list of str
+        The version string for the system, same format as filter names, or a list of them.
+    debounce : float, optional
+        The seconds without a change that end a burst. Defaults to DEBOUNCE_SECONDS.
+    poll : bool, optional
+        Poll for changes even if inotify is available. Defaults to False.
+    context : :obj:`ModRCContext`, optional
+        The context to resolve ModRC paths with. The shared context is used if None.
+
+    Yields
+    ------
+    :obj:`OrderedDict`, :obj:`ModRCError` or None
+        The compile results for each burst of changes, as returned by compile_packages, the error that
+        stopped the burst from compiling, or None if autocompile is off.
+
+    Raises
+    ------
+    ModRCIntegrityError
+        Raised if ModRC is not installed properly.
+    """
+    context = helper.get_context(context)
+    watcher = get_watcher(context.packages_dir, poll)
+    try:
+        while True:
+            changed = wait_for_changes(watcher, debounce)
+            if not config.get_setting('autocompile', False, context):
+                yield None
+                continue
+            file_names = None if changed is None else {file_name for _, file_name in changed}
+            # an error in one burst, like a missing chunk, is reported without ending the watch
+            try:
+                results = compiler.compile_packages(package.list_packages(context), system, file_names=file_names,
+                                                    context=context)
+            except exceptions.ModRCError as error:
+                results = error
+            yield results
+    finally:
+        watcher.close()
@@ -14,10 +14,10 @@ setup(
     packages=['modrc'],
     use_scm_version=True,
     setup_requires=['setuptools_scm'],
-    install_requires=['click', 'distro', 'pyyaml'],
+    install_requires=['click', 'distro', 'importlib_metadata; python_version < "3.8"', 'pyyaml'],
     entry_points={
         'console_scripts': [
-            'modrc = modrc.__main__:main'
+            'modrc = modrc.lib.client:run'
         ]
     },
     license='MIT',
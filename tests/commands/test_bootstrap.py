@@ -0,0 +1,35 @@
+# pylint: disable=no-self-use
+
+import pytest
+
+from modrc import __main__
+from modrc.lib import bootstrap, helper
+
+
+class TestBootstrap:
+    @pytest.mark.usefixtures('setup_teardown')
+    @pytest.mark.usefixtures('click_runner')
+    def test_source_line(self, click_runner):
+        """Test that the bootstrap is written and the line that sources it is printed."""
+        result = click_runner.invoke(__main__.main, ['bootstrap', '--shell', 'zsh'])
+        bootstrap_file = bootstrap.get_bootstrap_file(helper.get_modrc_dir(), 'zsh')
+        assert bootstrap_file.is_file()
+        assert result.output == '. {}\n'.format(bootstrap_file)
+        assert result.exit_code == 0
+
+    @pytest.mark.usefixtures('setup_teardown')
+    @pytest.mark.usefixtures('click_runner')
+    def test_detected_shell(self, click_runner, monkeypatch):
+        """Test that the shell is detected from the environment."""
+        monkeypatch.setenv('SHELL', '/bin/bash')
+        result = click_runner.invoke(__main__.main, ['bootstrap'])
+        assert result.output.strip().endswith('bootstrap.bash')
+        assert result.exit_code == 0
+
+    @pytest.mark.usefixtures('teardown')
+    @pytest.mark.usefixtures('click_runner')
+    def test_modrc_not_installed(self, click_runner):
+        """Test that an error is reported if ModRC is not installed."""
+        result = click_runner.invoke(__main__.main, ['bootstrap'])
+        assert 'Not a valid ModRC directory' in result.output
+        assert result.exit_code == 2
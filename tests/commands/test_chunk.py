@@ -0,0 +1,79 @@
+# pylint: disable=no-self-use
+
+from unittest import mock
+
+import pytest
+
+from modrc import __main__
+from modrc.lib import compiler, config, helper, package
+
+
+class TestChunk:
+    @pytest.mark.usefixtures('setup_teardown')
+    @pytest.mark.usefixtures('click_runner')
+    def test_add(self, click_runner):
+        """Test that a chunk is added to the given package."""
+        package.create_package('test-package')
+        result = click_runner.invoke(__main__.main, ['chunk', 'add', 'aliases', 'test-package'])
+        assert helper.get_packages_dir().joinpath('test-package', 'chunks', 'aliases').is_file()
+        assert result.exit_code == 0
+
+    @pytest.mark.usefixtures('setup_teardown')
+    @pytest.mark.usefixtures('click_runner')
+    def test_add_default_package(self, click_runner):
+        """Test that a chunk is added to the default package if no package is given."""
+        package.create_package('test-package')
+        config.update_config(helper.get_modrc_file(), {'defaultpackage': 'test-package'})
+        result = click_runner.invoke(__main__.main, ['chunk', 'add', 'aliases'])
+        assert helper.get_packages_dir().joinpath('test-package', 'chunks', 'aliases').is_file()
+        assert result.exit_code == 0
+
+    @pytest.mark.usefixtures('setup_teardown')
+    @pytest.mark.usefixtures('click_runner')
+    def test_no_package(self, click_runner):
+        """Test that an error is reported if no package is given and there is no default package."""
+        result = click_runner.invoke(__main__.main, ['chunk', 'add', 'aliases'])
+        assert 'no default package' in result.output
+        assert result.exit_code == 2
+
+    @pytest.mark.usefixtures('setup_teardown')
+    @pytest.mark.usefixtures('click_runner')
+    def test_remove(self, click_runner):
+        """Test that a chunk is only removed once confirmed."""
+        package.create_package('test-package')
+        click_runner.invoke(__main__.main, ['chunk', 'add', 'aliases', 'test-package'])
+        chunk_file = helper.get_packages_dir().joinpath('test-package', 'chunks', 'aliases')
+        result = click_runner.invoke(__main__.main, ['chunk', 'remove', 'aliases', 'test-package'], input='n\n')
+        assert chunk_file.is_file()
+        result = click_runner.invoke(__main__.main, ['chunk', 'remove', '-y', 'aliases', 'test-package'])
+        assert not chunk_file.exists()
+        assert result.exit_code == 0
+
+    @pytest.mark.usefixtures('setup_teardown')
+    @pytest.mark.usefixtures('click_runner')
+    def test_edit_compiles_dependents(self, click_runner):
+        """Test that editing a chunk compiles the live files that include it when autocompile is on."""
+        package.create_package('test-package')
+        config.update_config(helper.get_modrc_file(), {'autocompile': True})
+        click_runner.invoke(__main__.main, ['chunk', 'add', 'aliases', 'test-package'])
+        results = {'test-package': [compiler.CompileResult('file-a', None, compiler.COMPILED)]}
+        with mock.patch('click.edit') as edit, \
+                mock.patch('modrc.lib.chunk.get_dependents', return_value=['file-a']), \
+                mock.patch('modrc.lib.system.get_targets', return_value=['macos']), \
+                mock.patch('modrc.lib.compiler.compile_packages', return_value=results) as compile_packages:
+            result = click_runner.invoke(__main__.main, ['chunk', 'edit', 'aliases', 'test-package'])
+        assert edit.called
+        compile_packages.assert_called_once_with(['test-package'], ['macos'], file_names=['file-a'])
+        assert 'file-a: compiled' in result.output
+        assert result.exit_code == 0
+
+    @pytest.mark.usefixtures('setup_teardown')
+    @pytest.mark.usefixtures('click_runner')
+    def test_edit_does_not_exist(self, click_runner):
+        """Test that an error is reported if the chunk does not exist."""
+        package.create_package('test-package')
+        with mock.patch('click.edit') as edit:
+            result = click_runner.invoke(__main__.main, ['chunk', 'edit', 'aliases', 'test-package'])
+        assert not edit.called
+        assert 'Chunk does not exist' in result.output
+        assert result.exit_code == 2
@@ -0,0 +1,154 @@
+# pylint: disable=no-self-use
+
+from unittest import mock
+
+import pytest
+
+from modrc import __main__
+from modrc.lib import compiler
+
+
+class TestCompile:
+    @pytest.mark.usefixtures('setup_teardown')
+    @pytest.mark.usefixtures('click_runner')
+    def test_compile_all_packages(self, click_runner):
+        """Test that every package is compiled if no package is specified."""
+        lp = 'modrc.lib.package.list_packages'
+        cp = 'modrc.lib.compiler.compile_packages'
+        with mock.patch(lp, return_value=['a', 'b']), mock.patch(cp, return_value={}) as compile_packages:
+            result = click_runner.invoke(__main__.main, ['compile', '--system', 'macos'])
+        compile_packages.assert_called_once_with(['a', 'b'], 'macos', force=False, jobs=1)
+        assert result.exit_code == 0
+
+    @pytest.mark.usefixtures('setup_teardown')
+    @pytest.mark.usefixtures('click_runner')
+    def test_compile_package(self, click_runner):
+        """Test that only the specified package is compiled and the results are reported."""
+        results = {'test-package': [compiler.CompileResult('test-file', None, compiler.COMPILED)]}
+        with mock.patch('modrc.lib.compiler.compile_packages', return_value=results) as compile_packages:
+            result = click_runner.invoke(__main__.main, ['compile', '-p', 'test-package', '-s', 'macos'])
+        compile_packages.assert_called_once_with(['test-package'], 'macos', force=False, jobs=1)
+        assert 'test-file: compiled' in result.output
+        assert result.exit_code == 0
+
+    @pytest.mark.usefixtures('setup_teardown')
+    @pytest.mark.usefixtures('click_runner')
+    def test_compile_file(self, click_runner):
+        """Test that a single file is compiled and its status is reported."""
+        compile_result = compiler.CompileResult('test-file', None, compiler.UP_TO_DATE)
+        ub = 'modrc.lib.bootstrap.update_bootstrap'
+        with mock.patch('modrc.lib.file.compile_file', return_value=compile_result) as compile_file, \
+                mock.patch(ub, return_value=[]) as update_bootstrap:
+            result = click_runner.invoke(__main__.main, ['compile', '-p', 'test-package', '-f', 'test-file', '-s', 'macos'])
+        compile_file.assert_called_once_with('test-file', 'test-package', 'macos', force=False)
+        update_bootstrap.assert_called_once_with()
+        assert 'test-file: up to date' in result.output
+        assert result.exit_code == 0
+
+    @pytest.mark.usefixtures('setup_teardown')
+    @pytest.mark.usefixtures('click_runner')
+    def test_file_without_package(self, click_runner):
+        """Test that a file cannot be compiled without a package."""
+        with mock.patch('modrc.lib.file.compile_file') as compile_file:
+            result = click_runner.invoke(__main__.main, ['compile', '-f', 'test-file', '-s', 'macos'])
+        assert not compile_file.called
+        assert result.exit_code == 2
+
+    @pytest.mark.usefixtures('setup_teardown')
+    @pytest.mark.usefixtures('click_runner')
+    def test_package_does_not_exist(self, click_runner):
+        """Test that an error is reported if the package does not exist."""
+        result = click_runner.invoke(__main__.main, ['compile', '-p', 'test-package', '-s', 'macos'])
+        assert 'Package does not exist' in result.output
+        assert result.exit_code == 2
+
+    @pytest.mark.usefixtures('setup_teardown')
+    @pytest.mark.usefixtures('click_runner')
+    def test_force_flag(self, click_runner):
+        """Test that files are compiled even if they are up to date."""
+        with mock.patch('modrc.lib.compiler.compile_packages', return_value={}) as compile_packages:
+            result = click_runner.invoke(__main__.main, ['compile', '-p', 'test-package', '-s', 'macos', '--force'])
+        compile_packages.assert_called_once_with(['test-package'], 'macos', force=True, jobs=1)
+        assert result.exit_code == 0
+
+    @pytest.mark.usefixtures('setup_teardown')
+    @pytest.mark.usefixtures('click_runner')
+    def test_detected_system(self, click_runner):
+        """Test that the detected system is compiled for if no system is specified."""
+        gt = 'modrc.lib.system.get_targets'
+        cp = 'modrc.lib.compiler.compile_packages'
+        with mock.patch(gt, return_value=['linux.arch']), mock.patch(cp, return_value={}) as compile_packages:
+            result = click_runner.invoke(__main__.main, ['compile', '-p', 'test-package'])
+        compile_packages.assert_called_once_with(['test-package'], ['linux.arch'], force=False, jobs=1)
+        assert result.exit_code == 0
+
+    @pytest.mark.usefixtures('setup_teardown')
+    @pytest.mark.usefixtures('click_runner')
+    def test_jobs_option(self, click_runner):
+        """Test that the number of jobs is passed to the compile engine."""
+        with mock.patch('modrc.lib.compiler.compile_packages', return_value={}) as compile_packages:
+            result = click_runner.invoke(__main__.main, ['compile', '-p', 'test-package', '-s', 'macos', '-j', '4'])
+        compile_packages.assert_called_once_with(['test-package'], 'macos', force=False, jobs=4)
+        assert result.exit_code == 0
+
+    @pytest.mark.usefixtures('setup_teardown')
+    @pytest.mark.usefixtures('click_runner')
+    def test_invalid_jobs(self, click_runner):
+        """Test that at least one job is required."""
+        with mock.patch('modrc.lib.compiler.compile_packages') as compile_packages:
+            result = click_runner.invoke(__main__.main, ['compile', '-s', 'macos', '-j', '0'])
+        assert not compile_packages.called
+        assert result.exit_code == 2
+
+    @pytest.mark.usefixtures('setup_teardown')
+    @pytest.mark.usefixtures('click_runner')
+    def test_dry_run(self, click_runner):
+        """Test that a dry run lists the planned changes without compiling."""
+        plan = [
+            compiler.PlanResult('file-a', None, compiler.CHANGED, 20, 12),
+            compiler.PlanResult('file-b', None, compiler.NEW, 8, None),
+            compiler.PlanResult('file-c', None, compiler.UNCHANGED, 4, 4)
+        ]
+        with mock.patch('modrc.lib.compiler.plan_packages', return_value=plan) as plan_packages, \
+                mock.patch('modrc.lib.compiler.compile_packages') as compile_packages:
+            result = click_runner.invoke(__main__.main, ['compile', '-p', 'test-package', '-f', 'file-a', '-s', 'macos', '-n'])
+        plan_packages.assert_called_once_with(['test-package'], 'macos', file_names=['file-a'])
+        assert not compile_packages.called
+        assert 'file-a: changed (12 -> 20 bytes)' in result.output
+        assert 'file-b: new (8 bytes)' in result.output
+        assert 'file-c: unchanged (4 bytes)' in result.output
+        assert result.exit_code == 0
+
+    @pytest.mark.usefixtures('setup_teardown')
+    @pytest.mark.usefixtures('click_runner')
+    def test_targets(self, click_runner, tmp_path):
+        """Test that targets are cross compiled into the output directory."""
+        results = {
+            'linux.arch': [compiler.CompileResult('file-a', None, compiler.COMPILED)],
+            'macos': [compiler.CompileResult('file-a', None, compiler.COMPILED)]
+        }
+        with mock.patch('modrc.lib.compiler.cross_compile', return_value=results) as cross_compile, \
+                mock.patch('modrc.lib.compiler.compile_packages') as compile_packages:
+            result = click_runner.invoke(__main__.main, ['compile', '-p', 'test-package', '-t', 'linux.arch', '-t', 'macos',
+                                                         '-o', str(tmp_path)])
+        cross_compile.assert_called_once_with(['test-package'], ['linux.arch', 'macos'], tmp_path.resolve(), jobs=1,
+                                              file_names=None)
+        assert not compile_packages.called
+        assert 'linux.arch/file-a: compiled' in result.output
+        assert 'macos/file-a: compiled' in result.output
+        assert result.exit_code == 0
+
+    @pytest.mark.usefixtures('setup_teardown')
+    @pytest.mark.usefixtures('click_runner')
+    @pytest.mark.parametrize('args', [
+        ['-t', 'macos'],
+        ['-t', 'macos', '-o', 'output', '-s', 'linux'],
+        ['-t', 'macos', '-o', 'output', '-n'],
+        ['-o', 'output']
+    ])
+    def test_invalid_targets(self, click_runner, args):
+        """Test that targets need an output directory and cannot be combined with a system or a dry run."""
+        with mock.patch('modrc.lib.compiler.cross_compile') as cross_compile:
+            result = click_runner.invoke(__main__.main, ['compile'] + args)
+        assert not cross_compile.called
+        assert result.exit_code == 2
@@ -0,0 +1,42 @@
+# pylint: disable=no-self-use
+
+from unittest import mock
+
+import pytest
+
+from modrc import __main__
+from modrc.lib import deploy
+
+
+class TestDeploy:
+    @pytest.mark.usefixtures('setup_teardown')
+    @pytest.mark.usefixtures('click_runner')
+    def test_plan_printed(self, click_runner):
+        """Test that the planned changes are printed in a dry run."""
+        actions = [deploy.Action(deploy.CREATE, '/home/.bashrc', '/live/bashrc'), deploy.Action(deploy.REMOVE, '/home/.vimrc', '/live/vimrc')]
+        with mock.patch('modrc.lib.deploy.deploy', return_value=actions) as deploy_live:
+            result = click_runner.invoke(__main__.main, ['deploy', '--copy', '--dry-run'])
+        deploy_live.assert_called_once_with(deploy.COPY, dry_run=True)
+        assert 'create: /home/.bashrc -> /live/bashrc' in result.output
+        assert 'remove: /home/.vimrc' in result.output
+        assert result.exit_code == 0
+
+    @pytest.mark.usefixtures('setup_teardown')
+    @pytest.mark.usefixtures('click_runner')
+    def test_nothing_to_do(self, click_runner):
+        """Test that an up to date deployment is reported."""
+        with mock.patch('modrc.lib.deploy.deploy', return_value=[]) as deploy_live:
+            result = click_runner.invoke(__main__.main, ['deploy'])
+        deploy_live.assert_called_once_with(deploy.LINK, dry_run=False)
+        assert 'Everything is deployed' in result.output
+        assert result.exit_code == 0
+
+    @pytest.mark.usefixtures('setup_teardown')
+    @pytest.mark.usefixtures('click_runner')
+    def test_conflict(self, click_runner):
+        """Test that conflicts are reported with a failing exit code."""
+        actions = [deploy.Action(deploy.CONFLICT, '/home/.bashrc', '/live/bashrc')]
+        with mock.patch('modrc.lib.deploy.deploy', return_value=actions):
+            result = click_runner.invoke(__main__.main, ['deploy'])
+        assert 'not managed by ModRC' in result.output
+        assert result.exit_code == 1
@@ -0,0 +1,59 @@
+# pylint: disable=no-self-use
+
+from unittest import mock
+
+import pytest
+
+from modrc import __main__, exceptions
+from modrc.lib import export
+
+
+class TestExport:
+    @pytest.mark.usefixtures('setup_teardown')
+    @pytest.mark.usefixtures('click_runner')
+    def test_archive_per_target(self, click_runner, tmp_path):
+        """Test that an archive is exported for each target and reported."""
+        results = [export.ExportResult('linux', tmp_path.joinpath('linux.tar'), 3, 81)]
+        with mock.patch('modrc.lib.package.list_packages', return_value=['a', 'b']), \
+                mock.patch('modrc.lib.export.export_bundles', return_value=results) as export_bundles:
+            result = click_runner.invoke(__main__.main, ['export', '-t', 'linux', '-o', str(tmp_path), '--hashes'])
+        export_bundles.assert_called_once_with(['a', 'b'], ['linux'], tmp_path.resolve(), archive_format=export.TAR,
+                                               single=False, hashes=True, file_names=None)
+        assert 'linux: 3 files, 81 bytes -> {}'.format(tmp_path.joinpath('linux.tar')) in result.output
+        assert result.exit_code == 0
+
+    @pytest.mark.usefixtures('setup_teardown')
+    @pytest.mark.usefixtures('click_runner')
+    def test_stdout(self, click_runner):
+        """Test that a single archive can be streamed to stdout."""
+        with mock.patch('modrc.lib.export.export_bundles', return_value=[]) as export_bundles:
+            result = click_runner.invoke(__main__.main, ['export', '-p', 'test-package', '-f', 'file-a', '-t', 'linux',
+                                                         '-o', '-', '--single', '--format', 'zip'])
+        assert export_bundles.call_args[1] == {'archive_format': export.ZIP, 'single': True, 'hashes': False,
+                                               'file_names': ['file-a']}
+        assert result.exit_code == 0
+
+    @pytest.mark.usefixtures('setup_teardown')
+    @pytest.mark.usefixtures('click_runner')
+    def test_stdout_needs_single(self, click_runner):
+        """Test that only a single archive can be streamed to stdout."""
+        with mock.patch('modrc.lib.export.export_bundles') as export_bundles:
+            result = click_runner.invoke(__main__.main, ['export', '-t', 'linux', '-o', '-'])
+        assert not export_bundles.called
+        assert result.exit_code == 2
+
+    @pytest.mark.usefixtures('setup_teardown')
+    @pytest.mark.usefixtures('click_runner')
+    def test_package_does_not_exist(self, click_runner, tmp_path):
+        """Test that an error is shown if the package does not exist."""
+        result = click_runner.invoke(__main__.main, ['export', '-p', 'not-a-package', '-t', 'linux', '-o', str(tmp_path)])
+        assert 'Package does not exist' in result.output
+        assert result.exit_code == 2
+
+    @pytest.mark.usefixtures('click_runner')
+    def test_not_installed(self, click_runner, tmp_path):
+        """Test that an error is shown if ModRC is not installed."""
+        with mock.patch('modrc.lib.package.list_packages', side_effect=exceptions.ModRCIntegrityError('Not installed')):
+            result = click_runner.invoke(__main__.main, ['export', '-t', 'linux', '-o', str(tmp_path)])
+        assert 'Not installed' in result.output
+        assert result.exit_code == 2
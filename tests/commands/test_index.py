@@ -0,0 +1,30 @@
+# pylint: disable=no-self-use
+
+from unittest import mock
+
+import pytest
+
+from modrc import __main__
+
+
+class TestRebuild:
+    @pytest.mark.usefixtures('setup_teardown')
+    @pytest.mark.usefixtures('click_runner')
+    def test_rebuild(self, click_runner):
+        """Test that the index is rebuilt and summarized."""
+        rebuilt = {'version': 2, 'stamp': 0, 'packages': {
+            'test-package': {'stamp': 0, 'files': {'test-file': {'stamp': 0, 'filters': ['global']}}}
+        }}
+        with mock.patch('modrc.lib.index.rebuild_index', return_value=rebuilt) as rebuild_index:
+            result = click_runner.invoke(__main__.main, ['index', 'rebuild'])
+        rebuild_index.assert_called_once_with()
+        assert 'Indexed 1 packages, 1 files and 1 filters' in result.output
+        assert result.exit_code == 0
+
+    @pytest.mark.usefixtures('teardown')
+    @pytest.mark.usefixtures('click_runner')
+    def test_modrc_not_installed(self, click_runner):
+        """Test that an error is reported if ModRC is not installed."""
+        result = click_runner.invoke(__main__.main, ['index', 'rebuild'])
+        assert 'Not a valid ModRC directory' in result.output
+        assert result.exit_code == 2
@@ -0,0 +1,43 @@
+# pylint: disable=no-self-use
+
+from unittest import mock
+
+import pytest
+
+from modrc import __main__
+from modrc.lib import sync
+
+
+class TestSync:
+    @pytest.mark.usefixtures('setup_teardown')
+    @pytest.mark.usefixtures('click_runner')
+    def test_sync_all_packages(self, click_runner):
+        """Test that every package is synced if no package is specified and timings are reported."""
+        results = [sync.SyncResult('a', sync.SYNCED, 0.25, None), sync.SyncResult('b', sync.UP_TO_DATE, 0.1, None)]
+        lp = 'modrc.lib.package.list_packages'
+        sp = 'modrc.lib.sync.sync_packages'
+        with mock.patch(lp, return_value=['a', 'b']), mock.patch(sp, return_value=results) as sync_packages:
+            result = click_runner.invoke(__main__.main, ['package', 'sync', '-j', '8'])
+        sync_packages.assert_called_once_with(['a', 'b'], jobs=8)
+        assert 'a: synced (0.25s)' in result.output
+        assert 'b: up to date (0.10s)' in result.output
+        assert result.exit_code == 0
+
+    @pytest.mark.usefixtures('setup_teardown')
+    @pytest.mark.usefixtures('click_runner')
+    def test_sync_failed(self, click_runner):
+        """Test that a failed sync is reported with its error."""
+        results = [sync.SyncResult('a', sync.FAILED, 0.5, 'fatal: no remote')]
+        with mock.patch('modrc.lib.sync.sync_packages', return_value=results) as sync_packages:
+            result = click_runner.invoke(__main__.main, ['package', 'sync', 'a'])
+        sync_packages.assert_called_once_with(['a'], jobs=4)
+        assert 'fatal: no remote' in result.output
+        assert result.exit_code == 1
+
+    @pytest.mark.usefixtures('setup_teardown')
+    @pytest.mark.usefixtures('click_runner')
+    def test_package_does_not_exist(self, click_runner):
+        """Test that an error is reported if the package does not exist."""
+        result = click_runner.invoke(__main__.main, ['package', 'sync', 'test-package'])
+        assert 'Package does not exist' in result.output
+        assert result.exit_code == 2
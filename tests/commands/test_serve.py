@@ -0,0 +1,28 @@
+# pylint: disable=no-self-use
+
+from unittest import mock
+
+import pytest
+
+from modrc import __main__
+
+
+class TestServe:
+    @pytest.mark.usefixtures('setup_teardown')
+    @pytest.mark.usefixtures('click_runner')
+    def test_serve(self, click_runner):
+        """Test that the server is run until it is interrupted and then closed."""
+        with mock.patch('modrc.lib.server.create_server') as create_server:
+            create_server.return_value.serve_forever.side_effect = KeyboardInterrupt
+            result = click_runner.invoke(__main__.main, ['serve'])
+        assert 'Serving on' in result.output
+        create_server.return_value.server_close.assert_called_once_with()
+        assert result.exit_code == 0
+
+    @pytest.mark.usefixtures('teardown')
+    @pytest.mark.usefixtures('click_runner')
+    def test_modrc_not_installed(self, click_runner):
+        """Test that an error is reported if ModRC is not installed."""
+        result = click_runner.invoke(__main__.main, ['serve'])
+        assert 'Not a valid ModRC directory' in result.output
+        assert result.exit_code == 2
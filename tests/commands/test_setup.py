@@ -5,7 +5,7 @@ from unittest import mock
 import pytest
 
 from modrc import __main__
-from modrc.lib import setup
+from modrc.lib import setup, sync
 
 class TestInstallNonInteractive:
     @pytest.mark.usefixtures('teardown')
@@ -36,10 +36,38 @@ class TestInstallNonInteractive:
             result = click_runner.invoke(__main__.main, ['setup', 'install', '--ni'])
         populate_modrc_file.assert_called_once_with(None, 'vim', False, False)
         assert not create_package.called
-        # TODO: setup command URL clone option #44
         assert result.exit_code == 0
 
-    # TODO: setup command URL clone option #44
+    @pytest.mark.usefixtures('teardown')
+    @pytest.mark.usefixtures('click_runner')
+    def test_url_option(self, click_runner):
+        """Test that every URL is cloned and the first package becomes the default package."""
+        results = [sync.SyncResult('a', sync.CLONED, 0.5, None), sync.SyncResult('b', sync.CLONED, 0.25, None)]
+
+        def clone_packages(repo_urls, jobs, mode, progress):
+            for result in results:
+                progress(result)
+            return results
+
+        pmf = 'modrc.lib.setup.populate_modrc_file'
+        cp = 'modrc.lib.sync.clone_packages'
+        with mock.patch(pmf) as populate_modrc_file, mock.patch(cp, side_effect=clone_packages) as clone:
+            result = click_runner.invoke(__main__.main, ['setup', 'install', '--ni', '-u', 'file:///a.git', '-u', 'file:///b.git'])
+        clone.assert_called_once_with(['file:///a.git', 'file:///b.git'], jobs=4, mode=sync.BLOBLESS, progress=mock.ANY)
+        populate_modrc_file.assert_called_once_with('a', 'vim', False, False)
+        assert '[1/2] a: cloned (0.50s)' in result.output
+        assert '[2/2] b: cloned (0.25s)' in result.output
+        assert result.exit_code == 0
+
+    @pytest.mark.usefixtures('teardown')
+    @pytest.mark.usefixtures('click_runner')
+    def test_shallow_flag(self, click_runner):
+        """Test that shallow clones are made and a failed clone is reported."""
+        results = [sync.SyncResult('a', sync.FAILED, 0.5, 'fatal: not found')]
+        with mock.patch('modrc.lib.sync.clone_packages', return_value=results) as clone:
+            result = click_runner.invoke(__main__.main, ['setup', 'install', '--ni', '-u', 'file:///a.git', '--shallow', '-j', '2'])
+        clone.assert_called_once_with(['file:///a.git'], jobs=2, mode=sync.SHALLOW, progress=mock.ANY)
+        assert result.exit_code == 1
 
     @pytest.mark.usefixtures('teardown')
     @pytest.mark.usefixtures('click_runner')
@@ -48,7 +76,6 @@ class TestInstallNonInteractive:
         with mock.patch('modrc.lib.package.create_package') as create_package:
             result = click_runner.invoke(__main__.main, ['setup', 'install', '--ni', '--name', 'test-package', '--url', 'http://example.com'])
         create_package.assert_called_once_with('test-package', repo_url='http://example.com')
-        # TODO: setup command URL clone option #44
         assert result.exit_code == 0
 
     @pytest.mark.usefixtures('teardown')
@@ -58,7 +85,6 @@ class TestInstallNonInteractive:
         with mock.patch('modrc.lib.package.create_package') as create_package:
             result = click_runner.invoke(__main__.main, ['setup', 'install', '--ni', '--name', 'test-package'])
         create_package.assert_called_once_with('test-package', repo_url=None)
-        # TODO: setup command URL clone option #44
         assert result.exit_code == 0
 
     @pytest.mark.usefixtures('teardown')
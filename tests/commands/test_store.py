@@ -0,0 +1,39 @@
+# pylint: disable=no-self-use
+
+from unittest import mock
+
+import pytest
+
+from modrc import __main__
+from modrc.lib import store
+
+
+class TestStore:
+    @pytest.mark.usefixtures('setup_teardown')
+    @pytest.mark.usefixtures('click_runner')
+    def test_dedup(self, click_runner):
+        """Test that the outcome of a dedup is reported."""
+        with mock.patch('modrc.lib.store.dedup', return_value=store.DedupResult(5, 2, 4, 51)) as dedup:
+            result = click_runner.invoke(__main__.main, ['store', 'dedup'])
+        dedup.assert_called_once_with(dry_run=False)
+        assert '5 filters, 2 distinct, 4 linked, 51 bytes saved' in result.output
+        assert result.exit_code == 0
+
+    @pytest.mark.usefixtures('setup_teardown')
+    @pytest.mark.usefixtures('click_runner')
+    def test_dedup_dry_run(self, click_runner):
+        """Test that a dry run reports the filters that would be linked."""
+        with mock.patch('modrc.lib.store.dedup', return_value=store.DedupResult(5, 2, 4, 51)) as dedup:
+            result = click_runner.invoke(__main__.main, ['store', 'dedup', '-n'])
+        dedup.assert_called_once_with(dry_run=True)
+        assert '4 to be linked' in result.output
+        assert result.exit_code == 0
+
+    @pytest.mark.usefixtures('setup_teardown')
+    @pytest.mark.usefixtures('click_runner')
+    def test_restore(self, click_runner):
+        """Test that the number of restored filters is reported."""
+        with mock.patch('modrc.lib.store.restore', return_value=3):
+            result = click_runner.invoke(__main__.main, ['store', 'restore'])
+        assert '3 filters restored' in result.output
+        assert result.exit_code == 0
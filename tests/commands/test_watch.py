@@ -0,0 +1,42 @@
+# pylint: disable=no-self-use
+
+from unittest import mock
+
+import pytest
+
+from modrc import __main__, exceptions
+from modrc.lib import compiler
+
+
+class TestWatch:
+    @pytest.mark.usefixtures('setup_teardown')
+    @pytest.mark.usefixtures('click_runner')
+    def test_results_reported(self, click_runner):
+        """Test that the results of every compile are reported."""
+        results = [{'test-package': [compiler.CompileResult('test-file', None, compiler.COMPILED)]}, None]
+        with mock.patch('modrc.lib.watch.watch', return_value=iter(results)) as watch:
+            result = click_runner.invoke(__main__.main, ['watch', '-s', 'macos', '--poll', '-d', '0.5'])
+        watch.assert_called_once_with('macos', debounce=0.5, poll=True)
+        assert 'test-file: compiled' in result.output
+        assert 'autocompile is off' in result.output
+        assert result.exit_code == 0
+
+    @pytest.mark.usefixtures('setup_teardown')
+    @pytest.mark.usefixtures('click_runner')
+    def test_error_reported(self, click_runner):
+        """Test that an error compiling a burst is reported and the watch goes on."""
+        results = [exceptions.ModRCChunkDoesNotExistError('Chunk does not exist'),
+                   {'test-package': [compiler.CompileResult('test-file', None, compiler.COMPILED)]}]
+        with mock.patch('modrc.lib.watch.watch', return_value=iter(results)):
+            result = click_runner.invoke(__main__.main, ['watch', '-s', 'macos'])
+        assert 'Changes not compiled: Chunk does not exist' in result.output
+        assert 'test-file: compiled' in result.output
+        assert result.exit_code == 0
+
+    @pytest.mark.usefixtures('teardown')
+    @pytest.mark.usefixtures('click_runner')
+    def test_modrc_not_installed(self, click_runner):
+        """Test that an error is reported if ModRC is not installed."""
+        result = click_runner.invoke(__main__.main, ['watch', '-s', 'macos'])
+        assert 'Not a valid ModRC directory' in result.output
+        assert result.exit_code == 2
@@ -0,0 +1,116 @@
+import os
+import pathlib
+import shutil
+import subprocess
+import tempfile
+import time
+import unittest
+
+from modrc.lib import bootstrap, compiler, file, helper, package, setup
+
+
+class TestSelectSources(unittest.TestCase):
+    def test_select_sources(self):
+        """Test that each shell only sources the live files meant for it."""
+        live_names = ['vimrc', 'aliases.sh', 'prompt.bash', 'prompt.zsh', 'bashrc', 'zshrc']
+        self.assertEqual(bootstrap.select_sources(live_names, 'sh'), ['aliases.sh'])
+        self.assertEqual(bootstrap.select_sources(live_names, 'bash'), ['aliases.sh', 'prompt.bash'])
+        self.assertEqual(bootstrap.select_sources(live_names, 'zsh'), ['aliases.sh', 'prompt.zsh'])
+
+
+class TestUpdateBootstrap(unittest.TestCase):
+    def setUp(self):
+        # setup a temporary mock home directory with a shell file
+        self.temp = tempfile.TemporaryDirectory()
+        self.temp_dir = pathlib.Path(self.temp.name)
+        setup.initial_setup(self.temp_dir)
+        package.create_package('test-package')
+        file.create_file('aliases.sh', 'test-package')
+        self.filter_path = file.create_file_filter('global', 'aliases.sh', 'test-package')
+        self.filter_path.write_text('MODRC_TEST=sourced\n')
+        self.modrc_dir = helper.get_modrc_dir()
+
+    def tearDown(self):
+        # destroy the ModRC symlink
+        setup.teardown(ignore_errors=True)
+        # destroy the temp directory
+        self.temp.cleanup()
+
+    def test_written_by_compile(self):
+        """Test that compiling writes a bootstrap for every shell and touches the stamp."""
+        compiler.compile_package('test-package', 'linux')
+        for shell in bootstrap.SHELL_SOURCES:
+            script = bootstrap.get_bootstrap_file(self.modrc_dir, shell).read_text()
+            self.assertIn(str(helper.get_live_dir().joinpath('aliases.sh')), script)
+        self.assertTrue(bootstrap.get_stamp_file(self.modrc_dir).is_file())
+
+    def test_unchanged_not_written(self):
+        """Test that the bootstraps are not written again if the live files did not change."""
+        self.assertEqual(len(bootstrap.update_bootstrap()), len(bootstrap.SHELL_SOURCES))
+        self.assertEqual(bootstrap.update_bootstrap(), [])
+        helper.get_live_dir().joinpath('prompt.zsh').touch()
+        self.assertEqual(bootstrap.update_bootstrap(), [bootstrap.get_bootstrap_file(self.modrc_dir, 'zsh')])
+
+    @unittest.skipIf(shutil.which('sh') is None, 'sh is not available')
+    def test_sourced(self):
+        """Test that sourcing the bootstrap sources the live files."""
+        compiler.compile_package('test-package', 'linux')
+        output = self.source('sh')
+        self.assertEqual(output, 'sourced\n')
+
+    @unittest.skipIf(shutil.which('sh') is None, 'sh is not available')
+    def test_sourced_again(self):
+        """Test that a live file sourcing the bootstrap again does not run it twice."""
+        bootstrap_file = bootstrap.get_bootstrap_file(self.modrc_dir, 'sh')
+        self.filter_path.write_text('MODRC_TEST="${{MODRC_TEST}}sourced"\n. "{}"\n'.format(bootstrap_file))
+        compiler.compile_package('test-package', 'linux')
+        output = self.source('sh')
+        self.assertEqual(output, 'sourced\n')
+
+    @unittest.skipIf(shutil.which('sh') is None, 'sh is not available')
+    def test_stale_compiled(self):
+        """Test that sourcing the bootstrap compiles again if a filter changed since the last compile."""
+        compiler.compile_package('test-package', 'linux')
+        past = time.time() - 60
+        os.utime(str(bootstrap.get_stamp_file(self.modrc_dir)), (past, past))
+        marker = self.fake_modrc()
+        output = self.source('sh', path=str(self.temp_dir.joinpath('bin')))
+        self.assertTrue(marker.exists())
+        self.assertEqual(output, 'sourced\n')
+
+    @unittest.skipIf(shutil.which('sh') is None, 'sh is not available')
+    def test_git_changes_ignored(self):
+        """Test that sourcing the bootstrap does not compile again if only git metadata changed."""
+        compiler.compile_package('test-package', 'linux')
+        past = time.time() - 60
+        for root, _, files in os.walk(str(helper.get_packages_dir())):
+            for path in [root] + [os.path.join(root, name) for name in files]:
+                os.utime(path, (past, past))
+        os.utime(str(bootstrap.get_stamp_file(self.modrc_dir)), (past + 30, past + 30))
+        git_dir = helper.get_packages_dir().joinpath('test-package', '.git')
+        git_dir.mkdir()
+        git_dir.joinpath('FETCH_HEAD').touch()
+        os.utime(str(git_dir.parent), (past, past))
+        marker = self.fake_modrc()
+        output = self.source('sh', path=str(self.temp_dir.joinpath('bin')))
+        self.assertFalse(marker.exists())
+        self.assertEqual(output, 'sourced\n')
+
+    def fake_modrc(self):
+        # a stand in for modrc that records that it was run
+        bin_dir = self.temp_dir.joinpath('bin')
+        bin_dir.mkdir()
+        marker = self.temp_dir.joinpath('compiled')
+        fake_modrc = bin_dir.joinpath('modrc')
+        fake_modrc.write_text('#!/bin/sh\ntouch {}\ntouch {}\n'.format(marker, bootstrap.get_stamp_file(self.modrc_dir)))
+        fake_modrc.chmod(0o755)
+        return marker
+
+    def source(self, shell, path=None):
+        bootstrap_file = bootstrap.get_bootstrap_file(self.modrc_dir, shell)
+        env = dict(os.environ)
+        if path is not None:
+            env['PATH'] = path + os.pathsep + env['PATH']
+        completed = subprocess.run([shell, '-c', '. "{}"; echo "$MODRC_TEST"'.format(bootstrap_file)], env=env,
+                                   stdout=subprocess.PIPE, universal_newlines=True, check=True)
+        return completed.stdout
@@ -0,0 +1,236 @@
+import pathlib
+import tempfile
+import unittest
+from unittest import mock
+
+from parameterized import parameterized
+
+from modrc import exceptions
+from modrc.lib import chunk, compiler, file, helper, manifest, package, setup
+
+
+class TestChunk(unittest.TestCase):
+    def setUp(self):
+        # setup a temporary mock home directory
+        self.temp = tempfile.TemporaryDirectory()
+        self.temp_dir = pathlib.Path(self.temp.name)
+        setup.initial_setup(self.temp_dir)
+        self.package_dir = package.create_package('test-package')
+
+    def tearDown(self):
+        # destroy the ModRC symlink
+        setup.teardown(ignore_errors=True)
+        # destroy the temp directory
+        self.temp.cleanup()
+
+    def test_create_chunk(self):
+        """Test that a chunk is created in the chunks directory of the package."""
+        chunk_file = chunk.create_chunk('aliases', 'test-package')
+        self.assertEqual(chunk_file, self.package_dir.joinpath('chunks', 'aliases'))
+        self.assertTrue(chunk_file.is_file())
+
+    def test_chunk_exists(self):
+        """Test that an exception is raised if the chunk already exists."""
+        chunk.create_chunk('aliases', 'test-package')
+        with self.assertRaises(exceptions.ModRCChunkExistsError):
+            chunk.create_chunk('aliases', 'test-package')
+
+    @parameterized.expand([('other/aliases',), ('..',), ('two words',), ('',)])
+    def test_invalid_name(self, chunk_name):
+        """Test that an exception is raised for an invalid chunk name."""
+        with self.assertRaises(exceptions.ModRCChunkNameError):
+            chunk.create_chunk(chunk_name, 'test-package')
+
+    def test_package_does_not_exist(self):
+        """Test that an exception is raised if the package does not exist."""
+        with self.assertRaises(exceptions.ModRCPackageDoesNotExistError):
+            chunk.create_chunk('aliases', 'other-package')
+
+    def test_remove_chunk(self):
+        """Test that a chunk is removed."""
+        chunk_file = chunk.create_chunk('aliases', 'test-package')
+        chunk.remove_chunk('aliases', 'test-package')
+        self.assertFalse(chunk_file.exists())
+        with self.assertRaises(exceptions.ModRCChunkDoesNotExistError):
+            chunk.remove_chunk('aliases', 'test-package')
+
+
+class TestChunkResolver(unittest.TestCase):
+    def setUp(self):
+        # setup a temporary mock home directory
+        self.temp = tempfile.TemporaryDirectory()
+        self.temp_dir = pathlib.Path(self.temp.name)
+        setup.initial_setup(self.temp_dir)
+        package.create_package('a-package')
+        package.create_package('b-package')
+
+    def tearDown(self):
+        # destroy the ModRC symlink
+        setup.teardown(ignore_errors=True)
+        # destroy the temp directory
+        self.temp.cleanup()
+
+    def add_chunk(self, chunk_name, content, package_name='a-package'):
+        chunk_file = chunk.create_chunk(chunk_name, package_name)
+        chunk_file.write_text(content)
+        return str(chunk_file)
+
+    def test_expand(self):
+        """Test that an include line is replaced by the chunk after any comment characters."""
+        aliases = self.add_chunk('aliases', 'alias ll="ls -l"\n')
+        resolver = chunk.get_resolver()
+        data, chunk_paths = resolver.expand('a-package', b'A\n# modrc:include aliases\nB\n" modrc:include aliases\n')
+        self.assertEqual(data, b'A\nalias ll="ls -l"\nB\nalias ll="ls -l"\n')
+        self.assertEqual(chunk_paths, {aliases})
+
+    def test_no_includes(self):
+        """Test that contents without includes are returned as they are."""
+        self.assertEqual(chunk.get_resolver().expand('a-package', b'modrc:include\n'), (b'modrc:include\n', frozenset()))
+
+    def test_nested(self):
+        """Test that chunks included by chunks are expanded and depended on."""
+        outer = self.add_chunk('outer', 'OUTER\n# modrc:include b-package/inner\n')
+        inner = self.add_chunk('inner', 'INNER', 'b-package')
+        data, chunk_paths = chunk.get_resolver().expand('a-package', b'# modrc:include outer\nEND\n')
+        self.assertEqual(data, b'OUTER\nINNER\nEND\n')
+        self.assertEqual(chunk_paths, {outer, inner})
+
+    def test_read_once(self):
+        """Test that a chunk is read once however many times it is included."""
+        self.add_chunk('aliases', 'ALIASES\n')
+        self.add_chunk('outer', '# modrc:include aliases\n')
+        resolver = chunk.get_resolver()
+        with mock.patch('modrc.lib.chunk.open', side_effect=open, create=True) as chunk_open:
+            for _ in range(50):
+                resolver.expand('a-package', b'# modrc:include aliases\n# modrc:include outer\n')
+        self.assertEqual(chunk_open.call_count, 2)
+
+    def test_cycle(self):
+        """Test that an exception is raised if chunks include each other."""
+        self.add_chunk('first', '# modrc:include second\n')
+        self.add_chunk('second', '# modrc:include first\n')
+        with self.assertRaises(exceptions.ModRCChunkCycleError) as raised:
+            chunk.get_resolver().expand('a-package', b'# modrc:include first\n')
+        self.assertIn('a-package/first -> a-package/second -> a-package/first', str(raised.exception))
+
+    def test_missing(self):
+        """Test that an exception is raised if an included chunk does not exist."""
+        self.add_chunk('aliases', '')
+        with self.assertRaises(exceptions.ModRCChunkDoesNotExistError):
+            chunk.get_resolver().expand('a-package', b'# modrc:include b-package/aliases\n')
+
+    def test_invalid_name(self):
+        """Test that includes cannot reach outside of the chunks directory."""
+        self.add_chunk('aliases', '')
+        resolver = chunk.get_resolver()
+        for reference in ['..', '../package.yml', 'b-package/..', '../a-package']:
+            with self.assertRaises(exceptions.ModRCChunkNameError):
+                resolver.expand('a-package', '# modrc:include {}\n'.format(reference).encode())
+
+    def test_not_a_chunk(self):
+        """Test that an include of a directory is reported as a chunk that does not exist."""
+        self.add_chunk('aliases', '')
+        helper.get_packages_dir().joinpath('a-package', 'chunks', 'directory').mkdir()
+        with self.assertRaises(exceptions.ModRCChunkDoesNotExistError):
+            chunk.get_resolver().expand('a-package', b'# modrc:include directory\n')
+
+    def test_no_chunks(self):
+        """Test that an include is an error when no package has chunks, and filters without includes are kept."""
+        resolver = chunk.get_resolver()
+        filter_path = helper.get_packages_dir().joinpath('a-package', 'filter')
+        filter_path.write_text('# modrc:include greet\n')
+        with self.assertRaises(exceptions.ModRCChunkDoesNotExistError):
+            resolver.expand_filters('a-package', [str(filter_path)])
+        filter_path.write_text('PLAIN\n')
+        self.assertEqual(resolver.expand_filters('a-package', [str(filter_path)]), ([str(filter_path)], frozenset()))
+
+    def test_plain_filters_not_read(self):
+        """Test that filters without includes are searched a block at a time and never read whole."""
+        resolver = chunk.get_resolver()
+        filter_path = helper.get_packages_dir().joinpath('a-package', 'filter')
+        filter_path.write_bytes(b'x' * (3 * chunk.SCAN_BUFFER_SIZE))
+        with mock.patch.object(resolver.blobs, 'read') as read:
+            self.assertEqual(resolver.expand_filters('a-package', [str(filter_path)]), ([str(filter_path)], frozenset()))
+        self.assertFalse(read.called)
+
+    def test_marker_across_blocks(self):
+        """Test that an include marker split between two blocks is found."""
+        filter_path = helper.get_packages_dir().joinpath('a-package', 'filter')
+        for offset in range(1, len(chunk.INCLUDE_MARKER)):
+            filter_path.write_bytes(b'x' * (chunk.SCAN_BUFFER_SIZE - offset) + chunk.INCLUDE_MARKER + b' aliases\n')
+            self.assertTrue(chunk.has_include(str(filter_path)))
+        filter_path.write_bytes(b'x' * (chunk.SCAN_BUFFER_SIZE - 3) + chunk.INCLUDE_MARKER[:-1] + b'\n')
+        self.assertFalse(chunk.has_include(str(filter_path)))
+
+
+class TestCompileChunks(unittest.TestCase):
+    def setUp(self):
+        # setup a temporary mock home directory
+        self.temp = tempfile.TemporaryDirectory()
+        self.temp_dir = pathlib.Path(self.temp.name)
+        setup.initial_setup(self.temp_dir)
+        package.create_package('test-package')
+        self.chunk_file = chunk.create_chunk('aliases', 'test-package')
+        self.chunk_file.write_text('ALIASES\n')
+        for file_name in ['file-a', 'file-b', 'file-c']:
+            file.create_file(file_name, 'test-package')
+            content = '{}\n# modrc:include aliases\n'.format(file_name) if file_name != 'file-c' else 'C\n'
+            file.create_file_filter('global', file_name, 'test-package').write_text(content)
+        self.live_dir = helper.get_live_dir()
+
+    def tearDown(self):
+        # destroy the ModRC symlink
+        setup.teardown(ignore_errors=True)
+        # destroy the temp directory
+        self.temp.cleanup()
+
+    def statuses(self, results):
+        return {result.file_name: result.status for result in results['test-package']}
+
+    def test_compile(self):
+        """Test that includes are expanded when compiling and the dependents are recorded."""
+        compiler.compile_packages(['test-package'], 'linux', jobs=4)
+        self.assertEqual(self.live_dir.joinpath('file-a').read_text(), 'file-a\nALIASES\n')
+        self.assertEqual(self.live_dir.joinpath('file-c').read_text(), 'C\n')
+        compile_manifest = manifest.load_manifest(helper.get_modrc_dir())
+        self.assertEqual(chunk.get_dependents(compile_manifest, self.chunk_file), ['file-a', 'file-b'])
+
+    def test_chunk_added_later(self):
+        """Test that an include in a package without chunks fails until the chunk is added."""
+        package.create_package('other-package')
+        file.create_file('greeting', 'other-package')
+        file.create_file_filter('global', 'greeting', 'other-package').write_text('# modrc:include greet\n')
+        with self.assertRaises(exceptions.ModRCChunkDoesNotExistError):
+            compiler.compile_packages(['other-package'], 'linux')
+        self.assertFalse(self.live_dir.joinpath('greeting').exists())
+        chunk.create_chunk('greet', 'other-package').write_text('HELLO\n')
+        results = compiler.compile_packages(['other-package'], 'linux')
+        self.assertEqual(results['other-package'][0].status, compiler.COMPILED)
+        self.assertEqual(self.live_dir.joinpath('greeting').read_text(), 'HELLO\n')
+
+    def test_compile_file(self):
+        """Test that includes are expanded when compiling a single file."""
+        file.compile_file('file-b', 'test-package', 'linux')
+        self.assertEqual(self.live_dir.joinpath('file-b').read_text(), 'file-b\nALIASES\n')
+
+    def test_changed_chunk(self):
+        """Test that only the live files including a changed chunk are compiled again."""
+        compiler.compile_packages(['test-package'], 'linux')
+        self.chunk_file.write_text('NEW ALIASES\n')
+        results = compiler.compile_packages(['test-package'], 'linux')
+        self.assertEqual(self.statuses(results), {
+            'file-a': compiler.COMPILED, 'file-b': compiler.COMPILED, 'file-c': compiler.UP_TO_DATE
+        })
+        self.assertEqual(self.live_dir.joinpath('file-b').read_text(), 'file-b\nNEW ALIASES\n')
+        results = compiler.compile_packages(['test-package'], 'linux')
+        self.assertEqual(set(self.statuses(results).values()), {compiler.UP_TO_DATE})
+
+    def test_plan(self):
+        """Test that a dry run expands includes like a compile."""
+        compiler.compile_packages(['test-package'], 'linux')
+        self.assertEqual({result.status for result in compiler.plan_packages(['test-package'], 'linux')},
+                         {compiler.UNCHANGED})
+        self.chunk_file.write_text('NEW ALIASES\n')
+        plan = {result.file_name: result.status for result in compiler.plan_packages(['test-package'], 'linux')}
+        self.assertEqual(plan, {'file-a': compiler.CHANGED, 'file-b': compiler.CHANGED, 'file-c': compiler.UNCHANGED})
+
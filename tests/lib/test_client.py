@@ -0,0 +1,44 @@
+import unittest
+from unittest import mock
+
+from modrc.lib import client
+
+
+class TestForward(unittest.TestCase):
+    def test_command_not_forwarded(self):
+        """Test that commands which need a terminal or change the layout are not forwarded."""
+        with mock.patch('os.path.exists', return_value=True), mock.patch('modrc.lib.client.send_request') as send_request:
+            self.assertIsNone(client.forward(['setup', 'install']))
+            self.assertIsNone(client.forward([]))
+        self.assertFalse(send_request.called)
+
+    def test_server_not_running(self):
+        """Test that nothing is forwarded if there is no server socket."""
+        with mock.patch('os.path.exists', return_value=False), mock.patch('modrc.lib.client.send_request') as send_request:
+            self.assertIsNone(client.forward(['compile']))
+        self.assertFalse(send_request.called)
+
+    def test_server_unreachable(self):
+        """Test that nothing is forwarded if the server cannot be reached."""
+        with mock.patch('os.path.exists', return_value=True), \
+                mock.patch('modrc.lib.client.send_request', side_effect=ConnectionRefusedError):
+            self.assertIsNone(client.forward(['compile']))
+
+
+class TestRun(unittest.TestCase):
+    def test_run_forwarded(self):
+        """Test that the response of a forwarded command is written out and exited with."""
+        response = {'exit_code': 2, 'stdout': 'out\n', 'stderr': 'err\n'}
+        with mock.patch('modrc.lib.client.forward', return_value=response), \
+                mock.patch('sys.stdout') as stdout, mock.patch('sys.stderr') as stderr:
+            with self.assertRaises(SystemExit) as exit_context:
+                client.run(['compile'])
+        stdout.write.assert_called_once_with('out\n')
+        stderr.write.assert_called_once_with('err\n')
+        self.assertEqual(exit_context.exception.code, 2)
+
+    def test_run_in_process(self):
+        """Test that a command that is not forwarded is run in this process."""
+        with mock.patch('modrc.lib.client.forward', return_value=None), mock.patch('modrc.__main__.main') as main:
+            client.run(['setup', 'uninstall'])
+        main.assert_called_once_with(['setup', 'uninstall'], prog_name='modrc')
@@ -0,0 +1,434 @@
+import errno
+import os
+import pathlib
+import tempfile
+import unittest
+from unittest import mock
+
+from parameterized import parameterized
+
+from modrc import exceptions
+from modrc.lib import compiler, config, file, helper, package, setup
+
+
+class TestCompilePackage(unittest.TestCase):
+    def setUp(self):
+        # setup a temporary mock home directory
+        self.temp = tempfile.TemporaryDirectory()
+        self.temp_dir = pathlib.Path(self.temp.name)
+        setup.initial_setup(self.temp_dir)
+        package.create_package('test-package')
+
+    def tearDown(self):
+        # destroy the ModRC symlink
+        setup.teardown(ignore_errors=True)
+        # destroy the temp directory
+        self.temp.cleanup()
+
+    def create_filter(self, filter_name, file_name, content):
+        try:
+            file.create_file(file_name, 'test-package')
+        except exceptions.ModRCFileExistsError:
+            pass
+        file_filter = file.create_file_filter(filter_name, file_name, 'test-package')
+        with open(str(file_filter), 'w') as ff:
+            ff.write(content)
+        return file_filter
+
+    def test_package_does_not_exist(self):
+        """Test that an exception is raised if the package does not exist."""
+        with self.assertRaises(exceptions.ModRCPackageDoesNotExistError):
+            compiler.compile_package('other-package', 'macos')
+
+    def test_empty_package(self):
+        """Test that a package without files compiles to nothing."""
+        self.assertEqual(compiler.compile_package('test-package', 'macos'), [])
+
+    def test_compile_every_file(self):
+        """Test that every file in the package is compiled."""
+        self.create_filter('global', 'file-a', 'A GLOBAL\n')
+        self.create_filter('macos', 'file-a', 'A MACOS\n')
+        self.create_filter('linux', 'file-b', 'B LINUX\n')
+        results = compiler.compile_package('test-package', 'macos.10.15.1')
+        live_dir = helper.get_live_dir()
+        self.assertEqual(results, [
+            compiler.CompileResult('file-a', live_dir.joinpath('file-a'), compiler.COMPILED),
+            compiler.CompileResult('file-b', live_dir.joinpath('file-b'), compiler.COMPILED)
+        ])
+        self.assertEqual(live_dir.joinpath('file-a').read_text(), 'A GLOBAL\nA MACOS\n')
+        self.assertEqual(live_dir.joinpath('file-b').read_text(), '')
+
+    def test_file_without_filters(self):
+        """Test that files without filters are reported and not written."""
+        file.create_file('test-file', 'test-package')
+        results = compiler.compile_package('test-package', 'macos')
+        self.assertEqual(results, [compiler.CompileResult('test-file', None, compiler.NO_FILTERS)])
+        self.assertFalse(helper.get_live_dir().joinpath('test-file').exists())
+
+    def test_verify_once(self):
+        """Test that the installation is verified once for the whole package."""
+        for i in range(5):
+            self.create_filter('global', 'file-{}'.format(i), 'GLOBAL')
+        helper.get_context().invalidate()
+        with mock.patch('modrc.lib.helper.verify_modrc_dir', wraps=helper.verify_modrc_dir) as verify:
+            compiler.compile_package('test-package', 'macos')
+            compiler.compile_package('test-package', 'macos')
+        self.assertEqual(verify.call_count, 1)
+
+    def test_matches_compile_file(self):
+        """Test that a package compile produces the same live files as compiling each file."""
+        self.create_filter('global', 'test-file', 'GLOBAL\n')
+        self.create_filter('linux', 'test-file', 'LINUX\n')
+        self.create_filter('linux.ubuntu', 'test-file', 'UBUNTU\n')
+        live_file = file.compile_file('test-file', 'test-package', 'linux.ubuntu.18.04').live_file
+        expected = live_file.read_text()
+        compiler.compile_package('test-package', 'linux.ubuntu.18.04')
+        self.assertEqual(live_file.read_text(), expected)
+
+    def test_up_to_date(self):
+        """Test that unchanged files are not written again."""
+        self.create_filter('global', 'test-file', 'GLOBAL\n')
+        live_file = compiler.compile_package('test-package', 'macos')[0].live_file
+        live_mtime = live_file.stat().st_mtime_ns
+        results = compiler.compile_package('test-package', 'macos')
+        self.assertEqual(results, [compiler.CompileResult('test-file', live_file, compiler.UP_TO_DATE)])
+        self.assertEqual(live_file.stat().st_mtime_ns, live_mtime)
+
+    def test_changed_filter(self):
+        """Test that a file is compiled again if one of its filters changed."""
+        file_filter = self.create_filter('global', 'test-file', 'GLOBAL\n')
+        compiler.compile_package('test-package', 'macos')
+        file_filter.write_text('CHANGED\n')
+        results = compiler.compile_package('test-package', 'macos')
+        self.assertEqual(results[0].status, compiler.COMPILED)
+        self.assertEqual(results[0].live_file.read_text(), 'CHANGED\n')
+
+    def test_changed_system(self):
+        """Test that a file is compiled again if a different system selects other filters."""
+        self.create_filter('macos', 'test-file', 'MACOS\n')
+        self.create_filter('linux', 'test-file', 'LINUX\n')
+        compiler.compile_package('test-package', 'macos')
+        results = compiler.compile_package('test-package', 'linux')
+        self.assertEqual(results[0].status, compiler.COMPILED)
+        self.assertEqual(results[0].live_file.read_text(), 'LINUX\n')
+
+    def test_force(self):
+        """Test that up to date files are compiled when forced."""
+        self.create_filter('global', 'test-file', 'GLOBAL\n')
+        compiler.compile_package('test-package', 'macos')
+        results = compiler.compile_package('test-package', 'macos', force=True)
+        self.assertEqual(results[0].status, compiler.COMPILED)
+
+    def test_binary_filters(self):
+        """Test that filters are joined byte for byte, whatever their encoding and line endings."""
+        file.create_file('test-file', 'test-package')
+        file.create_file_filter('global', 'test-file', 'test-package').write_bytes(b'\xff\xfe\x00LATIN-1 \xe9\r\n')
+        file.create_file_filter('macos', 'test-file', 'test-package').write_bytes(b'\x00\x01no newline')
+        live_file = compiler.compile_package('test-package', 'macos')[0].live_file
+        self.assertEqual(live_file.read_bytes(), b'\xff\xfe\x00LATIN-1 \xe9\r\n\x00\x01no newline')
+
+    def test_no_newlines_added(self):
+        """Test that filters without a trailing newline are joined as they are by default."""
+        self.create_filter('global', 'test-file', 'GLOBAL')
+        self.create_filter('macos', 'test-file', 'MACOS')
+        live_file = compiler.compile_package('test-package', 'macos')[0].live_file
+        self.assertEqual(live_file.read_text(), 'GLOBALMACOS')
+
+    def test_newlines_added(self):
+        """Test that a newline is added between filters that do not end with one if the package sets newlines."""
+        config.update_config(helper.get_packages_dir().joinpath('test-package', 'package.yml'), {'newlines': True})
+        self.create_filter('global', 'test-file', 'GLOBAL')
+        self.create_filter('linux', 'test-file', '')
+        self.create_filter('linux.ubuntu', 'test-file', 'UBUNTU\n')
+        self.create_filter('macos', 'test-file', 'MACOS')
+        live_dir = helper.get_live_dir()
+        compiler.compile_package('test-package', 'macos')
+        self.assertEqual(live_dir.joinpath('test-file').read_text(), 'GLOBAL\nMACOS')
+        compiler.compile_package('test-package', 'linux.ubuntu')
+        self.assertEqual(live_dir.joinpath('test-file').read_text(), 'GLOBAL\nUBUNTU\n')
+
+    def test_changed_newlines(self):
+        """Test that a file is compiled again if its package starts or stops adding newlines."""
+        self.create_filter('global', 'test-file', 'GLOBAL')
+        self.create_filter('macos', 'test-file', 'MACOS')
+        compiler.compile_package('test-package', 'macos')
+        package_file = helper.get_packages_dir().joinpath('test-package', 'package.yml')
+        config.update_config(package_file, {'newlines': True})
+        results = compiler.compile_package('test-package', 'macos')
+        self.assertEqual(results[0].status, compiler.COMPILED)
+        self.assertEqual(results[0].live_file.read_text(), 'GLOBAL\nMACOS')
+        self.assertEqual(compiler.compile_package('test-package', 'macos')[0].status, compiler.UP_TO_DATE)
+        config.update_config(package_file, {'newlines': False})
+        results = compiler.compile_package('test-package', 'macos')
+        self.assertEqual(results[0].status, compiler.COMPILED)
+        self.assertEqual(results[0].live_file.read_text(), 'GLOBALMACOS')
+
+
+class TestCompilePackages(unittest.TestCase):
+    def setUp(self):
+        # setup a temporary mock home directory
+        self.temp = tempfile.TemporaryDirectory()
+        self.temp_dir = pathlib.Path(self.temp.name)
+        setup.initial_setup(self.temp_dir)
+        for package_name in ['a-package', 'b-package']:
+            package.create_package(package_name)
+            for i in range(20):
+                file_name = '{}-file-{}'.format(package_name, i)
+                file.create_file(file_name, package_name)
+                for filter_name in ['global', 'linux', 'macos']:
+                    file_filter = file.create_file_filter(filter_name, file_name, package_name)
+                    file_filter.write_text('{} {}\n'.format(file_name, filter_name))
+
+    def tearDown(self):
+        # destroy the ModRC symlink
+        setup.teardown(ignore_errors=True)
+        # destroy the temp directory
+        self.temp.cleanup()
+
+    def test_results_by_package(self):
+        """Test that results are grouped by package in the order given."""
+        results = compiler.compile_packages(['b-package', 'a-package'], 'linux')
+        self.assertEqual(list(results), ['b-package', 'a-package'])
+        self.assertEqual(len(results['a-package']), 20)
+        self.assertEqual(len(results['b-package']), 20)
+
+    def test_parallel_matches_serial(self):
+        """Test that a parallel compile writes the same live files as a serial compile."""
+        live_dir = helper.get_live_dir()
+        serial = compiler.compile_packages(['a-package', 'b-package'], 'linux', force=True)
+        serial_contents = {path.name: path.read_text() for path in live_dir.iterdir()}
+        parallel = compiler.compile_packages(['a-package', 'b-package'], 'linux', force=True, jobs=8)
+        parallel_contents = {path.name: path.read_text() for path in live_dir.iterdir()}
+        self.assertEqual(serial, parallel)
+        self.assertEqual(serial_contents, parallel_contents)
+        self.assertEqual(parallel_contents['a-package-file-3'], 'a-package-file-3 global\na-package-file-3 linux\n')
+
+    def test_parallel_up_to_date(self):
+        """Test that a parallel compile records every live file in the manifest."""
+        compiler.compile_packages(['a-package', 'b-package'], 'linux', jobs=8)
+        results = compiler.compile_packages(['a-package', 'b-package'], 'linux', jobs=8)
+        statuses = {result.status for package_results in results.values() for result in package_results}
+        self.assertEqual(statuses, {compiler.UP_TO_DATE})
+
+    def test_shared_file_name(self):
+        """Test that the last package wins when packages share a file name, as in a serial compile."""
+        for package_name in ['a-package', 'b-package']:
+            file.create_file('shared-file', package_name)
+            file_filter = file.create_file_filter('global', 'shared-file', package_name)
+            file_filter.write_text(package_name)
+        compiler.compile_packages(['a-package', 'b-package'], 'linux', jobs=8)
+        self.assertEqual(helper.get_live_dir().joinpath('shared-file').read_text(), 'b-package')
+
+    def test_file_names(self):
+        """Test that only the given live files are compiled."""
+        results = compiler.compile_packages(['a-package', 'b-package'], 'linux', file_names={'a-package-file-3'})
+        self.assertEqual([result.file_name for result in results['a-package']], ['a-package-file-3'])
+        self.assertEqual(results['b-package'], [])
+        self.assertEqual([path.name for path in helper.get_live_dir().iterdir()], ['a-package-file-3'])
+
+    def test_package_does_not_exist(self):
+        """Test that nothing is compiled if one of the packages does not exist."""
+        with self.assertRaises(exceptions.ModRCPackageDoesNotExistError):
+            compiler.compile_packages(['a-package', 'c-package'], 'linux', jobs=8)
+        self.assertEqual(list(helper.get_live_dir().iterdir()), [])
+
+
+class TestPlanPackages(unittest.TestCase):
+    def setUp(self):
+        # setup a temporary mock home directory
+        self.temp = tempfile.TemporaryDirectory()
+        self.temp_dir = pathlib.Path(self.temp.name)
+        setup.initial_setup(self.temp_dir)
+        for package_name in ['a-package', 'b-package']:
+            package.create_package(package_name)
+            for i in range(3):
+                file_name = '{}-file-{}'.format(package_name, i)
+                file.create_file(file_name, package_name)
+                for filter_name in ['global', 'linux', 'macos']:
+                    file_filter = file.create_file_filter(filter_name, file_name, package_name)
+                    file_filter.write_text('{} {}\n'.format(file_name, filter_name))
+        self.live_dir = helper.get_live_dir()
+
+    def tearDown(self):
+        # destroy the ModRC symlink
+        setup.teardown(ignore_errors=True)
+        # destroy the temp directory
+        self.temp.cleanup()
+
+    def test_new(self):
+        """Test that live files that do not exist yet are planned as new, without writing anything."""
+        plan = compiler.plan_packages(['a-package', 'b-package'], 'linux')
+        self.assertEqual([result.status for result in plan], [compiler.NEW] * 6)
+        self.assertEqual(plan[0], compiler.PlanResult('a-package-file-0', self.live_dir.joinpath('a-package-file-0'),
+                                                      compiler.NEW, 47, None))
+        self.assertEqual(list(self.live_dir.iterdir()), [])
+        self.assertFalse(helper.get_modrc_dir().joinpath('manifest.json').exists())
+
+    def test_unchanged(self):
+        """Test that live files matching their compiled output are planned as unchanged."""
+        compiler.compile_packages(['a-package', 'b-package'], 'linux')
+        plan = compiler.plan_packages(['a-package', 'b-package'], 'linux')
+        self.assertEqual({result.status for result in plan}, {compiler.UNCHANGED})
+
+    def test_changed(self):
+        """Test that a change of a single byte is planned as changed, whatever the timestamps say."""
+        compiler.compile_packages(['a-package'], 'linux')
+        live_file = self.live_dir.joinpath('a-package-file-1')
+        live_file.write_text(live_file.read_text().replace('global', 'globaL'))
+        plan = compiler.plan_packages(['a-package'], 'linux')
+        self.assertEqual([result.status for result in plan], [compiler.UNCHANGED, compiler.CHANGED, compiler.UNCHANGED])
+        self.assertEqual(live_file.read_text(), 'a-package-file-1 globaL\na-package-file-1 linux\n')
+
+    def test_changed_system(self):
+        """Test that the plan uses the same filters as a compile for the system."""
+        compiler.compile_packages(['a-package'], 'linux')
+        plan = compiler.plan_packages(['a-package'], 'macos')
+        self.assertEqual({result.status for result in plan}, {compiler.CHANGED})
+        compiler.compile_packages(['a-package'], 'macos')
+        plan = compiler.plan_packages(['a-package'], 'macos')
+        self.assertEqual({result.status for result in plan}, {compiler.UNCHANGED})
+
+    def test_shared_file_name(self):
+        """Test that the last package decides the planned contents when packages share a file name."""
+        for package_name in ['a-package', 'b-package']:
+            file.create_file('shared-file', package_name)
+            file.create_file_filter('global', 'shared-file', package_name).write_text(package_name)
+        self.live_dir.joinpath('shared-file').write_text('b-package')
+        plan = compiler.plan_packages(['a-package', 'b-package'], 'linux', file_names=['shared-file'])
+        self.assertEqual([(result.file_name, result.status) for result in plan], [('shared-file', compiler.UNCHANGED)])
+
+    def test_package_does_not_exist(self):
+        """Test that an exception is raised if one of the packages does not exist."""
+        with self.assertRaises(exceptions.ModRCPackageDoesNotExistError):
+            compiler.plan_packages(['a-package', 'c-package'], 'linux')
+
+
+class TestCrossCompile(unittest.TestCase):
+    def setUp(self):
+        # setup a temporary mock home directory
+        self.temp = tempfile.TemporaryDirectory()
+        self.temp_dir = pathlib.Path(self.temp.name)
+        setup.initial_setup(self.temp_dir)
+        package.create_package('test-package')
+        for i in range(3):
+            file_name = 'file-{}'.format(i)
+            file.create_file(file_name, 'test-package')
+            for filter_name in ['global', 'linux', 'linux.ubuntu', 'macos']:
+                file_filter = file.create_file_filter(filter_name, file_name, 'test-package')
+                file_filter.write_text('{} {}\n'.format(file_name, filter_name))
+        self.output_dir = self.temp_dir.joinpath('output')
+
+    def tearDown(self):
+        # destroy the ModRC symlink
+        setup.teardown(ignore_errors=True)
+        # destroy the temp directory
+        self.temp.cleanup()
+
+    def test_targets(self):
+        """Test that the live files of each target are written to their own directory."""
+        targets = ['linux.ubuntu.18.04', 'linux.arch', 'macos.10.15']
+        results = compiler.cross_compile(['test-package'], targets, self.output_dir)
+        self.assertEqual(list(results), targets)
+        self.assertEqual([result.file_name for result in results['macos.10.15']], ['file-0', 'file-1', 'file-2'])
+        self.assertEqual(results['linux.arch'][1], compiler.CompileResult(
+            'file-1', self.output_dir.joinpath('linux.arch', 'file-1'), compiler.COMPILED))
+        self.assertEqual(self.output_dir.joinpath('linux.ubuntu.18.04', 'file-0').read_text(),
+                         'file-0 global\nfile-0 linux\nfile-0 linux.ubuntu\n')
+        self.assertEqual(self.output_dir.joinpath('linux.arch', 'file-0').read_text(), 'file-0 global\nfile-0 linux\n')
+        self.assertEqual(self.output_dir.joinpath('macos.10.15', 'file-0').read_text(), 'file-0 global\nfile-0 macos\n')
+        self.assertEqual(list(helper.get_live_dir().iterdir()), [])
+        self.assertFalse(helper.get_modrc_dir().joinpath('manifest.json').exists())
+
+    def test_matches_compile(self):
+        """Test that a target is compiled the same as a compile for that system."""
+        compiler.compile_packages(['test-package'], 'linux.ubuntu.18.04')
+        compiler.cross_compile(['test-package'], ['linux.ubuntu.18.04'], self.output_dir, jobs=4)
+        for live_file in helper.get_live_dir().iterdir():
+            self.assertEqual(self.output_dir.joinpath('linux.ubuntu.18.04', live_file.name).read_text(),
+                             live_file.read_text())
+
+    def test_read_once(self):
+        """Test that every filter is read once, however many targets select it."""
+        targets = ['linux.ubuntu.{}'.format(version) for version in range(10)] + ['linux.arch', 'macos']
+        with mock.patch('modrc.lib.compiler.open', create=True, side_effect=open) as mock_open:
+            compiler.cross_compile(['test-package'], targets, self.output_dir, jobs=4)
+        packages_dir = str(helper.get_packages_dir())
+        read_paths = [call[0][0] for call in mock_open.call_args_list if str(call[0][0]).startswith(packages_dir)]
+        self.assertEqual(len(read_paths), len(set(read_paths)))
+        self.assertEqual(len(read_paths), 12)
+
+    def test_templates(self):
+        """Test that templates are rendered with the system of each target."""
+        config.update_config(helper.get_packages_dir().joinpath('test-package', 'package.yml'), {'templates': True})
+        file.create_file_filter('global', 'file-0', 'test-package').write_text('{{ system.name }} {{ system.mac }}\n')
+        compiler.cross_compile(['test-package'], ['macos.10.15,0123456789ab', 'linux.arch'], self.output_dir,
+                               file_names=['file-0'])
+        self.assertEqual(self.output_dir.joinpath('macos.10.15,0123456789ab', 'file-0').read_text(),
+                         'macos.10.15 0123456789ab\nfile-0 macos\n')
+        self.assertEqual(self.output_dir.joinpath('linux.arch', 'file-0').read_text(), 'linux.arch \nfile-0 linux\n')
+
+    def test_package_does_not_exist(self):
+        """Test that an exception is raised if one of the packages does not exist."""
+        with self.assertRaises(exceptions.ModRCPackageDoesNotExistError):
+            compiler.cross_compile(['test-package', 'other-package'], ['linux'], self.output_dir)
+
+    def test_invalid_target(self):
+        """Test that an exception is raised for targets that are not valid system strings."""
+        for target in ['../../x', '/etc/foo', 'linux,../x', '']:
+            with self.assertRaises(exceptions.ModRCFilterNameError):
+                compiler.cross_compile(['test-package'], ['linux', target], self.output_dir)
+        self.assertFalse(self.output_dir.exists())
+
+
+class TestWriteLiveFile(unittest.TestCase):
+    def setUp(self):
+        # setup a temporary directory for filters and the live file
+        self.temp = tempfile.TemporaryDirectory()
+        self.temp_dir = pathlib.Path(self.temp.name)
+        self.live_file = self.temp_dir.joinpath('live-file')
+        self.filter_paths = []
+        for i, size in enumerate([0, 10, compiler.COPY_BUFFER_SIZE * 3 + 7]):
+            filter_path = self.temp_dir.joinpath('filter-{}'.format(i))
+            filter_path.write_bytes(bytes(j % 251 for j in range(size)))
+            self.filter_paths.append(str(filter_path))
+        self.expected = b''.join(pathlib.Path(path).read_bytes() for path in self.filter_paths)
+
+    def tearDown(self):
+        # destroy the temp directory
+        self.temp.cleanup()
+
+    def test_kernel_copy(self):
+        """Test that filters are concatenated with the platform kernel copies."""
+        compiler.write_live_file(self.live_file, self.filter_paths)
+        self.assertEqual(self.live_file.read_bytes(), self.expected)
+
+    @parameterized.expand([
+        ('_copy_file_range',),
+        ('_sendfile',)
+    ])
+    def test_single_kernel_copy(self, kernel_copy):
+        """Test that filters are concatenated with each kernel copy on its own."""
+        if not hasattr(os, kernel_copy.strip('_')):
+            self.skipTest('Kernel copy not available')
+        with mock.patch('modrc.lib.compiler.KERNEL_COPIES', [getattr(compiler, kernel_copy)]):
+            compiler.write_live_file(self.live_file, self.filter_paths)
+        self.assertEqual(self.live_file.read_bytes(), self.expected)
+
+    def test_buffered_copy(self):
+        """Test that filters are concatenated with buffered copies if no kernel copy is available."""
+        with mock.patch('modrc.lib.compiler.KERNEL_COPIES', []):
+            compiler.write_live_file(self.live_file, self.filter_paths)
+        self.assertEqual(self.live_file.read_bytes(), self.expected)
+
+    def test_unsupported_kernel_copy(self):
+        """Test that an unsupported kernel copy falls back to buffered copies."""
+        unsupported = mock.Mock(side_effect=OSError(errno.EXDEV, 'Cross-device link'))
+        with mock.patch('modrc.lib.compiler.KERNEL_COPIES', [unsupported]):
+            compiler.write_live_file(self.live_file, self.filter_paths)
+        self.assertEqual(self.live_file.read_bytes(), self.expected)
+
+    def test_replace_live_file(self):
+        """Test that the previous contents of the live file are replaced."""
+        self.live_file.write_bytes(b'x' * (len(self.expected) + 100))
+        compiler.write_live_file(self.live_file, self.filter_paths)
+        self.assertEqual(self.live_file.read_bytes(), self.expected)
@@ -0,0 +1,101 @@
+import pathlib
+import tempfile
+import unittest
+from unittest import mock
+
+import yaml
+
+from modrc.lib import config, helper, package, setup
+
+
+class TestConfig(unittest.TestCase):
+    def setUp(self):
+        # setup a temporary directory for the config file
+        self.temp = tempfile.TemporaryDirectory()
+        self.config_file = pathlib.Path(self.temp.name).joinpath('config.yml')
+        self.config_file.write_text('editor: vim\n')
+        config.clear_cache()
+
+    def tearDown(self):
+        # destroy the temp directory
+        config.clear_cache()
+        self.temp.cleanup()
+
+    def test_load(self):
+        """Test that a config file is parsed."""
+        self.assertEqual(config.load_config(self.config_file), {'editor': 'vim'})
+
+    def test_load_empty(self):
+        """Test that an empty config file loads as an empty config."""
+        self.config_file.write_text('')
+        self.assertEqual(config.load_config(self.config_file), {})
+
+    def test_load_cached(self):
+        """Test that an unchanged config file is only parsed once."""
+        config.load_config(self.config_file)
+        with mock.patch('yaml.load') as load:
+            self.assertEqual(config.load_config(self.config_file), {'editor': 'vim'})
+        self.assertFalse(load.called)
+
+    def test_load_changed(self):
+        """Test that a changed config file is parsed again."""
+        config.load_config(self.config_file)
+        self.config_file.write_text('editor: nano\n')
+        self.assertEqual(config.load_config(self.config_file), {'editor': 'nano'})
+
+    def test_load_copy(self):
+        """Test that changing a loaded config does not change the cached config."""
+        config.load_config(self.config_file)['editor'] = 'nano'
+        self.assertEqual(config.load_config(self.config_file), {'editor': 'vim'})
+
+    def test_update_single_write(self):
+        """Test that several settings are changed with a single write."""
+        with mock.patch('modrc.lib.config.save_config', wraps=config.save_config) as save_config:
+            config.update_config(self.config_file, {'editor': 'nano', 'autocompile': True, 'autosync': None})
+        save_config.assert_called_once_with(self.config_file, {'editor': 'nano', 'autocompile': True})
+        with open(str(self.config_file), 'r') as yf:
+            self.assertEqual(yaml.safe_load(yf), {'editor': 'nano', 'autocompile': True})
+
+    def test_update_unchanged(self):
+        """Test that a config file is not written if no setting changes."""
+        with mock.patch('modrc.lib.config.save_config') as save_config:
+            config.update_config(self.config_file, {'editor': 'vim', 'autosync': None})
+        self.assertFalse(save_config.called)
+
+    def test_save_cached(self):
+        """Test that a saved config file is not parsed again."""
+        config.save_config(self.config_file, {'editor': 'emacs'})
+        with mock.patch('yaml.load') as load:
+            self.assertEqual(config.load_config(self.config_file), {'editor': 'emacs'})
+        self.assertFalse(load.called)
+
+
+class TestModRCConfig(unittest.TestCase):
+    def setUp(self):
+        setup.initial_setup()
+
+    def tearDown(self):
+        setup.teardown(ignore_errors=True)
+
+    def test_get_setting(self):
+        """Test that a setting is read from the ModRC file."""
+        setup.populate_modrc_file('test-package', 'nano', True, False)
+        self.assertEqual(config.get_setting('editor'), 'nano')
+        self.assertEqual(config.get_setting('defaultpackage'), 'test-package')
+
+    def test_get_setting_default(self):
+        """Test that the default is returned for a setting that is not set."""
+        self.assertEqual(config.get_setting('editor', 'vim'), 'vim')
+
+    def test_load_package_config(self):
+        """Test that the config of a package is read from its package.yml file."""
+        package.create_package('test-package', repo_url='https://url.example')
+        self.assertEqual(package.load_package_config('test-package'), {'repourl': 'https://url.example'})
+
+    def test_modrc_file_written_once(self):
+        """Test that populating the ModRC file writes it once."""
+        with mock.patch('modrc.lib.config.save_config') as save_config:
+            setup.populate_modrc_file('test-package', 'vim', True, True)
+        save_config.assert_called_once_with(helper.get_modrc_file(), {
+            'defaultpackage': 'test-package', 'editor': 'vim', 'autocompile': True, 'autosync': True
+        })
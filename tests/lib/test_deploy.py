@@ -0,0 +1,125 @@
+import os
+import pathlib
+import tempfile
+import unittest
+from unittest import mock
+
+from modrc import exceptions
+from modrc.lib import config, deploy, helper, package, setup
+
+
+class TestDeploy(unittest.TestCase):
+    def setUp(self):
+        # setup a temporary mock home directory with live files and a separate deploy home
+        self.temp = tempfile.TemporaryDirectory()
+        self.temp_dir = pathlib.Path(self.temp.name)
+        self.temp_dir.joinpath('modrc').mkdir()
+        setup.initial_setup(self.temp_dir.joinpath('modrc'))
+        self.home = self.temp_dir.joinpath('home')
+        self.home.mkdir()
+        self.live_dir = helper.get_live_dir()
+        self.live_dir.joinpath('bashrc').write_text('BASH')
+        self.live_dir.joinpath('vimrc').write_text('VIM')
+        self.bashrc = str(self.home.joinpath('.bashrc'))
+        self.vimrc = str(self.home.joinpath('.vimrc'))
+
+    def tearDown(self):
+        # destroy the ModRC symlink
+        setup.teardown(ignore_errors=True)
+        # destroy the temp directory
+        self.temp.cleanup()
+
+    def test_link(self):
+        """Test that every live file is linked to a dotfile in the home directory."""
+        actions = deploy.deploy(home=self.home)
+        self.assertEqual(actions, [
+            deploy.Action(deploy.CREATE, self.bashrc, str(self.live_dir.joinpath('bashrc'))),
+            deploy.Action(deploy.CREATE, self.vimrc, str(self.live_dir.joinpath('vimrc')))
+        ])
+        self.assertEqual(os.readlink(self.bashrc), str(self.live_dir.joinpath('bashrc')))
+        self.assertEqual(pathlib.Path(self.vimrc).read_text(), 'VIM')
+
+    def test_unchanged_no_writes(self):
+        """Test that deploying an unchanged system plans nothing and writes nothing."""
+        deploy.deploy(home=self.home)
+        with mock.patch('modrc.lib.deploy.save_state') as save_state, \
+                mock.patch('modrc.lib.deploy._replace') as replace, mock.patch('os.unlink') as unlink:
+            self.assertEqual(deploy.deploy(home=self.home), [])
+        self.assertFalse(save_state.called or replace.called or unlink.called)
+
+    def test_dry_run(self):
+        """Test that a dry run plans the changes without making them."""
+        actions = deploy.deploy(dry_run=True, home=self.home)
+        self.assertEqual([action.action for action in actions], [deploy.CREATE, deploy.CREATE])
+        self.assertEqual(list(self.home.iterdir()), [])
+        self.assertFalse(deploy.get_state_file(helper.get_modrc_dir()).exists())
+
+    def test_remove(self):
+        """Test that a target is removed when its live file is gone."""
+        deploy.deploy(home=self.home)
+        self.live_dir.joinpath('vimrc').unlink()
+        actions = deploy.deploy(home=self.home)
+        self.assertEqual(actions, [deploy.Action(deploy.REMOVE, self.vimrc, str(self.live_dir.joinpath('vimrc')))])
+        self.assertFalse(os.path.lexists(self.vimrc))
+        self.assertEqual(deploy.deploy(home=self.home), [])
+
+    def test_conflict(self):
+        """Test that a file not deployed by ModRC is never overwritten."""
+        pathlib.Path(self.bashrc).write_text('MINE')
+        actions = deploy.deploy(home=self.home)
+        self.assertIn(deploy.Action(deploy.CONFLICT, self.bashrc, str(self.live_dir.joinpath('bashrc'))), actions)
+        self.assertEqual(pathlib.Path(self.bashrc).read_text(), 'MINE')
+
+    def test_copy(self):
+        """Test that copies are updated when their live file changes and left alone when edited."""
+        deploy.deploy(deploy.COPY, home=self.home)
+        self.assertFalse(os.path.islink(self.bashrc))
+        self.assertEqual(deploy.deploy(deploy.COPY, home=self.home), [])
+        self.live_dir.joinpath('bashrc').write_text('NEW BASH')
+        self.assertEqual([action.action for action in deploy.deploy(deploy.COPY, home=self.home)], [deploy.UPDATE])
+        self.assertEqual(pathlib.Path(self.bashrc).read_text(), 'NEW BASH')
+        pathlib.Path(self.vimrc).write_text('EDITED')
+        self.live_dir.joinpath('vimrc').write_text('NEW VIM')
+        self.assertEqual([action.action for action in deploy.deploy(deploy.COPY, home=self.home)], [deploy.CONFLICT])
+        self.assertEqual(pathlib.Path(self.vimrc).read_text(), 'EDITED')
+
+    def test_switch_mode(self):
+        """Test that deployed links are replaced by copies when the mode changes."""
+        deploy.deploy(home=self.home)
+        actions = deploy.deploy(deploy.COPY, home=self.home)
+        self.assertEqual([action.action for action in actions], [deploy.UPDATE, deploy.UPDATE])
+        self.assertFalse(os.path.islink(self.bashrc))
+
+    def test_package_mapping(self):
+        """Test that a package can name the target of a live file or skip it."""
+        package_dir = package.create_package('test-package')
+        config.save_config(package_dir.joinpath('package.yml'), {'deploy': {'bashrc': '.config/bash/rc', 'vimrc': False}})
+        actions = deploy.deploy(home=self.home)
+        target = str(self.home.joinpath('.config', 'bash', 'rc'))
+        self.assertEqual(actions, [deploy.Action(deploy.CREATE, target, str(self.live_dir.joinpath('bashrc')))])
+        self.assertEqual(pathlib.Path(target).read_text(), 'BASH')
+
+    def test_target_outside_home(self):
+        """Test that targets outside of the home directory are rejected before anything is deployed."""
+        package_dir = package.create_package('test-package')
+        for target in ['/etc/bashrc', '../bashrc', '.config/../../bashrc', '.']:
+            config.save_config(package_dir.joinpath('package.yml'), {'deploy': {'bashrc': target}})
+            with self.assertRaises(exceptions.ModRCDeployTargetError):
+                deploy.deploy(home=self.home)
+        self.assertEqual(list(self.home.iterdir()), [])
+        self.assertFalse(self.temp_dir.joinpath('bashrc').exists())
+
+    def test_shared_target(self):
+        """Test that two live files deployed to the same target are rejected before anything is deployed."""
+        package_dir = package.create_package('test-package')
+        config.save_config(package_dir.joinpath('package.yml'), {'deploy': {'vimrc': '.bashrc'}})
+        with self.assertRaises(exceptions.ModRCDeployTargetError):
+            deploy.deploy(home=self.home)
+        self.assertEqual(list(self.home.iterdir()), [])
+
+    def test_package_without_config(self):
+        """Test that packages without a package.yml deploy their live files to the default targets."""
+        package_dir = package.create_package('test-package')
+        package_dir.joinpath('package.yml').unlink()
+        actions = deploy.deploy(home=self.home)
+        self.assertEqual([action.target for action in actions], [self.bashrc, self.vimrc])
@@ -0,0 +1,117 @@
+import hashlib
+import io
+import pathlib
+import tarfile
+import tempfile
+import unittest
+import zipfile
+from unittest import mock
+
+from modrc import exceptions
+from modrc.lib import chunk, export, file, helper, package, setup
+
+
+class TestExportBundles(unittest.TestCase):
+    def setUp(self):
+        # setup a temporary mock home directory
+        self.temp = tempfile.TemporaryDirectory()
+        self.temp_dir = pathlib.Path(self.temp.name)
+        setup.initial_setup(self.temp_dir)
+        package.create_package('test-package')
+        for i in range(3):
+            file_name = 'file-{}'.format(i)
+            file.create_file(file_name, 'test-package')
+            for filter_name in ['global', 'linux', 'macos']:
+                file_filter = file.create_file_filter(filter_name, file_name, 'test-package')
+                file_filter.write_text('{} {}\n'.format(file_name, filter_name))
+        self.output = self.temp_dir.joinpath('output')
+
+    def tearDown(self):
+        # destroy the ModRC symlink
+        setup.teardown(ignore_errors=True)
+        # destroy the temp directory
+        self.temp.cleanup()
+
+    def test_archive_per_target(self):
+        """Test that the live files of each target are streamed into their own archive."""
+        results = export.export_bundles(['test-package'], ['linux', 'macos'], self.output)
+        self.assertEqual(results, [
+            export.ExportResult('linux', self.output.joinpath('linux.tar'), 3, 81),
+            export.ExportResult('macos', self.output.joinpath('macos.tar'), 3, 81)
+        ])
+        with tarfile.open(str(self.output.joinpath('macos.tar'))) as tf:
+            self.assertEqual(tf.getnames(), ['file-0', 'file-1', 'file-2'])
+            self.assertEqual(tf.extractfile('file-1').read(), b'file-1 global\nfile-1 macos\n')
+        self.assertEqual(list(helper.get_live_dir().iterdir()), [])
+        self.assertEqual(sorted(path.name for path in self.output.iterdir()), ['linux.tar', 'macos.tar'])
+
+    def test_single_archive(self):
+        """Test that a single archive has a directory for each target."""
+        archive = self.temp_dir.joinpath('bundle.tar.gz')
+        export.export_bundles(['test-package'], ['linux', 'macos'], archive, export.TAR_GZ, single=True)
+        with tarfile.open(str(archive)) as tf:
+            self.assertEqual(len(tf.getnames()), 6)
+            self.assertEqual(tf.extractfile('linux/file-0').read(), b'file-0 global\nfile-0 linux\n')
+
+    def test_stream(self):
+        """Test that a single archive can be streamed onto a file object."""
+        stream = io.BytesIO()
+        results = export.export_bundles(['test-package'], ['linux'], stream, single=True)
+        self.assertIsNone(results[0].archive)
+        with tarfile.open(fileobj=io.BytesIO(stream.getvalue())) as tf:
+            self.assertEqual(tf.getnames(), ['linux/file-0', 'linux/file-1', 'linux/file-2'])
+
+    def test_zip(self):
+        """Test that live files are written into zip archives."""
+        export.export_bundles(['test-package'], ['macos'], self.output, export.ZIP)
+        with zipfile.ZipFile(str(self.output.joinpath('macos.zip'))) as zf:
+            self.assertEqual(zf.namelist(), ['file-0', 'file-1', 'file-2'])
+            self.assertEqual(zf.read('file-2'), b'file-2 global\nfile-2 macos\n')
+
+    def test_zip_without_streaming(self):
+        """Test that zip archives are written whole per entry where entries cannot be streamed into."""
+        with mock.patch('modrc.lib.export.ZIP_STREAMING', False):
+            export.export_bundles(['test-package'], ['macos'], self.output, export.ZIP, hashes=True)
+        with zipfile.ZipFile(str(self.output.joinpath('macos.zip'))) as zf:
+            self.assertEqual(zf.namelist(), ['file-0', 'file-1', 'file-2', export.HASHES_NAME])
+            self.assertEqual(zf.read('file-2'), b'file-2 global\nfile-2 macos\n')
+            self.assertIn(hashlib.sha256(zf.read('file-2')).hexdigest(), zf.read(export.HASHES_NAME).decode())
+
+    def test_hashes(self):
+        """Test that the hashes file lists the hash of every live file in the format read by sha256sum."""
+        export.export_bundles(['test-package'], ['linux'], self.output, export.ZIP, hashes=True)
+        with zipfile.ZipFile(str(self.output.joinpath('linux.zip'))) as zf:
+            lines = zf.read(export.HASHES_NAME).decode().splitlines()
+            self.assertEqual(len(lines), 3)
+            for line in lines:
+                digest, file_name = line.split('  ')
+                self.assertEqual(hashlib.sha256(zf.read(file_name)).hexdigest(), digest)
+
+    def test_includes(self):
+        """Test that includes are expanded in exported live files."""
+        chunk.create_chunk('aliases', 'test-package').write_text('alias ll="ls -l"\n')
+        file.create_file_filter('global', 'file-0', 'test-package').write_text('# modrc:include aliases\n')
+        export.export_bundles(['test-package'], ['linux'], self.output, file_names=['file-0'])
+        with tarfile.open(str(self.output.joinpath('linux.tar'))) as tf:
+            self.assertEqual(tf.extractfile('file-0').read(), b'alias ll="ls -l"\nfile-0 linux\n')
+
+    def test_package_does_not_exist(self):
+        """Test that nothing is written if a package does not exist."""
+        with self.assertRaises(exceptions.ModRCPackageDoesNotExistError):
+            export.export_bundles(['test-package', 'other-package'], ['linux'], self.output)
+        self.assertFalse(self.output.exists())
+
+    def test_invalid_target(self):
+        """Test that nothing is written for targets that are not valid system strings."""
+        for target in ['../../x', '/etc/foo']:
+            with self.assertRaises(exceptions.ModRCFilterNameError):
+                export.export_bundles(['test-package'], [target], self.output)
+        self.assertFalse(self.output.exists())
+
+    def test_failed_archive_removed(self):
+        """Test that an archive is not left behind if exporting it fails."""
+        file.create_file_filter('global', 'file-0', 'test-package').write_text('# modrc:include missing\n')
+        chunk.create_chunk('aliases', 'test-package')
+        with self.assertRaises(exceptions.ModRCChunkDoesNotExistError):
+            export.export_bundles(['test-package'], ['linux'], self.output)
+        self.assertEqual(list(self.output.iterdir()), [])
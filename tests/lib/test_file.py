@@ -1,11 +1,12 @@
 import pathlib
 import tempfile
 import unittest
+from unittest import mock
 
 from parameterized import parameterized
 
 from modrc import exceptions
-from modrc.lib import file, helper, package, setup
+from modrc.lib import compiler, file, helper, index, manifest, package, setup
 
 
 class TestCreateFile(unittest.TestCase):
@@ -143,7 +144,7 @@ class TestCompileFile(unittest.TestCase):
         file_filter = file.create_file_filter('global', 'test-file', 'test-package')
         with open(str(file_filter), 'w') as ff:
             ff.write('GLOBAL CONTENT')
-        compiled_file = file.compile_file('test-file', 'test-package', system)
+        compiled_file = file.compile_file('test-file', 'test-package', system).live_file
         # check the file
         self.assertTrue(compiled_file.is_file())
         self.assertEqual(compiled_file, helper.get_live_dir().joinpath('test-file'))
@@ -164,7 +165,7 @@ class TestCompileFile(unittest.TestCase):
         file_filter_linux = file.create_file_filter('linux', 'test-file', 'test-package')
         with open(str(file_filter_linux), 'w') as ff:
             ff.write('LINUX CONTENT')
-        compiled_file = file.compile_file('test-file', 'test-package', system)
+        compiled_file = file.compile_file('test-file', 'test-package', system).live_file
         # check the file
         self.assertTrue(compiled_file.is_file())
         self.assertEqual(compiled_file, helper.get_live_dir().joinpath('test-file'))
@@ -187,13 +188,35 @@ class TestCompileFile(unittest.TestCase):
         for i in range(2):
             with open(str(file_filter), 'w') as ff:
                 ff.write('GLOBAL {}'.format(i))
-            compiled_file = file.compile_file('test-file', 'test-package', system)
+            compiled_file = file.compile_file('test-file', 'test-package', system).live_file
         # check the file
         self.assertTrue(compiled_file.is_file())
         self.assertEqual(compiled_file, helper.get_live_dir().joinpath('test-file'))
         with open(str(file_filter)) as ff, open(str(compiled_file), 'r') as cf:
             self.assertEqual(ff.readlines(), cf.readlines())
 
+    def test_up_to_date(self):
+        """Test that a file whose filters did not change is reported as up to date."""
+        file.create_file('test-file', 'test-package')
+        file.create_file_filter('global', 'test-file', 'test-package').write_text('GLOBAL')
+        self.assertEqual(file.compile_file('test-file', 'test-package', 'macos').status, compiler.COMPILED)
+        self.assertEqual(file.compile_file('test-file', 'test-package', 'macos').status, compiler.UP_TO_DATE)
+
+    def test_loaded_manifest_and_index(self):
+        """Test that a loaded manifest and index are used without reading or writing them again."""
+        file.create_file('test-file', 'test-package')
+        file.create_file_filter('global', 'test-file', 'test-package').write_text('GLOBAL')
+        compile_manifest = manifest.load_manifest(self.modrc_dir)
+        loaded_index = index.load_index()
+        with mock.patch('modrc.lib.manifest.load_manifest') as load_manifest, \
+                mock.patch('modrc.lib.manifest.save_manifest') as save_manifest, \
+                mock.patch('modrc.lib.index.load_index') as load_index:
+            result = file.compile_file('test-file', 'test-package', 'macos', compile_manifest=compile_manifest,
+                                       loaded_index=loaded_index)
+        self.assertEqual(result.status, compiler.COMPILED)
+        self.assertFalse(load_manifest.called or save_manifest.called or load_index.called)
+        self.assertIn('test-file', compile_manifest['files'])
+
     @parameterized.expand([
         ('macos.10.15.1'),
         ('linux.ubuntu.18.04.3')
@@ -0,0 +1,61 @@
+import unittest
+
+from parameterized import parameterized
+
+from modrc.lib import filters
+
+
+class TestValidFilterName(unittest.TestCase):
+    @parameterized.expand([
+        ('global'),
+        ('macos.10.15'),
+        ('linux.ubuntu.18.04'),
+        ('0123456789ab')
+    ])
+    def test_valid(self, filter_name):
+        """Test that valid filter names match the precompiled pattern."""
+        self.assertTrue(filters.valid_filter_name(filter_name))
+
+    @parameterized.expand([
+        (''),
+        ('global.macos'),
+        ('macosx'),
+        ('linux.4'),
+        ('0123456789abc')
+    ])
+    def test_invalid(self, filter_name):
+        """Test that the whole filter name must match the precompiled pattern."""
+        self.assertFalse(filters.valid_filter_name(filter_name))
+
+
+class TestSelectFilters(unittest.TestCase):
+    @parameterized.expand([
+        ('macos.10.15.1', ['global', 'macos', 'macos.10']),
+        ('linux.ubuntu.18.04.3', ['global', 'linux', 'linux.ubuntu']),
+        ('linux.debian.10', ['global', 'linux'])
+    ])
+    def test_select_filters(self, system, expected):
+        """Test that only matching filters are selected, from least to most specific."""
+        filter_names = ['macos.10', 'linux.ubuntu', 'macos', 'linux', 'global', '001122334455']
+        self.assertEqual(filters.select_filters(filter_names, system), expected)
+
+    def test_whole_segments(self):
+        """Test that filters only match whole segments of the system string."""
+        filter_names = ['macos.10.1', 'linux.ubu']
+        self.assertEqual(filters.select_filters(filter_names, 'macos.10.15'), [])
+        self.assertEqual(filters.select_filters(filter_names, 'linux.ubuntu.18.04'), [])
+
+    def test_no_global(self):
+        """Test that selection works without a global filter."""
+        self.assertEqual(filters.select_filters(['macos.10.15'], 'macos.10.15.1'), ['macos.10.15'])
+
+    def test_trie_cached(self):
+        """Test that the trie for a set of filter names is only built once."""
+        filter_names = frozenset(['global', 'linux', 'linux.arch'])
+        self.assertIs(filters.build_trie(filter_names), filters.build_trie(frozenset(filter_names)))
+
+    def test_multiple_systems(self):
+        """Test that filters are selected for every system string without duplicates."""
+        filter_names = ['global', 'linux', 'linux.arch', '0123456789ab', 'ba9876543210']
+        selected = filters.select_filters(filter_names, ['linux.arch', '0123456789ab'])
+        self.assertEqual(selected, ['global', 'linux', 'linux.arch', '0123456789ab'])
@@ -1,6 +1,8 @@
 import pathlib
 import tempfile
+import threading
 import unittest
+from unittest import mock
 
 from parameterized import parameterized
 
@@ -248,3 +250,125 @@ class TestValidFilterName(unittest.TestCase):
     def test_mac_address_invalid(self, mac_address):
         """Test invalid MAC addresses."""
         self.assertFalse(helper.valid_filter_name(mac_address))
+
+
+class TestModRCContext(unittest.TestCase):
+    def setUp(self):
+        # setup a temporary mock home directory
+        self.temp = tempfile.TemporaryDirectory()
+        self.temp_dir = pathlib.Path(self.temp.name)
+        self.context = helper.ModRCContext()
+
+    def tearDown(self):
+        # destroy the ModRC symlink
+        setup.teardown(ignore_errors=True)
+        # destroy the temp directory
+        self.temp.cleanup()
+
+    def test_not_installed(self):
+        """Test that an exception is raised for every path if ModRC is not installed."""
+        for name in ['modrc_dir', 'modrc_file', 'packages_dir', 'live_dir']:
+            with self.assertRaises(exceptions.ModRCIntegrityError):
+                getattr(self.context, name)
+
+    def test_paths(self):
+        """Test that the context resolves every path in the ModRC directory."""
+        modrc_dir = setup.initial_setup(self.temp_dir, context=self.context)
+        self.assertEqual(self.context.modrc_dir, modrc_dir)
+        self.assertEqual(self.context.modrc_file, modrc_dir.joinpath('modrc.yml'))
+        self.assertEqual(self.context.packages_dir, modrc_dir.joinpath('packages'))
+        self.assertEqual(self.context.live_dir, modrc_dir.joinpath('live'))
+
+    def test_validated_once(self):
+        """Test that the layout is only validated on the first lookup."""
+        setup.initial_setup(self.temp_dir, context=self.context)
+        with mock.patch('modrc.lib.helper.verify_modrc_dir', wraps=helper.verify_modrc_dir) as verify:
+            for _ in range(3):
+                self.context.packages_dir
+                self.context.live_dir
+        self.assertEqual(verify.call_count, 1)
+
+    def test_failure_not_cached(self):
+        """Test that a failed lookup is validated again on the next lookup."""
+        with self.assertRaises(exceptions.ModRCIntegrityError):
+            self.context.live_dir
+        modrc_dir = setup.initial_setup(self.temp_dir)
+        self.assertEqual(self.context.live_dir, modrc_dir.joinpath('live'))
+
+    def test_invalidate(self):
+        """Test that paths are validated again after the context is invalidated."""
+        setup.initial_setup(self.temp_dir, context=self.context)
+        live_dir = self.context.live_dir
+        live_dir.rmdir()
+        self.assertEqual(self.context.live_dir, live_dir)
+        self.context.invalidate()
+        with self.assertRaises(exceptions.ModRCIntegrityError):
+            self.context.live_dir
+
+    def test_teardown_invalidates(self):
+        """Test that teardown invalidates the context."""
+        setup.initial_setup(self.temp_dir, context=self.context)
+        self.context.modrc_dir
+        setup.teardown(context=self.context)
+        with self.assertRaises(exceptions.ModRCIntegrityError):
+            self.context.modrc_dir
+
+    def test_warm(self):
+        """Test that warming the context validates every path up front."""
+        with self.assertRaises(exceptions.ModRCIntegrityError):
+            self.context.warm()
+        setup.initial_setup(self.temp_dir, context=self.context)
+        self.context.warm()
+        with mock.patch('modrc.lib.helper.verify_modrc_dir') as verify, \
+                mock.patch('pathlib.Path.is_dir') as is_dir, mock.patch('pathlib.Path.is_file') as is_file:
+            self.context.modrc_file
+            self.context.packages_dir
+            self.context.live_dir
+        self.assertFalse(verify.called or is_dir.called or is_file.called)
+
+    def test_shared_context(self):
+        """Test that the shared context is used if no context is given."""
+        self.assertIs(helper.get_context(), helper.get_context())
+        self.assertIs(helper.get_context(self.context), self.context)
+
+
+class TestWriteAtomic(unittest.TestCase):
+    def setUp(self):
+        self.temp = tempfile.TemporaryDirectory()
+        self.path = pathlib.Path(self.temp.name, 'data.json')
+
+    def tearDown(self):
+        self.temp.cleanup()
+
+    def test_write(self):
+        """Test that the file is replaced and no temp file is left."""
+        helper.write_atomic(self.path, 'old')
+        helper.write_atomic(self.path, b'new')
+        self.assertEqual(self.path.read_text(), 'new')
+        self.assertEqual([p.name for p in self.path.parent.iterdir()], ['data.json'])
+
+    def test_concurrent_writers(self):
+        """Test that writers in separate threads do not share a temp file."""
+        errors = []
+
+        def write(data):
+            try:
+                for _ in range(50):
+                    helper.write_atomic(self.path, data)
+            except OSError as error:
+                errors.append(error)
+
+        threads = [threading.Thread(target=write, args=(str(i) * 1000,)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        self.assertIn(self.path.read_text(), [str(i) * 1000 for i in range(4)])
+
+    def test_failure_removes_temp_file(self):
+        """Test that the temp file is removed if the file cannot be replaced."""
+        with mock.patch('os.replace', side_effect=OSError):
+            with self.assertRaises(OSError):
+                helper.write_atomic(self.path, 'data')
+        self.assertEqual(list(self.path.parent.iterdir()), [])
@@ -0,0 +1,118 @@
+import os
+import pathlib
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+from modrc import exceptions
+from modrc.lib import file, helper, index, package, setup
+
+
+class TestIndex(unittest.TestCase):
+    def setUp(self):
+        # setup a temporary mock home directory with a package, file and filter
+        self.temp = tempfile.TemporaryDirectory()
+        self.temp_dir = pathlib.Path(self.temp.name)
+        setup.initial_setup(self.temp_dir)
+        package.create_package('test-package')
+        file.create_file('test-file', 'test-package')
+        file.create_file_filter('global', 'test-file', 'test-package')
+
+    def tearDown(self):
+        # destroy the ModRC symlink
+        setup.teardown(ignore_errors=True)
+        # destroy the temp directory
+        self.temp.cleanup()
+
+    def test_created_entries_indexed(self):
+        """Test that created packages, files and filters are added to the index."""
+        loaded = index.load_index()
+        self.assertEqual(index.list_packages(loaded), ['test-package'])
+        self.assertEqual(index.get_files(loaded, 'test-package'), {'test-file': ['global']})
+        self.assertEqual(index.get_filters(loaded, 'test-file', 'test-package'), ['global'])
+
+    def test_current_not_listed(self):
+        """Test that a package that did not change is read from the index without listing its directories."""
+        self.backdate()
+        loaded = index.rebuild_index()
+        with mock.patch('modrc.lib.index.os.scandir', wraps=os.scandir) as scandir:
+            self.assertEqual(index.get_files(loaded, 'test-package'), {'test-file': ['global']})
+            self.assertEqual(index.get_filters(loaded, 'test-file', 'test-package'), ['global'])
+        self.assertFalse(scandir.called)
+
+    def test_stale_entries_listed(self):
+        """Test that files and filters added outside of ModRC are found and saved to the index."""
+        self.backdate()
+        index.rebuild_index()
+        files_dir = helper.get_packages_dir().joinpath('test-package', 'files')
+        files_dir.joinpath('test-file', 'linux').touch()
+        files_dir.joinpath('other-file').mkdir()
+        loaded = index.load_index()
+        self.assertEqual(index.get_files(loaded, 'test-package'), {'test-file': ['global', 'linux'], 'other-file': []})
+        self.assertEqual(index.load_index()['packages'], loaded['packages'])
+
+    def test_package_added_outside(self):
+        """Test that packages added outside of ModRC are listed when the index is loaded."""
+        self.backdate()
+        index.rebuild_index()
+        helper.get_packages_dir().joinpath('other-package', 'files', 'other-file').mkdir(parents=True)
+        loaded = index.load_index()
+        self.assertEqual(index.list_packages(loaded), ['other-package', 'test-package'])
+        self.assertEqual(index.get_files(loaded, 'other-package'), {'other-file': []})
+
+    def test_rebuild(self):
+        """Test that the rebuilt index is saved."""
+        rebuilt = index.rebuild_index()
+        self.assertEqual(index.get_files(rebuilt, 'test-package'), {'test-file': ['global']})
+        self.assertEqual(index.load_index(), rebuilt)
+
+    def test_missing_index_rebuilt(self):
+        """Test that a missing index is rebuilt when it is loaded."""
+        index.get_index_file(helper.get_modrc_dir()).unlink()
+        self.assertEqual(index.list_packages(index.load_index()), ['test-package'])
+
+    def test_corrupt_index_rebuilt(self):
+        """Test that an unreadable index is rebuilt when it is loaded."""
+        index.get_index_file(helper.get_modrc_dir()).write_text('{not json')
+        self.assertEqual(index.list_packages(index.load_index()), ['test-package'])
+
+    def test_package_does_not_exist(self):
+        """Test that an error is raised for a package that does not exist."""
+        with self.assertRaises(exceptions.ModRCPackageDoesNotExistError):
+            index.get_files(index.load_index(), 'other-package')
+        with self.assertRaises(exceptions.ModRCPackageDoesNotExistError):
+            index.get_filters(index.load_index(), 'test-file', 'other-package')
+
+    def test_file_does_not_exist(self):
+        """Test that an error is raised for a file that does not exist."""
+        with self.assertRaises(exceptions.ModRCFileDoesNotExistError):
+            index.get_filters(index.load_index(), 'other-file', 'test-package')
+
+    def test_concurrent_saves(self):
+        """Test that the index can be saved from several threads at once."""
+        modrc_dir = helper.get_modrc_dir()
+        rebuilt = index.rebuild_index()
+        errors = []
+
+        def save():
+            try:
+                for _ in range(50):
+                    index.save_index(modrc_dir, rebuilt)
+            except OSError as error:
+                errors.append(error)
+
+        threads = [threading.Thread(target=save) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(index.load_index(), rebuilt)
+
+    def backdate(self):
+        # move every directory out of the window in which changes to it are not trusted
+        past = time.time() - 60
+        for root, _, _ in os.walk(str(helper.get_packages_dir())):
+            os.utime(root, (past, past))
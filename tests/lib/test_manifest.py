@@ -0,0 +1,102 @@
+import os
+import pathlib
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from modrc.lib import manifest
+
+
+class TestManifest(unittest.TestCase):
+    def setUp(self):
+        # setup a temporary directory for the manifest, filters and live file
+        self.temp = tempfile.TemporaryDirectory()
+        self.temp_dir = pathlib.Path(self.temp.name)
+        self.filter_path = str(self.temp_dir.joinpath('global'))
+        self.live_file = self.temp_dir.joinpath('live-file')
+        self.write(self.filter_path, 'GLOBAL')
+        self.live_file.write_text('GLOBAL')
+        self.manifest = manifest.load_manifest(self.temp_dir)
+        manifest.record(self.manifest, 'live-file', 'test-package', [self.filter_path], self.live_file)
+
+    def tearDown(self):
+        # destroy the temp directory
+        self.temp.cleanup()
+
+    def write(self, path, content, age=60):
+        # write a file and move its mtime into the past so it is not racy
+        with open(path, 'w') as f:
+            f.write(content)
+        past = time.time() - age
+        os.utime(path, (past, past))
+
+    def test_load_missing_manifest(self):
+        """Test that a missing manifest loads as an empty manifest."""
+        loaded = manifest.load_manifest(self.temp_dir)
+        self.assertEqual(loaded['files'], {})
+
+    def test_load_corrupt_manifest(self):
+        """Test that an unreadable manifest loads as an empty manifest."""
+        manifest.get_manifest_file(self.temp_dir).write_text('{not json')
+        loaded = manifest.load_manifest(self.temp_dir)
+        self.assertEqual(loaded['files'], {})
+
+    def test_save_and_load(self):
+        """Test that a saved manifest is loaded again."""
+        self.assertTrue(manifest.save_manifest(self.temp_dir, self.manifest))
+        loaded = manifest.load_manifest(self.temp_dir)
+        self.assertEqual(loaded['files'], self.manifest['files'])
+
+    def test_save_unchanged(self):
+        """Test that an unchanged manifest is not written."""
+        manifest.save_manifest(self.temp_dir, self.manifest)
+        loaded = manifest.load_manifest(self.temp_dir)
+        self.assertFalse(manifest.save_manifest(self.temp_dir, loaded))
+
+    def test_up_to_date(self):
+        """Test that a live file is up to date if nothing changed."""
+        with mock.patch('modrc.lib.manifest.hash_file') as hash_file:
+            self.assertTrue(manifest.is_up_to_date(self.manifest, 'live-file', [self.filter_path], self.live_file))
+        self.assertFalse(hash_file.called)
+
+    def test_not_recorded(self):
+        """Test that a live file that was never recorded is not up to date."""
+        self.assertFalse(manifest.is_up_to_date(self.manifest, 'other-file', [self.filter_path], self.live_file))
+
+    def test_filter_set_changed(self):
+        """Test that a live file is out of date if different filters apply."""
+        other_path = str(self.temp_dir.joinpath('macos'))
+        self.write(other_path, 'MACOS')
+        filter_paths = [self.filter_path, other_path]
+        self.assertFalse(manifest.is_up_to_date(self.manifest, 'live-file', filter_paths, self.live_file))
+
+    def test_filter_content_changed(self):
+        """Test that a live file is out of date if a filter changed."""
+        self.write(self.filter_path, 'CHANGE', age=30)
+        self.assertFalse(manifest.is_up_to_date(self.manifest, 'live-file', [self.filter_path], self.live_file))
+
+    def test_filter_touched(self):
+        """Test that a live file is up to date if a filter mtime changed without its content changing."""
+        self.write(self.filter_path, 'GLOBAL', age=30)
+        self.assertTrue(manifest.is_up_to_date(self.manifest, 'live-file', [self.filter_path], self.live_file))
+        self.assertTrue(self.manifest['dirty'])
+
+    def test_live_file_changed(self):
+        """Test that a live file is out of date if it was edited."""
+        self.live_file.write_text('EDITED LIVE FILE')
+        self.assertFalse(manifest.is_up_to_date(self.manifest, 'live-file', [self.filter_path], self.live_file))
+
+    def test_live_file_removed(self):
+        """Test that a live file is out of date if it was removed."""
+        self.live_file.unlink()
+        self.assertFalse(manifest.is_up_to_date(self.manifest, 'live-file', [self.filter_path], self.live_file))
+
+    def test_racy_filter_hashed(self):
+        """Test that a filter recorded right after it was modified is hashed on the next check."""
+        self.write(self.filter_path, 'RACY', age=0)
+        manifest.record(self.manifest, 'live-file', 'test-package', [self.filter_path], self.live_file)
+        self.assertIsNone(self.manifest['files']['live-file']['filters'][0]['mtime'])
+        with open(self.filter_path, 'w') as f:
+            f.write('RACE')
+        self.assertFalse(manifest.is_up_to_date(self.manifest, 'live-file', [self.filter_path], self.live_file))
@@ -99,3 +99,27 @@ class TestGetPackageFile(unittest.TestCase):
         package_file = package.get_package_file('test-package')
         self.assertEqual(package_dir.joinpath('package.yml'), package_file)
         self.assertTrue(package_file.is_file())
+
+
+class TestListPackages(unittest.TestCase):
+    def setUp(self):
+        # setup a temporary mock home directory
+        self.temp = tempfile.TemporaryDirectory()
+        self.temp_dir = pathlib.Path(self.temp.name)
+        setup.initial_setup(self.temp_dir)
+
+    def tearDown(self):
+        # destroy the ModRC symlink
+        setup.teardown(ignore_errors=True)
+        # destroy the temp directory
+        self.temp.cleanup()
+
+    def test_no_packages(self):
+        """Test that no packages are listed in a new installation."""
+        self.assertEqual(package.list_packages(), [])
+
+    def test_list_packages(self):
+        """Test that every package is listed in sorted order."""
+        package.create_package('b-package')
+        package.create_package('a-package')
+        self.assertEqual(package.list_packages(), ['a-package', 'b-package'])
@@ -0,0 +1,86 @@
+import builtins
+import os
+import pathlib
+import tempfile
+import unittest
+
+from modrc.lib import filters, helper, manifest, profiler
+
+
+class TestProfiler(unittest.TestCase):
+    def setUp(self):
+        self.temp = tempfile.TemporaryDirectory()
+        self.temp_dir = pathlib.Path(self.temp.name)
+        self.profiler = profiler.Profiler()
+
+    def tearDown(self):
+        self.profiler.stop()
+        self.temp.cleanup()
+
+    def test_restored(self):
+        """Test that every patched function is restored when the profiler stops."""
+        originals = (os.stat, builtins.open, filters.select_filters, helper.ModRCContext._get)
+        self.profiler.start()
+        self.assertIsNot(os.stat, originals[0])
+        self.assertIsNot(filters.select_filters, originals[2])
+        self.profiler.stop()
+        self.assertEqual((os.stat, builtins.open, filters.select_filters, helper.ModRCContext._get), originals)
+
+    def test_phases(self):
+        """Test that instrumented functions are timed as their phase."""
+        self.profiler.start()
+        filters.select_filters(['global', 'macos'], 'macos')
+        manifest.load_manifest(self.temp_dir)
+        self.profiler.stop()
+        spans = [(span.name, span.detail) for span in self.profiler.spans if span.name != 'import']
+        self.assertEqual(spans, [
+            ('select filters', 'modrc.lib.filters.select_filters'),
+            ('read', 'modrc.lib.manifest.load_manifest')
+        ])
+
+    def test_nested_span(self):
+        """Test that a phase entered again while it is running is only timed once."""
+        with self.profiler.span('resolve'):
+            with self.profiler.span('resolve'):
+                pass
+            with self.profiler.span('read'):
+                pass
+        self.assertEqual([span.name for span in self.profiler.spans], ['read', 'resolve'])
+
+    def test_filesystem_calls(self):
+        """Test that filesystem calls and the bytes moved through them are counted."""
+        path = self.temp_dir.joinpath('file')
+        self.profiler.start()
+        with open(str(path), 'wb') as f:
+            f.write(b'x' * 100)
+        path.read_bytes()
+        os.stat(str(path))
+        fd = os.open(str(path), os.O_RDONLY)
+        os.read(fd, 10)
+        os.close(fd)
+        self.profiler.stop()
+        self.assertEqual(self.profiler.calls['open'], 3)
+        self.assertGreaterEqual(self.profiler.calls['stat'], 1)
+        self.assertEqual(self.profiler.bytes, {'read': 110, 'written': 100})
+
+    def test_summary(self):
+        """Test that the summary lists the phases, calls and bytes."""
+        self.profiler.start()
+        filters.select_filters(['global'], 'macos')
+        os.stat(str(self.temp_dir))
+        self.profiler.stop()
+        summary = self.profiler.summary()
+        for line in ('select filters', 'total', 'stat', 'bytes read', 'bytes written'):
+            self.assertIn(line, summary)
+
+    def test_chrome_trace(self):
+        """Test that spans become complete events and counts become counter events."""
+        with self.profiler.span('write', 'detail'):
+            pass
+        self.profiler.add_bytes('written', 5)
+        events = self.profiler.chrome_trace()['traceEvents']
+        self.assertEqual(events[0]['name'], 'write')
+        self.assertEqual(events[0]['ph'], 'X')
+        self.assertEqual(events[0]['args'], {'function': 'detail'})
+        self.assertEqual(events[-1], {'name': 'bytes', 'ph': 'C', 'ts': events[0]['ts'] + events[0]['dur'],
+                                      'pid': os.getpid(), 'args': {'read': 0, 'written': 5}})
@@ -0,0 +1,139 @@
+import os
+import pathlib
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+from modrc import __main__, exceptions
+from modrc.lib import client, file, helper, package, server, setup
+
+
+class TestHandleRequest(unittest.TestCase):
+    def setUp(self):
+        # setup a temporary mock home directory
+        self.temp = tempfile.TemporaryDirectory()
+        setup.initial_setup(pathlib.Path(self.temp.name))
+
+    def tearDown(self):
+        # destroy the ModRC symlink
+        setup.teardown(ignore_errors=True)
+        # destroy the temp directory
+        self.temp.cleanup()
+
+    def test_output_captured(self):
+        """Test that the output and exit code of a command are captured."""
+        response = server.handle_request(__main__.main, ['index', 'rebuild'])
+        self.assertEqual(response, {'exit_code': 0, 'stdout': 'Indexed 0 packages, 0 files and 0 filters\n', 'stderr': ''})
+
+    def test_command_error(self):
+        """Test that the exit code of a failing command is captured."""
+        response = server.handle_request(__main__.main, ['compile', '-p', 'test-package', '-s', 'macos'])
+        self.assertEqual(response['exit_code'], 2)
+        self.assertIn('Package does not exist', response['stdout'])
+
+    def test_usage_error(self):
+        """Test that usage errors are reported like the CLI reports them."""
+        response = server.handle_request(__main__.main, ['compile', '--bad-option'])
+        self.assertEqual(response['exit_code'], 2)
+        self.assertIn('No such option', response['stderr'])
+
+    def test_unexpected_error(self):
+        """Test that an unexpected error is reported instead of stopping the server."""
+        with mock.patch('modrc.lib.index.rebuild_index', side_effect=RuntimeError('boom')):
+            response = server.handle_request(__main__.main, ['index', 'rebuild'])
+        self.assertEqual(response['exit_code'], 1)
+        self.assertIn('RuntimeError: boom', response['stderr'])
+
+    def test_client_cwd(self):
+        """Test that relative paths are resolved against the working directory of the client."""
+        package.create_package('test-package')
+        file.create_file('test-file', 'test-package')
+        file.create_file_filter('global', 'test-file', 'test-package').write_text('GLOBAL')
+        client_dir = pathlib.Path(self.temp.name).joinpath('client')
+        client_dir.mkdir()
+        server_cwd = os.getcwd()
+        response = server.handle_request(__main__.main, ['compile', '-t', 'linux', '-o', 'out'], cwd=str(client_dir))
+        self.assertEqual(response['exit_code'], 0)
+        self.assertEqual(client_dir.joinpath('out', 'linux', 'test-file').read_text(), 'GLOBAL')
+        self.assertEqual(os.getcwd(), server_cwd)
+
+    def test_client_environ(self):
+        """Test that a command sees the environment of the client, and the server keeps its own."""
+        package_dir = package.create_package('test-package')
+        package_dir.joinpath('package.yml').write_text('templates: true\n')
+        file.create_file('test-file', 'test-package')
+        file.create_file_filter('global', 'test-file', 'test-package').write_text('{{ env.MODRC_TEST_USER }}')
+        environ = dict(os.environ, MODRC_TEST_USER='client')
+        response = server.handle_request(__main__.main, ['compile', '-s', 'linux'], environ=environ)
+        self.assertEqual(response['exit_code'], 0)
+        self.assertEqual(helper.get_live_dir().joinpath('test-file').read_text(), 'client')
+        self.assertNotIn('MODRC_TEST_USER', os.environ)
+
+
+class TestServer(unittest.TestCase):
+    def setUp(self):
+        # setup a temporary mock home directory with a package and start a server in a thread
+        self.temp = tempfile.TemporaryDirectory()
+        setup.initial_setup(pathlib.Path(self.temp.name))
+        package.create_package('test-package')
+        file.create_file('test-file', 'test-package')
+        file.create_file_filter('global', 'test-file', 'test-package').write_text('GLOBAL')
+        self.server = server.create_server()
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.start()
+
+    def tearDown(self):
+        # stop the server
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+        # destroy the ModRC symlink
+        setup.teardown(ignore_errors=True)
+        # destroy the temp directory
+        self.temp.cleanup()
+
+    def test_forward(self):
+        """Test that a command is forwarded to the server and run by it."""
+        response = client.forward(['compile', '-s', 'macos'])
+        self.assertEqual(response, {'exit_code': 0, 'stdout': 'test-file: compiled\n', 'stderr': ''})
+        self.assertEqual(helper.get_live_dir().joinpath('test-file').read_text(), 'GLOBAL')
+
+    def test_forward_cwd(self):
+        """Test that the working directory and environment of the client are sent with the command."""
+        with mock.patch('modrc.lib.server.handle_request', return_value={}) as handle_request:
+            client.forward(['compile', '-t', 'linux', '-o', 'out'])
+        self.assertEqual(handle_request.call_args[0][2:], (os.getcwd(), dict(os.environ)))
+
+    def test_refresh(self):
+        """Test that the cached fingerprint is dropped once the fingerprint file changes."""
+        with mock.patch('modrc.lib.system.clear_cache') as clear_cache:
+            self.server.refresh()
+            self.assertFalse(clear_cache.called)
+            fingerprint_file = helper.get_modrc_dir().joinpath('system.json')
+            fingerprint_file.write_text('{}')
+            self.server.refresh()
+        clear_cache.assert_called_once_with()
+
+    def test_already_running(self):
+        """Test that a second server cannot be started."""
+        with self.assertRaises(exceptions.ModRCServerRunningError):
+            server.create_server()
+
+    def test_socket_removed(self):
+        """Test that the socket is removed when the server is closed."""
+        self.server.shutdown()
+        self.server.server_close()
+        self.assertFalse(os.path.exists(client.get_socket_file()))
+        self.assertIsNone(client.forward(['compile', '-s', 'macos']))
+
+    def test_stale_socket_replaced(self):
+        """Test that a socket left behind by a stopped server is replaced."""
+        self.server.shutdown()
+        self.server.socket.close()
+        self.assertTrue(os.path.exists(client.get_socket_file()))
+        self.assertIsNone(client.forward(['compile', '-s', 'macos']))
+        self.server = server.create_server()
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.start()
+        self.assertEqual(client.forward(['index', 'rebuild'])['exit_code'], 0)
@@ -0,0 +1,159 @@
+import errno
+import os
+import pathlib
+import stat
+import tempfile
+import unittest
+from unittest import mock
+
+from modrc import exceptions
+from modrc.lib import compiler, config, file, helper, package, setup, store
+
+
+class TestDedup(unittest.TestCase):
+    def setUp(self):
+        # setup a temporary mock home directory
+        self.temp = tempfile.TemporaryDirectory()
+        self.temp_dir = pathlib.Path(self.temp.name)
+        setup.initial_setup(self.temp_dir)
+        self.filters = []
+        for package_name in ['a-package', 'b-package']:
+            package.create_package(package_name)
+            for file_name in ['{}-aliases'.format(package_name), '{}-functions'.format(package_name)]:
+                file.create_file(file_name, package_name)
+                file_filter = file.create_file_filter('global', file_name, package_name)
+                file_filter.write_text('alias ll="ls -l"\n')
+                self.filters.append(file_filter)
+        self.other = file.create_file_filter('linux', 'a-package-aliases', 'a-package')
+        self.other.write_text('alias open=xdg-open\n')
+        self.store_dir = store.get_store_dir(helper.get_modrc_dir())
+
+    def tearDown(self):
+        # destroy the ModRC symlink
+        setup.teardown(ignore_errors=True)
+        # destroy the temp directory
+        self.temp.cleanup()
+
+    def test_dedup(self):
+        """Test that identical filters are linked to a single read only object."""
+        result = store.dedup()
+        self.assertEqual(result, store.DedupResult(5, 2, 5, 51))
+        inodes = {file_filter.stat().st_ino for file_filter in self.filters}
+        self.assertEqual(len(inodes), 1)
+        self.assertEqual(self.filters[0].stat().st_nlink, 5)
+        self.assertEqual(stat.S_IMODE(self.filters[0].stat().st_mode), store.OBJECT_MODE)
+        self.assertEqual(self.filters[3].read_text(), 'alias ll="ls -l"\n')
+        self.assertEqual(self.other.stat().st_nlink, 2)
+
+    def test_dedup_again(self):
+        """Test that filters already linked are left alone."""
+        store.dedup()
+        result = store.dedup()
+        self.assertEqual(result, store.DedupResult(5, 2, 0, 51))
+
+    def test_temp_links_skipped(self):
+        """Test that temporary links left behind by an interrupted run are not treated as filters."""
+        temp = self.other.with_name(self.other.name + store.TEMP_SUFFIX)
+        temp.write_text('alias open=xdg-open\n')
+        self.assertEqual(len(store.list_filters(helper.get_packages_dir())), 5)
+        result = store.dedup()
+        self.assertEqual(result, store.DedupResult(5, 2, 5, 51))
+        self.assertEqual(temp.stat().st_nlink, 1)
+
+    def test_hash_linked_once(self):
+        """Test that filters linked to the same object are only hashed once."""
+        store.dedup()
+        with mock.patch('modrc.lib.manifest.hash_file', wraps=store.manifest.hash_file) as hash_file:
+            store.dedup()
+        self.assertEqual(hash_file.call_count, 2)
+
+    def test_dry_run(self):
+        """Test that a dry run counts the filters to link without linking them."""
+        result = store.dedup(dry_run=True)
+        self.assertEqual(result, store.DedupResult(5, 2, 5, 51))
+        self.assertEqual(self.filters[0].stat().st_nlink, 1)
+        self.assertFalse(self.store_dir.exists())
+
+    def test_executable(self):
+        """Test that executable filters are not linked to the same object as other filters."""
+        os.chmod(str(self.filters[0]), 0o755)
+        result = store.dedup()
+        self.assertEqual(result.objects, 3)
+        self.assertEqual(stat.S_IMODE(self.filters[0].stat().st_mode), store.EXECUTABLE_MODE)
+        self.assertEqual(stat.S_IMODE(self.filters[1].stat().st_mode), store.OBJECT_MODE)
+
+    def test_prune(self):
+        """Test that objects no filter is linked to are removed."""
+        store.dedup()
+        self.other.unlink()
+        self.other.write_text('alias open=xdg-open\n')
+        self.other.unlink()
+        store.dedup()
+        self.assertEqual(len(list(self.store_dir.iterdir())), 1)
+
+    def test_different_filesystem(self):
+        """Test that an exception is raised if filters cannot be linked into the store."""
+        error = OSError(errno.EXDEV, 'Invalid cross-device link')
+        with mock.patch('os.link', side_effect=error):
+            with self.assertRaises(exceptions.ModRCStoreError):
+                store.dedup()
+
+    def test_compile(self):
+        """Test that linked filters compile the same as before."""
+        compiler.compile_packages(['a-package', 'b-package'], 'linux')
+        live_dir = helper.get_live_dir()
+        before = {path.name: path.read_text() for path in live_dir.iterdir()}
+        store.dedup()
+        results = compiler.compile_packages(['a-package', 'b-package'], 'linux')
+        statuses = {result.status for package_results in results.values() for result in package_results}
+        self.assertEqual(statuses, {compiler.UP_TO_DATE})
+        compiler.compile_packages(['a-package', 'b-package'], 'linux', force=True)
+        self.assertEqual({path.name: path.read_text() for path in live_dir.iterdir()}, before)
+
+    def test_templates_read_once(self):
+        """Test that templates linked to the same object are only read once in a compile."""
+        for package_name in ['a-package', 'b-package']:
+            config.update_config(helper.get_packages_dir().joinpath(package_name, 'package.yml'), {'templates': True})
+        store.dedup()
+        with mock.patch('modrc.lib.store.open', create=True, side_effect=open) as mock_open:
+            compiler.compile_packages(['a-package', 'b-package'], 'macos', force=True)
+        self.assertEqual(mock_open.call_count, 1)
+
+    def test_restore(self):
+        """Test that restoring gives every filter its own writable copy and empties the store."""
+        store.dedup()
+        self.assertEqual(store.restore(), 5)
+        inodes = {file_filter.stat().st_ino for file_filter in self.filters}
+        self.assertEqual(len(inodes), 4)
+        self.assertEqual(stat.S_IMODE(self.filters[0].stat().st_mode), store.FILTER_MODE)
+        self.assertEqual(self.filters[0].read_text(), 'alias ll="ls -l"\n')
+        self.assertEqual(list(self.store_dir.iterdir()), [])
+
+
+class TestBlobCache(unittest.TestCase):
+    def setUp(self):
+        self.temp = tempfile.TemporaryDirectory()
+        self.temp_dir = pathlib.Path(self.temp.name)
+        self.path = self.temp_dir.joinpath('filter')
+        self.path.write_bytes(b'contents')
+
+    def tearDown(self):
+        self.temp.cleanup()
+
+    def test_unlinked_not_kept(self):
+        """Test that files with a single link are read every time."""
+        blobs = store.BlobCache()
+        with mock.patch('modrc.lib.store.open', create=True, side_effect=open) as mock_open:
+            self.assertEqual(blobs.read(str(self.path)), b'contents')
+            self.assertEqual(blobs.read(str(self.path)), b'contents')
+        self.assertEqual(mock_open.call_count, 2)
+
+    def test_linked_read_once(self):
+        """Test that files linked to the same inode are read once."""
+        linked = self.temp_dir.joinpath('linked')
+        os.link(str(self.path), str(linked))
+        blobs = store.BlobCache()
+        with mock.patch('modrc.lib.store.open', create=True, side_effect=open) as mock_open:
+            self.assertEqual(blobs.read(str(self.path)), b'contents')
+            self.assertEqual(blobs.read(str(linked)), b'contents')
+        self.assertEqual(mock_open.call_count, 1)
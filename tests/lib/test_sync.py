@@ -0,0 +1,209 @@
+import pathlib
+import subprocess
+import tempfile
+import unittest
+from unittest import mock
+
+from modrc import exceptions
+from modrc.lib import helper, index, package, setup, sync
+
+
+def git(cwd, *args):
+    return subprocess.run(['git'] + list(args), cwd=str(cwd), stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                          universal_newlines=True, check=True).stdout.strip()
+
+def init_repo(path, remote=None):
+    git(path, 'init', '-q', '-b', 'master')
+    git(path, 'config', 'user.name', 'ModRC Tests')
+    git(path, 'config', 'user.email', 'tests@modrc.example')
+    if remote is not None:
+        git(path, 'remote', 'add', 'origin', str(remote))
+
+
+class TestSync(unittest.TestCase):
+    def setUp(self):
+        # setup a temporary mock home directory with packages backed by local bare repos
+        self.temp = tempfile.TemporaryDirectory()
+        self.temp_dir = pathlib.Path(self.temp.name)
+        self.temp_dir.joinpath('modrc').mkdir()
+        setup.initial_setup(self.temp_dir.joinpath('modrc'))
+        self.remotes = {}
+        for package_name in ['a-package', 'b-package']:
+            remote = self.temp_dir.joinpath('{}.git'.format(package_name))
+            remote.mkdir()
+            git(remote, 'init', '-q', '--bare', '-b', 'master')
+            package_dir = package.create_package(package_name)
+            init_repo(package_dir, remote)
+            self.remotes[package_name] = remote
+
+    def tearDown(self):
+        # destroy the ModRC symlink
+        setup.teardown(ignore_errors=True)
+        # destroy the temp directory
+        self.temp.cleanup()
+
+    def clone(self, package_name):
+        clone_dir = self.temp_dir.joinpath('{}-clone'.format(package_name))
+        git(self.temp_dir, 'clone', '-q', str(self.remotes[package_name]), str(clone_dir))
+        git(clone_dir, 'config', 'user.name', 'ModRC Tests')
+        git(clone_dir, 'config', 'user.email', 'tests@modrc.example')
+        return clone_dir
+
+    def test_push_local_edits(self):
+        """Test that local edits are batched into one commit and pushed."""
+        package_dir = helper.get_packages_dir().joinpath('a-package')
+        package_dir.joinpath('files').mkdir()
+        package_dir.joinpath('files', 'one').write_text('1')
+        package_dir.joinpath('files', 'two').write_text('2')
+        results = sync.sync_packages(['a-package'])
+        self.assertEqual(results[0].status, sync.SYNCED)
+        self.assertEqual(git(self.remotes['a-package'], 'rev-list', '--count', 'master'), '1')
+        self.assertEqual(git(package_dir, 'rev-parse', 'HEAD'), git(self.remotes['a-package'], 'rev-parse', 'master'))
+
+    def test_unchanged_skipped(self):
+        """Test that a package without local or remote changes is not pulled or pushed."""
+        sync.sync_packages(['a-package', 'b-package'])
+        with mock.patch('modrc.lib.sync.run_git', wraps=sync.run_git) as run_git:
+            results = sync.sync_packages(['a-package', 'b-package'])
+        self.assertEqual([result.status for result in results], [sync.UP_TO_DATE, sync.UP_TO_DATE])
+        commands = {call[0][1] for call in run_git.call_args_list}
+        self.assertFalse(commands & {'pull', 'push', 'fetch', 'commit'})
+
+    def test_pull_remote_changes(self):
+        """Test that changes pushed from elsewhere are pulled."""
+        package_dir = helper.get_packages_dir().joinpath('a-package')
+        package_dir.joinpath('package.yml').write_text('repourl: somewhere\n')
+        sync.sync_packages(['a-package'])
+        clone_dir = self.clone('a-package')
+        clone_dir.joinpath('remote-file').write_text('remote')
+        git(clone_dir, 'add', '--all')
+        git(clone_dir, 'commit', '-q', '-m', 'Remote change')
+        git(clone_dir, 'push', '-q', 'origin', 'master')
+        package_dir.joinpath('local-file').write_text('local')
+        results = sync.sync_packages(['a-package'])
+        self.assertEqual(results[0].status, sync.SYNCED)
+        self.assertEqual(package_dir.joinpath('remote-file').read_text(), 'remote')
+        self.assertEqual(git(package_dir, 'rev-parse', 'HEAD'), git(self.remotes['a-package'], 'rev-parse', 'master'))
+
+    def test_conflict_aborted(self):
+        """Test that a pull that fails to rebase is aborted and the local commit is kept."""
+        package_dir = helper.get_packages_dir().joinpath('a-package')
+        package_dir.joinpath('conflict').write_text('base\n')
+        sync.sync_packages(['a-package'])
+        clone_dir = self.clone('a-package')
+        clone_dir.joinpath('conflict').write_text('remote\n')
+        git(clone_dir, 'commit', '-q', '-am', 'Remote change')
+        git(clone_dir, 'push', '-q', 'origin', 'master')
+        package_dir.joinpath('conflict').write_text('local\n')
+        results = sync.sync_packages(['a-package'])
+        self.assertEqual(results[0].status, sync.FAILED)
+        self.assertFalse(package_dir.joinpath('.git', 'rebase-merge').exists())
+        self.assertFalse(package_dir.joinpath('.git', 'rebase-apply').exists())
+        self.assertEqual(git(package_dir, 'symbolic-ref', '--short', 'HEAD'), 'master')
+        self.assertEqual(package_dir.joinpath('conflict').read_text(), 'local\n')
+
+    def test_parallel_timings(self):
+        """Test that packages are synced concurrently and each reports its own timing."""
+        results = sync.sync_packages(['a-package', 'b-package'], jobs=2)
+        self.assertEqual([result.package_name for result in results], ['a-package', 'b-package'])
+        for result in results:
+            self.assertGreaterEqual(result.seconds, 0)
+
+    def test_not_a_repository(self):
+        """Test that a package that is not a git repository is skipped."""
+        package.create_package('c-package')
+        self.assertEqual(sync.sync_packages(['c-package'])[0].status, sync.NOT_A_REPOSITORY)
+
+    def test_failed(self):
+        """Test that a failing git command is reported for its package only."""
+        git(helper.get_packages_dir().joinpath('b-package'), 'remote', 'set-url', 'origin', '/does/not/exist')
+        results = sync.sync_packages(['a-package', 'b-package'], jobs=2)
+        self.assertEqual([result.status for result in results], [sync.SYNCED, sync.FAILED])
+        self.assertTrue(results[1].message)
+
+    def test_package_does_not_exist(self):
+        """Test that an exception is raised if a package does not exist."""
+        with self.assertRaises(exceptions.ModRCPackageDoesNotExistError):
+            sync.sync_packages(['a-package', 'c-package'])
+
+
+class TestClone(unittest.TestCase):
+    def setUp(self):
+        # setup a temporary mock home directory and local bare repos with some history
+        self.temp = tempfile.TemporaryDirectory()
+        self.temp_dir = pathlib.Path(self.temp.name)
+        self.temp_dir.joinpath('modrc').mkdir()
+        setup.initial_setup(self.temp_dir.joinpath('modrc'))
+        self.urls = []
+        for package_name in ['a-package', 'b-package']:
+            remote = self.temp_dir.joinpath('{}.git'.format(package_name))
+            remote.mkdir()
+            git(remote, 'init', '-q', '--bare', '-b', 'master')
+            git(remote, 'config', 'uploadpack.allowFilter', 'true')
+            work_dir = self.temp_dir.joinpath(package_name)
+            work_dir.mkdir()
+            init_repo(work_dir, remote)
+            for i in range(3):
+                work_dir.joinpath('file').write_text(str(i))
+                git(work_dir, 'add', '--all')
+                git(work_dir, 'commit', '-q', '-m', 'Commit {}'.format(i))
+            git(work_dir, 'push', '-q', 'origin', 'master')
+            self.urls.append(remote.as_uri())
+
+    def tearDown(self):
+        # destroy the ModRC symlink
+        setup.teardown(ignore_errors=True)
+        # destroy the temp directory
+        self.temp.cleanup()
+
+    def test_package_name_from_url(self):
+        """Test that packages are named after the last segment of their URL."""
+        self.assertEqual(sync.package_name_from_url('https://example.com/user/dotfiles.git'), 'dotfiles')
+        self.assertEqual(sync.package_name_from_url('git@example.com:user/dotfiles.git'), 'dotfiles')
+        self.assertEqual(sync.package_name_from_url('file:///repos/dotfiles/'), 'dotfiles')
+
+    def test_clone_packages(self):
+        """Test that every repo is cloned, indexed and given a package.yml with its URL."""
+        progress = []
+        results = sync.clone_packages(self.urls, jobs=2, progress=progress.append)
+        self.assertEqual([result.status for result in results], [sync.CLONED, sync.CLONED])
+        self.assertEqual(sorted(result.package_name for result in progress), ['a-package', 'b-package'])
+        self.assertEqual(package.list_packages(), ['a-package', 'b-package'])
+        self.assertEqual(package.load_package_config('a-package'), {'repourl': self.urls[0]})
+        self.assertEqual(index.list_packages(index.load_index()), ['a-package', 'b-package'])
+        self.assertEqual(helper.get_packages_dir().joinpath('b-package', 'file').read_text(), '2')
+
+    def test_blobless(self):
+        """Test that a blobless clone keeps the history without fetching every file."""
+        sync.clone_packages(self.urls[:1])
+        package_dir = helper.get_packages_dir().joinpath('a-package')
+        self.assertEqual(git(package_dir, 'rev-list', '--count', 'HEAD'), '3')
+        self.assertEqual(git(package_dir, 'config', 'remote.origin.partialclonefilter'), 'blob:none')
+
+    def test_shallow(self):
+        """Test that a shallow clone only fetches the latest commit."""
+        sync.clone_packages(self.urls[:1], mode=sync.SHALLOW)
+        package_dir = helper.get_packages_dir().joinpath('a-package')
+        self.assertEqual(git(package_dir, 'rev-list', '--count', 'HEAD'), '1')
+
+    def test_cloned_package_synced(self):
+        """Test that a cloned package can be synced."""
+        sync.clone_packages(self.urls[:1])
+        package_dir = helper.get_packages_dir().joinpath('a-package')
+        git(package_dir, 'config', 'user.name', 'ModRC Tests')
+        git(package_dir, 'config', 'user.email', 'tests@modrc.example')
+        self.assertEqual(sync.sync_packages(['a-package'])[0].status, sync.SYNCED)
+        self.assertEqual(sync.sync_packages(['a-package'])[0].status, sync.UP_TO_DATE)
+
+    def test_clone_failed(self):
+        """Test that a failed clone is reported without stopping the other clones."""
+        results = sync.clone_packages([self.urls[0], self.temp_dir.joinpath('missing.git').as_uri()])
+        self.assertEqual([result.status for result in results], [sync.CLONED, sync.FAILED])
+        self.assertEqual(package.list_packages(), ['a-package'])
+
+    def test_package_exists(self):
+        """Test that nothing is cloned if a package already exists."""
+        package.create_package('b-package')
+        with self.assertRaises(exceptions.ModRCPackageExistsError):
+            sync.clone_packages(self.urls)
+        self.assertEqual(package.list_packages(), ['b-package'])
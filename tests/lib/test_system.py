@@ -0,0 +1,127 @@
+import json
+import pathlib
+import tempfile
+import unittest
+from unittest import mock
+
+from parameterized import parameterized
+
+from modrc.lib import helper, setup, system
+
+
+class TestFormatSystem(unittest.TestCase):
+    @parameterized.expand([
+        ({'os': 'macos', 'distro': None, 'version': '10.15.1'}, 'macos.10.15.1'),
+        ({'os': 'linux', 'distro': 'ubuntu', 'version': '18.04.3'}, 'linux.ubuntu.18.04.3'),
+        ({'os': 'linux', 'distro': 'arch', 'version': None}, 'linux.arch'),
+        ({'os': 'linux', 'distro': None, 'version': None}, 'linux'),
+        ({'os': None, 'distro': None, 'version': None}, None)
+    ])
+    def test_format_system(self, fingerprint, expected):
+        """Test that fingerprints are formatted the same as filter names."""
+        self.assertEqual(system.format_system(fingerprint), expected)
+
+
+class TestParseSystem(unittest.TestCase):
+    @parameterized.expand([
+        ('macos.10.15.1', {'os': 'macos', 'distro': None, 'version': '10.15.1', 'mac': None}),
+        ('linux.ubuntu.18.04.3', {'os': 'linux', 'distro': 'ubuntu', 'version': '18.04.3', 'mac': None}),
+        ('linux.arch', {'os': 'linux', 'distro': 'arch', 'version': None, 'mac': None}),
+        ('linux.5.4', {'os': 'linux', 'distro': None, 'version': '5.4', 'mac': None}),
+        ('linux', {'os': 'linux', 'distro': None, 'version': None, 'mac': None}),
+        ('0123456789ab', {'os': None, 'distro': None, 'version': None, 'mac': '0123456789ab'})
+    ])
+    def test_parse_system(self, system_string, expected):
+        """Test that system strings are parsed into fingerprints that format back to the same string."""
+        fingerprint = system.parse_system(system_string)
+        self.assertEqual(fingerprint, expected)
+        if fingerprint['mac'] is None:
+            self.assertEqual(system.format_system(fingerprint), system_string)
+
+
+class TestDetectFingerprint(unittest.TestCase):
+    def test_macos(self):
+        """Test the detection of a macOS system."""
+        with mock.patch('platform.system', return_value='Darwin'), \
+                mock.patch('platform.mac_ver', return_value=('10.15.1', ('', '', ''), 'x86_64')), \
+                mock.patch('uuid.getnode', return_value=0x02fc456789ab):
+            fingerprint = system.detect_fingerprint()
+        self.assertEqual(fingerprint, {'os': 'macos', 'distro': None, 'version': '10.15.1', 'mac': '02fc456789ab'})
+
+    def test_linux(self):
+        """Test the detection of a Linux system."""
+        with mock.patch('platform.system', return_value='Linux'), \
+                mock.patch('distro.id', return_value='ubuntu'), \
+                mock.patch('distro.version', return_value='18.04.3'), \
+                mock.patch('uuid.getnode', return_value=0x02fc456789ab):
+            fingerprint = system.detect_fingerprint()
+        self.assertEqual(fingerprint, {'os': 'linux', 'distro': 'ubuntu', 'version': '18.04.3', 'mac': '02fc456789ab'})
+
+    def test_random_mac_address(self):
+        """Test that a random node is not used as the MAC address."""
+        with mock.patch('uuid.getnode', return_value=0x010000000000):
+            self.assertIsNone(system.detect_fingerprint()['mac'])
+
+
+class TestGetFingerprint(unittest.TestCase):
+    def setUp(self):
+        # setup a temporary mock home directory
+        self.temp = tempfile.TemporaryDirectory()
+        self.temp_dir = pathlib.Path(self.temp.name)
+        setup.initial_setup(self.temp_dir)
+        self.fingerprint = {'os': 'linux', 'distro': 'arch', 'version': None, 'mac': '0123456789ab'}
+        system._fingerprint = None
+
+    def tearDown(self):
+        system._fingerprint = None
+        # destroy the ModRC symlink
+        setup.teardown(ignore_errors=True)
+        # destroy the temp directory
+        self.temp.cleanup()
+
+    def test_cache_file_written(self):
+        """Test that a detected fingerprint is cached in the ModRC directory."""
+        with mock.patch('modrc.lib.system.detect_fingerprint', return_value=self.fingerprint):
+            system.get_fingerprint()
+        with open(str(system.get_fingerprint_file(helper.get_modrc_dir()))) as ff:
+            cached = json.load(ff)
+        self.assertEqual(cached['fingerprint'], self.fingerprint)
+        self.assertEqual(cached['stamp'], system.get_release_stamp())
+
+    def test_cache_file_used(self):
+        """Test that a current cached fingerprint is used without detecting it."""
+        with mock.patch('modrc.lib.system.detect_fingerprint', return_value=self.fingerprint):
+            system.get_fingerprint()
+        system._fingerprint = None
+        with mock.patch('modrc.lib.system.detect_fingerprint') as detect_fingerprint:
+            self.assertEqual(system.get_fingerprint(), self.fingerprint)
+        self.assertFalse(detect_fingerprint.called)
+
+    def test_release_changed(self):
+        """Test that the fingerprint is detected again if the release files changed."""
+        with mock.patch('modrc.lib.system.detect_fingerprint', return_value=self.fingerprint):
+            system.get_fingerprint()
+        system._fingerprint = None
+        stamp = ['Linux', ['/etc/os-release', 1, 1]]
+        upgraded = dict(self.fingerprint, version='2')
+        with mock.patch('modrc.lib.system.get_release_stamp', return_value=stamp), \
+                mock.patch('modrc.lib.system.detect_fingerprint', return_value=upgraded):
+            self.assertEqual(system.get_fingerprint(), upgraded)
+
+    def test_memoized(self):
+        """Test that the fingerprint is only loaded once per process."""
+        with mock.patch('modrc.lib.system.detect_fingerprint', return_value=self.fingerprint) as detect_fingerprint:
+            system.get_fingerprint()
+            system.get_fingerprint()
+        detect_fingerprint.assert_called_once_with()
+
+    def test_not_installed(self):
+        """Test that the fingerprint is detected without a ModRC installation."""
+        setup.teardown()
+        with mock.patch('modrc.lib.system.detect_fingerprint', return_value=self.fingerprint):
+            self.assertEqual(system.get_fingerprint(), self.fingerprint)
+
+    def test_get_targets(self):
+        """Test that the targets are the system string followed by the MAC address."""
+        with mock.patch('modrc.lib.system.detect_fingerprint', return_value=self.fingerprint):
+            self.assertEqual(system.get_targets(), ['linux.arch', '0123456789ab'])
@@ -0,0 +1,129 @@
+import os
+import pathlib
+import tempfile
+import unittest
+from unittest import mock
+
+from parameterized import parameterized
+
+from modrc import exceptions
+from modrc.lib import compiler, config, file, helper, package, setup, template
+
+
+class TestParseTemplate(unittest.TestCase):
+    def setUp(self):
+        template.clear_cache()
+
+    def test_render(self):
+        """Test that every variable is replaced by its looked up value."""
+        parsed = template.parse_template(b'user={{ env.USER }} host={{system.hostname}} again={{ env.USER }}\n')
+        self.assertEqual(parsed.names, ('env.USER', 'system.hostname'))
+        values = {'env.USER': b'me', 'system.hostname': b'box'}
+        self.assertEqual(parsed.render(values.__getitem__), b'user=me host=box again=me\n')
+
+    def test_no_variables(self):
+        """Test that contents without variables render as they are."""
+        parsed = template.parse_template(b'echo ${{HOME}} {{ not a variable }}\n')
+        self.assertEqual(parsed.names, ())
+        self.assertEqual(parsed.render(None), b'echo ${{HOME}} {{ not a variable }}\n')
+
+    def test_cached(self):
+        """Test that templates are only parsed once for the same contents."""
+        with mock.patch('modrc.lib.template.parse_template', side_effect=template.parse_template) as parse:
+            first = template.get_template(b'{{ env.USER }}')
+            second = template.get_template(b'{{ env.USER }}')
+            template.get_template(b'{{ env.HOME }}')
+        self.assertIs(first, second)
+        self.assertEqual(parse.call_count, 2)
+
+    def test_cache_size(self):
+        """Test that the least recently used templates are forgotten past the cache size."""
+        with mock.patch('modrc.lib.template.TEMPLATE_CACHE_SIZE', 2):
+            first = template.get_template(b'1')
+            template.get_template(b'2')
+            template.get_template(b'1')
+            template.get_template(b'3')
+            self.assertIs(template.get_template(b'1'), first)
+            self.assertEqual(len(template._cache), 2)  # pylint: disable=protected-access
+
+    @parameterized.expand([(None, ''), (True, 'true'), (False, 'false'), (3, '3'), ('text', 'text')])
+    def test_format_value(self, value, expected):
+        """Test that values are formatted as they are written into live files."""
+        self.assertEqual(template.format_value(value), expected)
+
+
+class TestRenderer(unittest.TestCase):
+    def setUp(self):
+        # setup a temporary mock home directory
+        self.temp = tempfile.TemporaryDirectory()
+        self.temp_dir = pathlib.Path(self.temp.name)
+        setup.initial_setup(self.temp_dir)
+        package_dir = package.create_package('test-package')
+        config.update_config(package_dir.joinpath('package.yml'), {
+            'templates': True,
+            'git': {'email': 'me@example.com'}
+        })
+        file.create_file('gitconfig', 'test-package')
+        self.filter = file.create_file_filter('global', 'gitconfig', 'test-package')
+        self.filter.write_text('email = {{ package.git.email }}\nuser = {{ env.MODRC_TEST_USER }}\n')
+        self.live_file = helper.get_live_dir().joinpath('gitconfig')
+        os.environ['MODRC_TEST_USER'] = 'me'
+
+    def tearDown(self):
+        os.environ.pop('MODRC_TEST_USER', None)
+        # destroy the ModRC symlink
+        setup.teardown(ignore_errors=True)
+        # destroy the temp directory
+        self.temp.cleanup()
+
+    def test_lookup(self):
+        """Test that system, environment and package variables are looked up."""
+        renderer = template.Renderer()
+        with mock.patch('modrc.lib.system.get_fingerprint',
+                        return_value={'os': 'linux', 'distro': 'arch', 'version': None, 'mac': None}):
+            self.assertEqual(renderer.lookup('test-package', 'system.name'), 'linux.arch')
+            self.assertEqual(renderer.lookup('test-package', 'system.version'), '')
+        self.assertEqual(renderer.lookup('test-package', 'env.MODRC_TEST_USER'), 'me')
+        self.assertEqual(renderer.lookup('test-package', 'package.git.email'), 'me@example.com')
+
+    @parameterized.expand([('env.MODRC_DOES_NOT_EXIST',), ('package.git.name',), ('system.nothing',), ('other.key',)])
+    def test_lookup_does_not_exist(self, name):
+        """Test that an exception is raised for a variable that does not exist."""
+        with self.assertRaises(exceptions.ModRCTemplateError):
+            template.Renderer().lookup('test-package', name)
+
+    def test_compile(self):
+        """Test that the filters of a package that uses templates are rendered when compiling."""
+        file.compile_file('gitconfig', 'test-package', 'linux')
+        self.assertEqual(self.live_file.read_text(), 'email = me@example.com\nuser = me\n')
+
+    def test_not_templates(self):
+        """Test that filters are copied as they are unless the package uses templates."""
+        config.update_config(package.get_package_file('test-package'), {'templates': False})
+        compiler.compile_packages(['test-package'], 'linux')
+        self.assertEqual(self.live_file.read_text(), self.filter.read_text())
+
+    def test_changed_variable(self):
+        """Test that a live file is compiled again when a variable it uses changes."""
+        compiler.compile_packages(['test-package'], 'linux')
+        results = compiler.compile_packages(['test-package'], 'linux')
+        self.assertEqual(results['test-package'][0].status, compiler.UP_TO_DATE)
+        os.environ['MODRC_TEST_USER'] = 'someone'
+        results = compiler.compile_packages(['test-package'], 'linux')
+        self.assertEqual(results['test-package'][0].status, compiler.COMPILED)
+        self.assertEqual(self.live_file.read_text(), 'email = me@example.com\nuser = someone\n')
+
+    def test_templates_turned_off(self):
+        """Test that a live file is compiled again when its package stops using templates."""
+        compiler.compile_packages(['test-package'], 'linux')
+        config.update_config(package.get_package_file('test-package'), {'templates': False})
+        results = compiler.compile_packages(['test-package'], 'linux')
+        self.assertEqual(results['test-package'][0].status, compiler.COMPILED)
+        self.assertEqual(self.live_file.read_text(), self.filter.read_text())
+
+    def test_plan(self):
+        """Test that a dry run renders templates like a compile."""
+        compiler.compile_packages(['test-package'], 'linux')
+        self.assertEqual(compiler.plan_packages(['test-package'], 'linux')[0].status, compiler.UNCHANGED)
+        os.environ['MODRC_TEST_USER'] = 'someone'
+        self.assertEqual(compiler.plan_packages(['test-package'], 'linux')[0].status, compiler.CHANGED)
@@ -0,0 +1,128 @@
+import pathlib
+import tempfile
+import unittest
+from unittest import mock
+
+from modrc import exceptions
+from modrc.lib import compiler, file, helper, package, setup, watch
+
+
+class FakeWatcher:
+    def __init__(self, waits):
+        self.waits = list(waits)
+        self.closed = False
+
+    def wait(self, timeout=None):
+        return self.waits.pop(0) if self.waits else set()
+
+    def close(self):
+        self.closed = True
+
+
+class WatcherTestCase(unittest.TestCase):
+    def setUp(self):
+        # setup a temporary mock home directory with a package, file and filter
+        self.temp = tempfile.TemporaryDirectory()
+        self.temp_dir = pathlib.Path(self.temp.name)
+        setup.initial_setup(self.temp_dir)
+        package.create_package('test-package')
+        file.create_file('test-file', 'test-package')
+        self.filter_path = file.create_file_filter('global', 'test-file', 'test-package')
+        self.packages_dir = helper.get_packages_dir()
+
+    def tearDown(self):
+        # destroy the ModRC symlink
+        setup.teardown(ignore_errors=True)
+        # destroy the temp directory
+        self.temp.cleanup()
+
+    def check_watcher(self, watcher):
+        try:
+            self.assertEqual(watcher.wait(0), set())
+            # a changed filter
+            self.filter_path.write_text('GLOBAL')
+            self.assertEqual(watcher.wait(1), {('test-package', 'test-file')})
+            # a new file with a filter
+            file.create_file('new-file', 'test-package')
+            file.create_file_filter('global', 'new-file', 'test-package').write_text('NEW')
+            self.assertIn(('test-package', 'new-file'), watch.wait_for_changes(watcher, 0.05))
+            # a new package with a file
+            package.create_package('new-package')
+            file.create_file('other-file', 'new-package')
+            file.create_file_filter('global', 'other-file', 'new-package')
+            self.assertIn(('new-package', 'other-file'), watch.wait_for_changes(watcher, 0.05))
+        finally:
+            watcher.close()
+
+
+class TestPollingWatcher(WatcherTestCase):
+    def test_changes(self):
+        """Test that changed and new files are found by polling."""
+        self.check_watcher(watch.PollingWatcher(self.packages_dir, poll_seconds=0.05))
+
+
+class TestInotifyWatcher(WatcherTestCase):
+    def test_changes(self):
+        """Test that changed and new files are found from inotify events."""
+        try:
+            watcher = watch.InotifyWatcher(self.packages_dir)
+        except OSError:
+            self.skipTest('inotify is not available')
+        self.check_watcher(watcher)
+
+
+class TestWaitForChanges(unittest.TestCase):
+    def test_debounce(self):
+        """Test that a burst of changes is coalesced into one set of changes."""
+        watcher = FakeWatcher([set(), {('p', 'a')}, {('p', 'a')}, {('p', 'b')}, set(), {('p', 'c')}])
+        self.assertEqual(watch.wait_for_changes(watcher, 0), {('p', 'a'), ('p', 'b')})
+
+    def test_lost_events(self):
+        """Test that any file may have changed if events were lost during a burst."""
+        watcher = FakeWatcher([{('p', 'a')}, None, {('p', 'b')}, set()])
+        self.assertIsNone(watch.wait_for_changes(watcher, 0))
+
+
+class TestWatch(WatcherTestCase):
+    def test_compile_changed_files(self):
+        """Test that only the changed live files are compiled while autocompile is on."""
+        setup.populate_modrc_file(auto_compile=True)
+        watcher = FakeWatcher([{('test-package', 'test-file')}])
+        with mock.patch('modrc.lib.watch.get_watcher', return_value=watcher), \
+                mock.patch('modrc.lib.compiler.compile_packages', return_value={}) as compile_packages:
+            watching = watch.watch('linux', debounce=0)
+            self.assertEqual(next(watching), {})
+            watching.close()
+        compile_packages.assert_called_once_with(['test-package'], 'linux', file_names={'test-file'}, context=mock.ANY)
+        self.assertTrue(watcher.closed)
+
+    def test_compile_live_file(self):
+        """Test that a changed filter is compiled into its live file."""
+        setup.populate_modrc_file(auto_compile=True)
+        self.filter_path.write_text('GLOBAL')
+        watcher = FakeWatcher([{('test-package', 'test-file')}])
+        with mock.patch('modrc.lib.watch.get_watcher', return_value=watcher):
+            results = next(watch.watch('linux', debounce=0))
+        self.assertEqual(results['test-package'][0].status, compiler.COMPILED)
+        self.assertEqual(helper.get_live_dir().joinpath('test-file').read_text(), 'GLOBAL')
+
+    def test_autocompile_off(self):
+        """Test that nothing is compiled while autocompile is off."""
+        setup.populate_modrc_file(auto_compile=False)
+        watcher = FakeWatcher([{('test-package', 'test-file')}])
+        with mock.patch('modrc.lib.watch.get_watcher', return_value=watcher), \
+                mock.patch('modrc.lib.compiler.compile_packages') as compile_packages:
+            self.assertIsNone(next(watch.watch('linux', debounce=0)))
+        self.assertFalse(compile_packages.called)
+
+    def test_error_keeps_watching(self):
+        """Test that an error compiling one burst is yielded and the next burst is still compiled."""
+        setup.populate_modrc_file(auto_compile=True)
+        watcher = FakeWatcher([{('test-package', 'test-file')}, set(), {('test-package', 'test-file')}])
+        error = exceptions.ModRCChunkDoesNotExistError('Chunk does not exist')
+        with mock.patch('modrc.lib.watch.get_watcher', return_value=watcher), \
+                mock.patch('modrc.lib.compiler.compile_packages', side_effect=[error, {}]):
+            watching = watch.watch('linux', debounce=0)
+            self.assertIs(next(watching), error)
+            self.assertEqual(next(watching), {})
+            watching.close()
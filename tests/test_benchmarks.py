@@ -0,0 +1,82 @@
+import json
+import os
+import pathlib
+import tempfile
+import unittest
+from unittest import mock
+
+from click import testing
+
+from benchmarks import __main__ as benchmarks_main
+from benchmarks import tree
+import modrc
+from modrc.lib import filters, helper, setup
+
+
+class TestTree(unittest.TestCase):
+    def test_temporary_home(self):
+        """Test that the home directory is restored after the block."""
+        home = os.environ.get('HOME')
+        with tree.temporary_home() as temp_home:
+            self.assertEqual(str(pathlib.Path.home()), temp_home)
+        self.assertEqual(os.environ.get('HOME'), home)
+
+    def test_filter_names(self):
+        """Test that every generated filter name is valid and unique."""
+        names = tree.get_filter_names(40)
+        self.assertEqual(len(set(names)), 40)
+        self.assertTrue(all(filters.valid_filter_name(name) for name in names))
+
+    def test_generate_tree(self):
+        """Test that the tree has the requested shape and filter size."""
+        with tree.temporary_home():
+            setup.initial_setup()
+            created = tree.generate_tree(2, 3, 4, 100)
+            self.assertEqual(len(created), 6)
+            file_dir = helper.get_packages_dir().joinpath('package-1', 'files', 'package-1-file-2')
+            self.assertEqual(sorted(path.name for path in file_dir.iterdir()), sorted(tree.get_filter_names(4)))
+            self.assertEqual(file_dir.joinpath('global').stat().st_size, 100)
+            setup.teardown()
+
+
+class TestBenchmarks(unittest.TestCase):
+    def test_report(self):
+        """Test that a small run reports every benchmark as JSON and compares with a baseline."""
+        runner = testing.CliRunner()
+        args = ['--packages', '1', '--files', '2', '--filters', '3', '--filter-size', '10', '-r', '1']
+        with tempfile.TemporaryDirectory() as temp_dir:
+            baseline = os.path.join(temp_dir, 'baseline.json')
+            result = runner.invoke(benchmarks_main.main, args + ['-o', baseline])
+            self.assertEqual(result.exit_code, 0, result.output)
+            result = runner.invoke(benchmarks_main.main, args + ['-c', baseline])
+        self.assertEqual(result.exit_code, 0, result.output)
+        report = json.loads(result.output)
+        self.assertEqual(set(report['results']), {
+            'compile_file', 'compile_file_warm', 'get_modrc_dir', 'get_packages_dir', 'get_live_dir', 'valid_filter_name',
+            'populate_modrc_file', 'initial_setup', 'teardown'
+        })
+        self.assertEqual(report['results']['compile_file']['calls'], 2)
+        self.assertEqual(report['results']['compile_file_warm']['calls'], 2)
+        self.assertEqual(set(report['compare']['ratios']), set(report['results']))
+
+    def test_path_lookups(self):
+        """Test that paths are looked up through the context, or the helper functions without one."""
+        with tree.temporary_home():
+            setup.initial_setup()
+            with mock.patch('modrc.lib.helper.get_live_dir') as get_live_dir:
+                self.assertEqual(benchmarks_main.get_path_lookups()['get_live_dir'](), helper.get_context().live_dir)
+            self.assertFalse(get_live_dir.called)
+            with mock.patch.object(helper, 'get_context') as get_context:
+                del helper.get_context
+                lookups = benchmarks_main.get_path_lookups()
+                self.assertEqual(lookups['get_live_dir'](), helper.get_live_dir())
+            self.assertFalse(get_context.called)
+            setup.teardown()
+
+    def test_older_version(self):
+        """Test that the version is read from the version attribute of versions of ModRC without get_version."""
+        with mock.patch.object(modrc, '__version__', '0.1.0', create=True), \
+                mock.patch.object(modrc, 'get_version') as get_version:
+            del modrc.get_version
+            self.assertEqual(benchmarks_main.get_version(), '0.1.0')
+        self.assertFalse(get_version.called)
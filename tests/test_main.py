@@ -0,0 +1,146 @@
+import json
+import os
+import pathlib
+import subprocess
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+from click import testing
+
+import modrc
+from modrc import __main__
+from modrc.commands import COMMANDS
+
+
+# the most time in microseconds that imports may take to show the top level help
+HELP_IMPORT_TIME_BUDGET = 150000
+# modules that must not be imported to show the top level help
+HELP_FORBIDDEN_MODULES = {
+    'pkg_resources', 'yaml', 'distro', 'modrc.lib.profiler', 'modrc.commands.bootstrap', 'modrc.commands.chunk',
+    'modrc.commands.compile', 'modrc.commands.deploy', 'modrc.commands.export', 'modrc.commands.index',
+    'modrc.commands.package', 'modrc.commands.serve', 'modrc.commands.setup', 'modrc.commands.store',
+    'modrc.commands.watch'
+}
+
+
+def run_help_with_import_times():
+    # run the top level help in a new interpreter and report the import times of its modules
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'from modrc.__main__ import main; main(["--help"])'],
+        cwd=str(pathlib.Path(__file__).resolve().parents[1]),
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+        check=True
+    )
+    import_times = {}
+    total = 0
+    for line in completed.stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        # skip the header
+        if not cumulative.strip().isdigit():
+            continue
+        import_times[name.strip()] = int(cumulative)
+        # nested imports are already counted in the cumulative time of top level imports
+        if not name.startswith('  '):
+            total += int(cumulative)
+    return completed.stdout, import_times, total
+
+
+class TestLazyCommands(unittest.TestCase):
+    def test_short_help_matches_commands(self):
+        """Test that the registered short help is the same as the short help of each command."""
+        for cmd_name in COMMANDS:
+            command = __main__.main.get_command(None, cmd_name)
+            self.assertEqual(command.get_short_help_str(), COMMANDS[cmd_name][2])
+
+    def test_commands_listed(self):
+        """Test that every registered command is listed in the help."""
+        result = testing.CliRunner().invoke(__main__.main, ['--help'])
+        listed = [line.split(None, 1) for line in result.output.split('Commands:')[1].strip().splitlines()]
+        self.assertEqual(listed, [[cmd_name, COMMANDS[cmd_name][2]] for cmd_name in sorted(COMMANDS)])
+        self.assertEqual(result.exit_code, 0)
+
+    @unittest.skipIf(sys.version_info < (3, 7), '-X importtime requires Python 3.7')
+    def test_help_import_time(self):
+        """Test that the help does not import any subcommand and stays within the import time budget."""
+        output, import_times, total = run_help_with_import_times()
+        self.assertIn('Commands:', output)
+        self.assertFalse(HELP_FORBIDDEN_MODULES & set(import_times))
+        self.assertLess(total, HELP_IMPORT_TIME_BUDGET)
+
+
+class TestVersion(unittest.TestCase):
+    def test_version_option(self):
+        """Test that the version is read when the version option is given."""
+        with mock.patch('modrc.get_version', return_value='1.2.3') as get_version:
+            result = testing.CliRunner().invoke(__main__.main, ['--version'])
+        get_version.assert_called_once_with()
+        self.assertIn('version 1.2.3', result.output)
+        self.assertEqual(result.exit_code, 0)
+
+    def test_version_not_read(self):
+        """Test that the version is not read unless the version option is given."""
+        with mock.patch('modrc.get_version') as get_version:
+            testing.CliRunner().invoke(__main__.main, ['--help'])
+        self.assertFalse(get_version.called)
+
+    @unittest.skipIf(sys.version_info < (3, 8), 'importlib.metadata requires Python 3.8')
+    def test_version_cached(self):
+        """Test that the package metadata is only read the first time the version is asked for."""
+        modrc.get_version.cache_clear()
+        try:
+            with mock.patch('importlib.metadata.version', return_value='1.2.3') as version:
+                self.assertEqual(modrc.get_version(), '1.2.3')
+                self.assertEqual(modrc.get_version(), '1.2.3')
+            version.assert_called_once_with('modrc')
+        finally:
+            modrc.get_version.cache_clear()
+
+
+class TestProfile(unittest.TestCase):
+    def invoke(self, args, env=None):
+        with mock.patch('modrc.lib.compiler.compile_packages', return_value={}), \
+                mock.patch('modrc.lib.package.list_packages', return_value=[]):
+            return testing.CliRunner().invoke(__main__.main, args, env=env)
+
+    def test_profile_option(self):
+        """Test that the profile summary is printed and the instrumentation removed after the command."""
+        stat = os.stat
+        result = self.invoke(['--profile', 'compile', '-s', 'macos'])
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn('phase', result.stderr)
+        self.assertIn('import', result.stderr)
+        self.assertIn('modrc.commands.compile', sys.modules)
+        self.assertIs(os.stat, stat)
+
+    def test_profile_output(self):
+        """Test that a Chrome trace is written instead of the summary."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            trace_file = os.path.join(temp_dir, 'trace.json')
+            result = self.invoke(['--profile-output', trace_file, 'compile', '-s', 'macos'])
+            with open(trace_file) as tf:
+                trace = json.load(tf)
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertNotIn('phase', result.stderr)
+        self.assertIn('import', {event['name'] for event in trace['traceEvents']})
+
+    def test_trace_environment(self):
+        """Test that MODRC_TRACE profiles the command, writing a trace unless it is 1."""
+        result = self.invoke(['compile', '-s', 'macos'], env={'MODRC_TRACE': '1'})
+        self.assertIn('phase', result.stderr)
+        with tempfile.TemporaryDirectory() as temp_dir:
+            trace_file = os.path.join(temp_dir, 'trace.json')
+            self.invoke(['compile', '-s', 'macos'], env={'MODRC_TRACE': trace_file})
+            self.assertTrue(os.path.isfile(trace_file))
+
+    def test_not_profiled(self):
+        """Test that nothing is profiled without the option or with MODRC_TRACE=0."""
+        with mock.patch('modrc.lib.profiler.Profiler') as profiler:
+            self.invoke(['compile', '-s', 'macos'])
+            self.invoke(['compile', '-s', 'macos'], env={'MODRC_TRACE': '0'})
+        self.assertFalse(profiler.called)